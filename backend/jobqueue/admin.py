@@ -0,0 +1,24 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from taskmaster.admin_lists import ScalableAdminMixin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """Admin configuration for queued jobs; failed jobs can be retried."""
+    
+    list_display = ['name', 'queue', 'priority', 'status', 'attempts', 'run_at', 'finished_at']
+    list_filter = ['status', 'queue']
+    search_fields = ['name']
+    ordering = ['-id']
+    readonly_fields = ['attempts', 'locked_by', 'locked_until', 'unique_key', 'last_error', 'created_at', 'finished_at']
+    actions = ['retry']
+    
+    @admin.action(description='Retry selected failed jobs')
+    def retry(self, request, queryset):
+        count = queryset.filter(status='failed').update(
+            status='queued', attempts=0, run_at=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f'Requeued {count} jobs.')
@@ -0,0 +1,125 @@
+"""
+Background jobs with a Celery-compatible calling API.
+
+Decorate a function with ``@job`` in an app's ``jobs`` module and call
+``func.delay(*args, **kwargs)`` or ``func.apply_async(args, kwargs,
+countdown=..., eta=..., priority=..., queue=...)``. Arguments must be
+JSON serializable. ``JOB_QUEUE['BACKEND']`` decides where the call goes:
+
+- ``database``: a Job row, run by ``python manage.py run_jobs`` workers
+  (jobqueue.worker). No broker is needed. Jobs enqueued inside a
+  transaction only become visible when it commits.
+- ``celery``: the matching Celery task (see taskmaster/celery.py); needs
+  the celery package and a broker.
+- ``eager``: runs the function inline, for tests.
+
+Priorities are ours, not Celery's: higher runs first.
+"""
+
+from datetime import timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from taskmaster.conf import settings_getter
+
+DEFAULTS = {
+    'BACKEND': 'database',
+    'QUEUES': ['default'],  # Queues run_jobs workers serve by default
+    'MAX_RETRIES': 3,
+    'RETRY_DELAY': 10,  # Seconds before the first retry, doubling per attempt
+    'LEASE': 300,  # Seconds a claimed job is leased for; renewed every LEASE / 3 while it runs
+    'POLL_INTERVAL': 1,  # Seconds to wait when nothing is due
+    'LEADER_TTL': 30,  # Seconds; the leader runs the schedule and requeues expired leases
+    'KEEP_DONE': 86400,  # Seconds finished jobs are kept
+    'SCHEDULE': {},  # Same format as CELERY_BEAT_SCHEDULE, with 'schedule' in seconds
+}
+
+# Job name -> JobFunction, filled in as jobs modules are imported
+registry = {}
+
+
+get_job_settings = settings_getter('JOB_QUEUE', DEFAULTS)
+
+
+class JobFunction:
+    """A registered job; call it directly to run it inline."""
+    
+    def __init__(self, func, name, queue, priority, max_retries):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_retries = max_retries
+        self.celery_task = None
+        self.__doc__ = func.__doc__
+        self.__wrapped__ = func
+    
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+    
+    def __repr__(self):
+        return f'<job {self.name}>'
+    
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+    
+    def apply_async(self, args=None, kwargs=None, countdown=None, eta=None, priority=None, queue=None,
+                    unique_key=None):
+        """
+        Enqueue a call. Returns the Job row (``database``), Celery's
+        AsyncResult (``celery``) or the function's return value (``eager``).
+        With ``unique_key``, a second call with the same key is dropped and
+        returns None.
+        """
+        args, kwargs = list(args or ()), dict(kwargs or {})
+        backend = get_job_settings()['BACKEND']
+        if backend == 'eager':
+            return self.func(*args, **kwargs)
+        if backend == 'celery':
+            options = {'countdown': countdown, 'eta': eta, 'priority': priority, 'queue': queue}
+            return self.celery_task.apply_async(args, kwargs, **{k: v for k, v in options.items() if v is not None})
+        
+        from .models import Job
+        
+        run_at = eta or timezone.now()
+        if countdown:
+            run_at += timedelta(seconds=countdown)
+        job = Job(
+            name=self.name, args=args, kwargs=kwargs, queue=queue or self.queue,
+            priority=self.priority if priority is None else priority,
+            max_attempts=self.max_retries + 1, run_at=run_at, unique_key=unique_key,
+        )
+        try:
+            with transaction.atomic():
+                job.save()
+        except IntegrityError:
+            if unique_key is None:
+                raise
+            return None
+        return job
+
+
+def job(func=None, *, name=None, queue='default', priority=0, max_retries=None):
+    """
+    Register ``func`` as a job, usable as ``@job`` or ``@job(queue=...,
+    priority=..., max_retries=...)``. The name defaults to the dotted path.
+    """
+    def register(func):
+        config = get_job_settings()
+        retries = config['MAX_RETRIES'] if max_retries is None else max_retries
+        job_function = JobFunction(func, name or f'{func.__module__}.{func.__name__}', queue, priority, retries)
+        if config['BACKEND'] == 'celery':
+            try:
+                from celery import shared_task
+            except ImportError:
+                raise ImproperlyConfigured('JOB_QUEUE["BACKEND"] = "celery" requires the celery package.')
+            job_function.celery_task = shared_task(
+                name=job_function.name, max_retries=retries,
+                autoretry_for=(Exception,), retry_backoff=config['RETRY_DELAY'],
+            )(func)
+        registry[job_function.name] = job_function
+        return job_function
+    
+    return register(func) if func is not None else register
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class JobQueueConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'jobqueue'
+    
+    def ready(self):
+        from django.utils.module_loading import autodiscover_modules
+        
+        # Register the @job functions of every app's jobs module
+        autodiscover_modules('jobs')
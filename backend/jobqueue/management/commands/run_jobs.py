@@ -0,0 +1,31 @@
+"""
+Run database-queued jobs (see jobqueue.worker). Start one process per
+worker; any number can share a queue.
+"""
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from jobqueue.api import get_job_settings
+from jobqueue.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--queue', action='append', dest='queues',
+                            help=f"Queue(s) to serve (default: {', '.join(get_job_settings()['QUEUES'])})")
+        parser.add_argument('--until-idle', action='store_true', help='Exit once no job is due')
+    
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        
+        worker = Worker(options['queues'])
+        self.stdout.write(f"Worker {worker.name} serving {', '.join(worker.queues)}")
+        ran = worker.run(until_idle=options['until_idle'], stop=stop)
+        self.stdout.write(self.style.SUCCESS(f'Ran {ran} jobs'))
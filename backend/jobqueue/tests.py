@@ -0,0 +1,135 @@
+import time
+from datetime import timedelta
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .api import DEFAULTS, job
+from .models import Job
+from .worker import LEADER_LOCK, Worker, acquire_lock, schedule_periodic
+
+calls = []
+
+
+@job(name='jobqueue.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@job(name='jobqueue.tests.fail', max_retries=1)
+def fail():
+    raise ValueError('Boom')
+
+
+@job(name='jobqueue.tests.slow')
+def slow(seconds):
+    time.sleep(seconds)
+    calls.append(Job.objects.get(status='running').locked_until)
+
+
+def worker(name='worker-1', **config):
+    return Worker(config=dict(DEFAULTS, **config), name=name)
+
+
+@override_settings(JOB_QUEUE={'BACKEND': 'database'})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+    
+    def test_delay_enqueues_a_job(self):
+        queued = record.delay(1)
+        self.assertEqual((queued.name, queued.args, queued.status), ('jobqueue.tests.record', [1], 'queued'))
+        self.assertEqual(queued.max_attempts, DEFAULTS['MAX_RETRIES'] + 1)
+    
+    def test_unique_key_drops_the_second_call(self):
+        self.assertIsNotNone(record.apply_async([1], unique_key='once'))
+        self.assertIsNone(record.apply_async([2], unique_key='once'))
+        self.assertEqual(Job.objects.count(), 1)
+    
+    def test_claim_takes_the_highest_priority_due_job(self):
+        record.apply_async([1])
+        urgent = record.apply_async([2], priority=5)
+        record.apply_async([3], priority=9, countdown=60)
+        now = timezone.now()
+        claimed = worker().claim(now)
+        self.assertEqual(claimed.pk, urgent.pk)
+        self.assertEqual((claimed.status, claimed.attempts, claimed.locked_by), ('running', 1, 'worker-1'))
+        self.assertEqual(claimed.locked_until, now + timedelta(seconds=DEFAULTS['LEASE']))
+    
+    def test_claimed_job_is_not_claimed_again(self):
+        record.delay(1)
+        now = timezone.now()
+        self.assertIsNotNone(worker('worker-1').claim(now))
+        self.assertIsNone(worker('worker-2').claim(now))
+    
+    def test_claim_only_serves_its_queues(self):
+        record.apply_async([1], queue='mail')
+        now = timezone.now()
+        self.assertIsNone(worker().claim(now))
+        self.assertIsNotNone(Worker(['mail'], config=dict(DEFAULTS), name='mailer').claim(now))
+    
+    def test_successful_job_is_done(self):
+        record.delay('hello')
+        self.assertIsNotNone(worker().run_once())
+        self.assertEqual(calls, ['hello'])
+        done = Job.objects.get()
+        self.assertEqual((done.status, done.locked_until), ('done', None))
+        self.assertIsNotNone(done.finished_at)
+    
+    def test_failing_job_is_retried_with_backoff_then_failed(self):
+        fail.delay()
+        runner = worker(RETRY_DELAY=10)
+        with self.assertLogs('jobqueue.worker', 'WARNING'):
+            runner.run_once()
+        retried = Job.objects.get()
+        self.assertEqual((retried.status, retried.attempts), ('queued', 1))
+        self.assertIn('ValueError: Boom', retried.last_error)
+        self.assertGreaterEqual(retried.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertIsNone(runner.run_once())  # Not due yet
+        
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobqueue.worker', 'ERROR'):
+            runner.run_once()
+        failed = Job.objects.get()
+        self.assertEqual((failed.status, failed.attempts), ('failed', 2))
+    
+    def test_leader_requeues_expired_leases(self):
+        record.delay(1)
+        fail.delay()
+        now = timezone.now()
+        runner = worker()
+        for _ in range(2):
+            runner.claim(now)
+        Job.objects.filter(name='jobqueue.tests.fail').update(attempts=2)  # Out of attempts
+        later = now + timedelta(seconds=DEFAULTS['LEASE'] + 1)
+        self.assertTrue(runner.leader_tick(later))
+        statuses = dict(Job.objects.values_list('name', 'status'))
+        self.assertEqual(statuses, {'jobqueue.tests.record': 'queued', 'jobqueue.tests.fail': 'failed'})
+        self.assertEqual(Job.objects.get(name='jobqueue.tests.fail').last_error, 'Lease expired')
+    
+    def test_only_one_worker_leads(self):
+        self.assertTrue(acquire_lock(LEADER_LOCK, 'worker-1', 30))
+        self.assertFalse(worker('worker-2').leader_tick(timezone.now()))
+        self.assertTrue(acquire_lock(LEADER_LOCK, 'worker-1', 30))
+    
+    def test_periodic_jobs_are_enqueued_once_per_period(self):
+        schedule = {'every-minute': {'task': 'jobqueue.tests.record', 'schedule': 60, 'args': [1]}}
+        now = timezone.now().replace(second=0, microsecond=0)
+        self.assertEqual(len(schedule_periodic(schedule, now)), 1)
+        self.assertEqual(schedule_periodic(schedule, now + timedelta(seconds=30)), [])
+        self.assertEqual(len(schedule_periodic(schedule, now + timedelta(seconds=60))), 1)
+
+
+@override_settings(JOB_QUEUE={'BACKEND': 'database'})
+class LeaseHeartbeatTests(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+    
+    def test_running_job_keeps_its_lease(self):
+        slow.delay(0.6)
+        runner = worker(LEASE=0.3)
+        claimed = runner.claim(timezone.now())
+        runner.execute(claimed)
+        # Renewed while it ran, well past the lease it was claimed with
+        self.assertGreater(calls[0], claimed.locked_until)
+        self.assertEqual(Job.objects.get().status, 'done')
@@ -0,0 +1,237 @@
+"""
+Database job worker (``python manage.py run_jobs``).
+
+Workers claim the highest-priority due job of their queues. Where the
+database supports it they use ``SELECT ... FOR UPDATE SKIP LOCKED``, so
+concurrent workers never wait on each other's rows. Elsewhere (SQLite)
+a worker claims by a conditional ``UPDATE ... WHERE status = 'queued'``,
+which only one of them can win. A claimed job is leased for ``LEASE``
+seconds, and a heartbeat thread renews the lease every ``LEASE / 3``
+seconds while the job runs, so long jobs keep it and only the jobs of a
+worker that died are requeued.
+
+A job that raises is retried after ``RETRY_DELAY * 2 ** (attempts - 1)``
+seconds, with jitter, until ``max_attempts``; then it stays ``failed`` and
+can be retried from the admin.
+
+One worker at a time holds the leader lock. The leader enqueues the
+periodic jobs of ``SCHEDULE``, requeues jobs whose lease expired (their
+worker died or overran) and deletes finished jobs older than ``KEEP_DONE``.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import DatabaseError, IntegrityError, close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .api import get_job_settings, registry
+from .models import Job, Lock
+
+logger = logging.getLogger(__name__)
+
+LEADER_LOCK = 'jobqueue.leader'
+
+
+def acquire_lock(name, owner, ttl):
+    """Take or extend the lease ``name`` for ``owner``. Returns whether ``owner`` holds it."""
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=ttl)
+    if Lock.objects.filter(Q(owner=owner) | Q(expires_at__lt=now), name=name).update(
+        owner=owner, expires_at=expires_at
+    ):
+        return True
+    try:
+        with transaction.atomic():
+            Lock.objects.create(name=name, owner=owner, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def release_lock(name, owner):
+    Lock.objects.filter(name=name, owner=owner).delete()
+
+
+def schedule_periodic(schedule, now):
+    """
+    Enqueue each SCHEDULE entry once per period; the period slot is part
+    of the job's unique key, so concurrent or repeated calls are harmless.
+    Returns the jobs enqueued.
+    """
+    enqueued = []
+    for entry_name, entry in schedule.items():
+        period = entry['schedule']
+        period = period.total_seconds() if isinstance(period, timedelta) else period
+        slot = int(now.timestamp() // period)
+        job_function = registry.get(entry['task'])
+        if job_function is None:
+            logger.error('Scheduled job %s is not registered', entry['task'])
+            continue
+        queued = job_function.apply_async(
+            entry.get('args'), entry.get('kwargs'), unique_key=f'periodic:{entry_name}:{slot}',
+            **entry.get('options', {}),
+        )
+        if queued is not None:
+            enqueued.append(queued)
+    return enqueued
+
+
+class LeaseHeartbeat(threading.Thread):
+    """Renews the lease of a running job every ``lease / 3`` seconds until stopped."""
+    
+    def __init__(self, job_id, owner, lease):
+        super().__init__(name=f'job-lease-{job_id}', daemon=True)
+        self.job_id = job_id
+        self.owner = owner
+        self.lease = lease
+        self.stopped = threading.Event()
+    
+    def run(self):
+        try:
+            while not self.stopped.wait(self.lease / 3):
+                try:
+                    renewed = Job.objects.filter(pk=self.job_id, locked_by=self.owner, status='running').update(
+                        locked_until=timezone.now() + timedelta(seconds=self.lease)
+                    )
+                except DatabaseError:
+                    # E.g. SQLite busy with the job's own writes; the next beat tries again
+                    logger.warning('Could not renew the lease of job #%s', self.job_id, exc_info=True)
+                    continue
+                if not renewed:
+                    logger.warning('Job #%s lost its lease', self.job_id)
+                    return
+        finally:
+            # This thread's own connection
+            connections.close_all()
+    
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Worker:
+    """Claims and runs jobs of ``queues`` one at a time."""
+    
+    def __init__(self, queues=None, config=None, name=None):
+        self.config = config or get_job_settings()
+        self.queues = list(queues or self.config['QUEUES'])
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.rng = random.Random()
+        self.last_leader_tick = None
+    
+    def claim(self, now):
+        """Lease the next due job, or return None."""
+        ready = Job.objects.filter(status='queued', queue__in=self.queues, run_at__lte=now).order_by(
+            '-priority', 'run_at', 'id'
+        )
+        lease = {
+            'status': 'running',
+            'locked_by': self.name,
+            'locked_until': now + timedelta(seconds=self.config['LEASE']),
+            'attempts': F('attempts') + 1,
+        }
+        if connections[ready.db].features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                pk = ready.select_for_update(skip_locked=True).values_list('pk', flat=True).first()
+                if pk is None:
+                    return None
+                Job.objects.filter(pk=pk).update(**lease)
+            return Job.objects.get(pk=pk)
+        
+        # Another worker may claim a candidate first; the status check makes that a miss
+        for pk in ready.values_list('pk', flat=True)[:5]:
+            if Job.objects.filter(pk=pk, status='queued').update(**lease):
+                return Job.objects.get(pk=pk)
+        return None
+    
+    def backoff(self, attempts):
+        delay = self.config['RETRY_DELAY'] * 2 ** (attempts - 1)
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+    
+    def execute(self, job):
+        """Run a claimed job and record the outcome."""
+        mine = Job.objects.filter(pk=job.pk, locked_by=self.name, status='running')
+        heartbeat = LeaseHeartbeat(job.pk, self.name, self.config['LEASE'])
+        heartbeat.start()
+        try:
+            job_function = registry.get(job.name) or import_string(job.name)
+            job_function(*job.args, **job.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+        else:
+            error = None
+        finally:
+            heartbeat.stop()
+        
+        if error is None:
+            mine.update(status='done', locked_until=None, finished_at=timezone.now())
+            return True
+        now = timezone.now()
+        if job.attempts < job.max_attempts:
+            logger.warning('Job %s #%s failed, retrying', job.name, job.pk)
+            mine.update(
+                status='queued', locked_by='', locked_until=None, last_error=error,
+                run_at=now + timedelta(seconds=self.backoff(job.attempts)),
+            )
+        else:
+            logger.error('Job %s #%s failed after %d attempts', job.name, job.pk, job.attempts)
+            mine.update(status='failed', locked_until=None, last_error=error, finished_at=now)
+        return False
+    
+    def run_once(self):
+        """Run one due job. Returns it, or None if nothing was due."""
+        job = self.claim(timezone.now())
+        if job is not None:
+            self.execute(job)
+        return job
+    
+    def leader_tick(self, now):
+        """Housekeeping done by whichever worker holds the leader lock."""
+        if not acquire_lock(LEADER_LOCK, self.name, self.config['LEADER_TTL']):
+            return False
+        schedule_periodic(self.config['SCHEDULE'], now)
+        expired_leases = Job.objects.filter(status='running', locked_until__lt=now)
+        expired_leases.filter(attempts__lt=F('max_attempts')).update(
+            status='queued', locked_by='', locked_until=None, run_at=now
+        )
+        expired_leases.update(status='failed', locked_until=None, last_error='Lease expired', finished_at=now)
+        expired = Job.objects.filter(
+            status='done', finished_at__lt=now - timedelta(seconds=self.config['KEEP_DONE'])
+        ).values_list('pk', flat=True)[:1000]
+        Job.objects.filter(pk__in=list(expired)).delete()
+        return True
+    
+    def run(self, until_idle=False, stop=None):
+        """
+        Run jobs until ``stop`` (a threading.Event) is set, or until
+        nothing is due when ``until_idle``. Returns how many jobs ran.
+        """
+        ran = 0
+        # Leader duties run a few times per lock lifetime so the lease never lapses
+        tick_interval = self.config['LEADER_TTL'] / 3
+        try:
+            while stop is None or not stop.is_set():
+                now = timezone.now()
+                if self.last_leader_tick is None or now - self.last_leader_tick >= timedelta(seconds=tick_interval):
+                    self.leader_tick(now)
+                    self.last_leader_tick = now
+                job = self.run_once()
+                close_old_connections()
+                if job is not None:
+                    ran += 1
+                elif until_idle:
+                    break
+                else:
+                    time.sleep(self.config['POLL_INTERVAL'])
+        finally:
+            release_lock(LEADER_LOCK, self.name)
+        return ran
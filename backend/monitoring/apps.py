@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+    
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .timing import install_execute_wrapper
+        
+        connection_created.connect(install_execute_wrapper)
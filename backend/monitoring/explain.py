@@ -0,0 +1,336 @@
+"""
+Query plan checks for the SQL the API actually runs (``python manage.py
+explain_endpoints``).
+
+Queries are captured with an execute wrapper while an endpoint (or a
+background scan) runs, then explained with the vendor's planner:
+``EXPLAIN QUERY PLAN`` on SQLite, ``EXPLAIN (FORMAT JSON)`` on PostgreSQL.
+Each plan is checked for full table scans and for sorts the planner
+cannot serve from an index (SQLite's temp B-trees, PostgreSQL's Sort
+nodes). For a flagged query, candidate indexes are built from its WHERE
+and ORDER BY clauses:
+
+- the columns compared with ``=``, then one range column, then the sort
+  columns, as a composite index;
+- the same without the constant predicates (``status IN (...)``, boolean
+  flags), which move into the condition of a partial index. SQLite only
+  uses a partial index when it can prove the condition from the query, and
+  it cannot for ``IN`` lists of bound parameters, so those stay columns
+  there.
+
+A candidate can be measured by creating it inside a transaction that is
+rolled back. The report shows timings before and after, and whether the
+flags went away.
+"""
+
+import json
+import re
+import statistics
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.db import connections, transaction
+
+Finding = namedtuple('Finding', ['kind', 'table', 'detail'])
+Query = namedtuple('Query', ['sql', 'params'])
+
+_QUALIFIED = r'"(?P<table>\w+)"\."(?P<column>\w+)"'
+_PREDICATE_RE = re.compile(
+    _QUALIFIED + r'\s*(?P<op>=|<>|!=|<=|>=|<|>|IN\s*\(|BETWEEN|IS\s+NULL|IS\s+NOT\s+NULL)', re.IGNORECASE
+)
+_ORDER_RE = re.compile(_QUALIFIED + r'(?:\s+(?P<direction>ASC|DESC))?', re.IGNORECASE)
+_BOOLEAN_RE = re.compile(r'(?P<negated>NOT\s+)?' + _QUALIFIED + r'(?=\s*(?:AND\b|OR\b|\)|$))', re.IGNORECASE)
+_FROM_RE = re.compile(r'\sFROM\s+"(\w+)"', re.IGNORECASE)
+_CLAUSE_END_RE = re.compile(r'\s(?:GROUP BY|ORDER BY|LIMIT|OFFSET|HAVING)\s', re.IGNORECASE)
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!\w)(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)')
+_SQLITE_TEMP_RE = re.compile(r'USE TEMP B-TREE FOR (.+)')
+
+
+@contextmanager
+def capture_queries(using='default'):
+    """Collect the (sql, params) of every query run in the block, in order."""
+    queries = []
+    
+    def wrapper(execute, sql, params, many, context):
+        if not many:
+            queries.append(Query(sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+    
+    with connections[using].execute_wrapper(wrapper):
+        yield queries
+
+
+class Planner:
+    """Explains queries for one database vendor; subclasses parse the plans."""
+    
+    # Whether a query's ``IN`` list with bound parameters can match a partial index condition
+    partial_in_lists = True
+    
+    def __init__(self, connection):
+        self.connection = connection
+        self.row_counts = {}
+    
+    def table_rows(self, table):
+        if table not in self.row_counts:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f'SELECT COUNT(*) FROM {self.connection.ops.quote_name(table)}')
+                self.row_counts[table] = cursor.fetchone()[0]
+        return self.row_counts[table]
+    
+    def findings(self, query, min_rows=1000):
+        """
+        Plan lines and findings of ``query``. Sorts are attributed to the
+        table the query selects from; findings on tables under ``min_rows``
+        rows are ignored.
+        """
+        lines, findings = self.explain(query)
+        findings = [finding._replace(table=finding.table or from_table(query.sql)) for finding in findings]
+        return lines, [
+            finding for finding in findings
+            if finding.table is None or self.table_rows(finding.table) >= min_rows
+        ]
+    
+    def literal(self, value):
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, (int, float)):
+            return str(value)
+        return "'" + str(value).replace("'", "''") + "'"
+
+
+class SQLitePlanner(Planner):
+    partial_in_lists = False
+    
+    def explain(self, query):
+        with self.connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + query.sql, query.params)
+            lines = [row[-1] for row in cursor.fetchall()]
+        findings = []
+        for line in lines:
+            scan = _SQLITE_SCAN_RE.match(line)
+            if scan:
+                findings.append(Finding('scan', scan.group(1), line))
+            temp = _SQLITE_TEMP_RE.search(line)
+            if temp:
+                findings.append(Finding('sort', None, f'temp B-tree for {temp.group(1)}'))
+        return lines, findings
+    
+    def literal(self, value):
+        if isinstance(value, bool):
+            return str(int(value))
+        return super().literal(value)
+
+
+class PostgresPlanner(Planner):
+    def explain(self, query):
+        with self.connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + query.sql, query.params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, findings = [], []
+        
+        def walk(node, depth):
+            relation = node.get('Relation Name')
+            lines.append('  ' * depth + node['Node Type'] + (f' on {relation}' if relation else '')
+                         + f" (rows={node.get('Plan Rows')}, cost={node.get('Total Cost')})")
+            if node['Node Type'] == 'Seq Scan':
+                findings.append(Finding('scan', relation, lines[-1].strip()))
+            elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+                findings.append(Finding('sort', None, 'sort on ' + ', '.join(node.get('Sort Key', []))))
+            for child in node.get('Plans', []):
+                walk(child, depth + 1)
+        
+        walk(plan[0]['Plan'], 0)
+        return lines, findings
+
+
+PLANNERS = {'sqlite': SQLitePlanner, 'postgresql': PostgresPlanner}
+
+
+def get_planner(using='default'):
+    connection = connections[using]
+    try:
+        return PLANNERS[connection.vendor](connection)
+    except KeyError:
+        raise NotImplementedError(f'EXPLAIN is not supported for {connection.vendor}')
+
+
+class Candidate(namedtuple('Candidate', ['table', 'columns', 'condition', 'lookups'])):
+    """
+    A proposed index: ``columns`` is a tuple of (column, descending),
+    ``condition`` the SQL of a partial index and ``lookups`` the same as
+    (column, lookup, value) triples.
+    """
+    
+    def name(self):
+        return 'explain_' + '_'.join(column for column, _ in self.columns)[:50]
+    
+    def ddl(self, connection):
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(column) + (' DESC' if descending else '') for column, descending in self.columns)
+        sql = f'CREATE INDEX {quote(self.name())} ON {quote(self.table)} ({columns})'
+        return sql + (f' WHERE {self.condition}' if self.condition else '')
+    
+    def model_index(self):
+        """The matching ``models.Index(...)`` for the model's Meta.indexes."""
+        model = next((model for model in apps.get_models() if model._meta.db_table == self.table), None)
+        if model is None:
+            return None
+        names = {field.column: field.name for field in model._meta.concrete_fields}
+        fields = ', '.join(repr(('-' if descending else '') + names.get(column, column)) for column, descending in self.columns)
+        condition = ''
+        if self.lookups:
+            lookups = ', '.join(f'{names.get(column, column)}{lookup}={value!r}' for column, lookup, value in self.lookups)
+            condition = f', condition=Q({lookups})'
+        return f'{model.__name__}: models.Index(fields=[{fields}]{condition})'
+
+
+def _where_clause(sql):
+    start = sql.upper().find(' WHERE ')
+    if start == -1:
+        return None, -1
+    end = _CLAUSE_END_RE.search(sql, start)
+    return sql[start:end.start() if end else len(sql)], start
+
+
+def _order_clause(sql):
+    start = sql.upper().rfind(' ORDER BY ')
+    if start == -1:
+        return ''
+    end = re.search(r'\s(?:LIMIT|OFFSET)\s', sql[start:], re.IGNORECASE)
+    return sql[start + 10:start + end.start() if end else len(sql)]
+
+
+def from_table(sql):
+    match = _FROM_RE.search(sql)
+    return match.group(1) if match else None
+
+
+def candidates(query, table, planner):
+    """Candidate indexes on ``table`` for ``query`` (see the module docstring)."""
+    sql = query.sql
+    where, offset = _where_clause(sql)
+    where = where or ''
+    equality, lists, ranges, constants = [], [], [], []
+    for match in _PREDICATE_RE.finditer(where):
+        if match.group('table') != table:
+            continue
+        column, op = match.group('column'), re.sub(r'\s+', ' ', match.group('op').upper())
+        # Parameters before this predicate tell which ones it compares with
+        first_param = sql[:offset + match.start()].count('%s')
+        if op in ('=', 'IS NULL', 'IN ('):
+            (lists if op == 'IN (' else equality).append(column)
+            values = _predicate_params(where, match, query.params, first_param, op)
+            if values is not None and (op != 'IN (' or planner.partial_in_lists):
+                constants.append((column, _condition(planner, column, op, values), _lookup(op, values)))
+        elif op not in ('<>', '!=', 'IS NOT NULL'):
+            ranges.append(column)
+    for match in _BOOLEAN_RE.finditer(where):
+        # A bare column is a boolean test unless it is the right side of a comparison
+        if match.group('table') != table or where[:match.start()].rstrip(' (').endswith(('=', '<', '>')):
+            continue
+        column = match.group('column')
+        equality.append(column)
+        negated = bool(match.group('negated'))
+        constants.append((
+            column, ('NOT ' if negated else '') + planner.connection.ops.quote_name(column), ('', not negated),
+        ))
+    
+    order = [
+        (match.group('column'), (match.group('direction') or '').upper() == 'DESC')
+        for match in _ORDER_RE.finditer(_order_clause(sql)) if match.group('table') == table
+    ]
+    # Equality columns first. An IN list with several values breaks the
+    # index order, so it follows the sort columns when there are any.
+    columns = list(dict.fromkeys(equality))
+    if order:
+        columns += [column for column, _ in order if column not in columns]
+        columns += [column for column in lists if column not in columns]
+    else:
+        columns += [column for column in lists + ranges[:1] if column not in columns]
+    descending = dict(order)
+    columns = tuple((column, descending.get(column, False)) for column in columns)
+    
+    proposals = []
+    if columns:
+        proposals.append(Candidate(table, columns, None, ()))
+    # Constant filters (status IN (...), flags) as the condition of a partial index
+    constant_columns = {column for column, _, _ in constants}
+    partial_columns = tuple(item for item in columns if item[0] not in constant_columns)
+    if constants and partial_columns:
+        constants = list({condition: (column, condition, lookup) for column, condition, lookup in constants}.values())
+        proposals.append(Candidate(
+            table, partial_columns, ' AND '.join(condition for _, condition, _ in constants),
+            tuple((column, *lookup) for column, _, lookup in constants),
+        ))
+    return proposals
+
+
+def _predicate_params(where, match, params, first_param, op):
+    """The literal values of a constant predicate, or None when they are not plain literals."""
+    if op == 'IS NULL':
+        return ()
+    if op == '=':
+        count = 1
+    else:
+        closing = where.find(')', match.end())
+        count = where[match.end():closing].count('%s')
+    values = params[first_param:first_param + count]
+    if len(values) != count or not all(isinstance(value, (str, bool, int)) for value in values):
+        return None
+    # Ids and other long or high-cardinality values make poor partial conditions
+    if any(isinstance(value, str) and len(value) > 20 for value in values) or (
+        op == '=' and isinstance(values[0], int) and not isinstance(values[0], bool)
+    ):
+        return None
+    return values
+
+
+def _condition(planner, column, op, values):
+    name = planner.connection.ops.quote_name(column)
+    if op == 'IS NULL':
+        return f'{name} IS NULL'
+    if op == '=':
+        return f'{name} = {planner.literal(values[0])}'
+    return f"{name} IN ({', '.join(planner.literal(value) for value in values)})"
+
+
+def _lookup(op, values):
+    """(lookup suffix, value) of a constant predicate, for the Q() of the model index."""
+    if op == 'IS NULL':
+        return ('__isnull', True)
+    if op == '=':
+        return ('', values[0])
+    return ('__in', list(values))
+
+
+def time_query(connection, query, repeat=5):
+    """Median wall time of ``query`` in milliseconds."""
+    timings = []
+    with connection.cursor() as cursor:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            cursor.execute(query.sql, query.params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def measure(planner, query, candidate, repeat=5):
+    """
+    Time ``query`` before and after creating ``candidate``; the index is
+    rolled back. Returns (before ms, after ms, findings after).
+    """
+    connection = planner.connection
+    before = time_query(connection, query, repeat)
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(candidate.ddl(connection))
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(candidate.table)}')
+        after = time_query(connection, query, repeat)
+        _, findings = planner.findings(query, min_rows=0)
+        transaction.set_rollback(True, using=connection.alias)
+    return before, after, findings
@@ -0,0 +1,110 @@
+"""
+Compare the JSON and MessagePack (taskmaster.renderers) encodings of real
+API payloads: body size, gzipped size and encode/decode time.
+
+Each endpoint is requested in-process as a seeded user (the one with the
+most tasks by default), with the response cache bypassed. The JSON body is
+decoded and then encoded both ways, ``--repeat`` times; times are medians.
+The ``same`` column checks that unpacking the MessagePack body gives back
+exactly what decoding the JSON body gives, and ``negotiated`` that the
+endpoint answers ``Accept: application/msgpack`` with MessagePack.
+
+Usage:
+    python manage.py bench_msgpack
+    python manage.py bench_msgpack --repeat 50 --path '/api/tasks/?page=2'
+"""
+
+import gzip
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+
+from taskmaster.renderers import MEDIA_TYPE, msgpack, pack, unpack
+from tasks.response_cache import response_cache
+from tasks.serializers import TaskListSerializer
+from users.authentication import VersionedRefreshToken
+
+User = get_user_model()
+
+
+def median_ms(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON and MessagePack payload sizes and encode/decode times.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to request the endpoints as (default: the one with most tasks)')
+        parser.add_argument('--path', action='append', default=[], help='URL path to request instead; repeatable')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per encoding')
+    
+    def handle(self, *args, **options):
+        if msgpack is None:
+            raise CommandError('bench_msgpack requires the msgpack package.')
+        user = self.get_user(options['user'])
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {VersionedRefreshToken.for_user(user).access_token}')
+        renderer = JSONRenderer()
+        repeat = options['repeat']
+        
+        self.stdout.write(
+            f"{'path':<40} {'json B':>9} {'mpack B':>9} {'json gz':>8} {'mpack gz':>8} "
+            f"{'enc json':>8} {'enc mp':>8} {'dec json':>8} {'dec mp':>8}  same negotiated"
+        )
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for path in options['path'] or self.default_paths():
+                response_cache.bump(user.pk)
+                response = client.get(path, HTTP_ACCEPT='application/json')
+                if response.status_code != 200:
+                    self.stderr.write(f'{path} returned HTTP {response.status_code}; skipped')
+                    continue
+                payload = json.loads(response.content)
+                encoded, packed = renderer.render(payload), pack(payload)
+                negotiated = client.get(path, HTTP_ACCEPT=MEDIA_TYPE)['Content-Type'] == MEDIA_TYPE
+                
+                self.stdout.write(
+                    f'{path[:40]:<40} {len(encoded):>9,} {len(packed):>9,} '
+                    f'{len(gzip.compress(encoded)):>8,} {len(gzip.compress(packed)):>8,} '
+                    f'{median_ms(lambda: renderer.render(payload), repeat):>8.2f} '
+                    f'{median_ms(lambda: pack(payload), repeat):>8.2f} '
+                    f'{median_ms(lambda: json.loads(encoded), repeat):>8.2f} '
+                    f'{median_ms(lambda: unpack(packed), repeat):>8.2f}  '
+                    f"{'yes' if unpack(packed) == payload else 'NO':<4} {'yes' if negotiated else 'NO'}"
+                )
+        self.stdout.write('Sizes in bytes, times in ms.')
+    
+    def get_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'No user named "{username}".')
+            return user
+        user = User.objects.annotate(task_count=Count('tasks')).order_by('-task_count').first()
+        if user is None:
+            raise CommandError('No users found; seed the database first.')
+        return user
+    
+    def default_paths(self):
+        tasks = reverse('tasks:task-list')
+        expand = [name for name in TaskListSerializer.Meta.expandable_fields if name not in ('subtasks', 'notifications')]
+        return [
+            tasks,
+            f"{tasks}?expand={','.join(expand)}",
+            reverse('tasks:calendar-view'),
+            reverse('tasks:dashboard'),
+            reverse('tasks:task-export'),
+        ]
@@ -0,0 +1,151 @@
+"""
+Concurrency benchmark comparing SQLite's default settings with the tuned
+profile of taskmaster.backends.sqlite3.
+
+Each profile gets a fresh database file with a task-like table. Worker
+threads then mix indexed list reads with the read-then-update pattern of
+``update_progress``/``snooze`` (fetch the row, then write it back inside a
+transaction) for a fixed time. The report shows throughput, tail latency
+and how many operations failed with "database is locked".
+
+Usage:
+    python manage.py bench_sqlite --threads 8 --seconds 10 --write-ratio 0.3
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from taskmaster.backends.sqlite3.base import DEFAULT_PRAGMAS
+
+PROFILES = {
+    'default': {'pragmas': {}, 'transaction_mode': 'DEFERRED', 'timeout': 5},
+    'tuned': {'pragmas': DEFAULT_PRAGMAS, 'transaction_mode': 'IMMEDIATE', 'timeout': 20},
+}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark concurrent reads/writes on SQLite with default and tuned settings.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--write-ratio', type=float, default=0.3)
+        parser.add_argument('--users', type=int, default=50)
+        parser.add_argument('--tasks-per-user', type=int, default=200)
+        parser.add_argument('--profile', choices=list(PROFILES), action='append',
+                            help='Profile(s) to run (default: all)')
+    
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<8} {'ops/s':>9} {'reads/s':>9} {'writes/s':>9} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'locked':>7}"
+        )
+        for name in options['profile'] or list(PROFILES):
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'bench.sqlite3')
+                self.populate(path, options['users'], options['tasks_per_user'])
+                result = self.run_profile(path, PROFILES[name], options)
+            elapsed = options['seconds']
+            latencies = sorted(result['latencies']) or [0.0]
+            self.stdout.write(
+                f"{name:<8} {(result['reads'] + result['writes']) / elapsed:>9.0f} "
+                f"{result['reads'] / elapsed:>9.0f} {result['writes'] / elapsed:>9.0f} "
+                f"{latencies[len(latencies) // 2] * 1000:>8.2f} "
+                f"{latencies[int(len(latencies) * 0.99)] * 1000:>8.2f} {result['locked']:>7}"
+            )
+    
+    def populate(self, path, users, tasks_per_user):
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE task (
+                id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, title TEXT NOT NULL,
+                status TEXT NOT NULL, priority TEXT NOT NULL, progress INTEGER NOT NULL,
+                due_date TEXT, reminder_time TEXT, snooze_count INTEGER NOT NULL, updated_at TEXT
+            );
+            CREATE INDEX task_user_status ON task (user_id, status);
+            CREATE INDEX task_user_due ON task (user_id, due_date);
+        """)
+        rng = random.Random(0)
+        conn.executemany(
+            'INSERT INTO task (user_id, title, status, priority, progress, due_date, snooze_count) '
+            'VALUES (?, ?, ?, ?, 0, ?, 0)',
+            (
+                (user, f'Task {user}-{i}', rng.choice(['pending', 'in_progress', 'completed']),
+                 rng.choice(['low', 'medium', 'high', 'urgent']), f'2026-{rng.randint(1, 12):02d}-15 12:00:00')
+                for user in range(users) for i in range(tasks_per_user)
+            ),
+        )
+        conn.commit()
+        conn.close()
+    
+    def connect(self, path, profile):
+        conn = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None, check_same_thread=False)
+        for name, value in profile['pragmas'].items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
+    def run_profile(self, path, profile, options):
+        result = {'reads': 0, 'writes': 0, 'locked': 0, 'latencies': []}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+        users = options['users']
+        begin = f"BEGIN {profile['transaction_mode']}"
+        
+        def worker(seed):
+            rng = random.Random(seed)
+            conn = self.connect(path, profile)
+            reads = writes = locked = 0
+            latencies = []
+            while time.perf_counter() < deadline:
+                user = rng.randrange(users)
+                start = time.perf_counter()
+                try:
+                    if rng.random() < options['write_ratio']:
+                        conn.execute(begin)
+                        try:
+                            row = conn.execute(
+                                'SELECT id, snooze_count FROM task WHERE user_id = ? AND status != ? LIMIT 1 OFFSET ?',
+                                (user, 'completed', rng.randrange(50)),
+                            ).fetchone()
+                            if row is not None:
+                                conn.execute(
+                                    "UPDATE task SET progress = ?, snooze_count = ?, "
+                                    "reminder_time = datetime('now', '+1 hour'), updated_at = datetime('now') "
+                                    "WHERE id = ?",
+                                    (rng.randrange(101), row[1] + 1, row[0]),
+                                )
+                            conn.execute('COMMIT')
+                        except BaseException:
+                            conn.execute('ROLLBACK')
+                            raise
+                        writes += 1
+                    else:
+                        conn.execute(
+                            'SELECT * FROM task WHERE user_id = ? AND status IN (?, ?) ORDER BY due_date LIMIT 20',
+                            (user, 'pending', 'in_progress'),
+                        ).fetchall()
+                        reads += 1
+                    latencies.append(time.perf_counter() - start)
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    locked += 1
+            conn.close()
+            with lock:
+                result['reads'] += reads
+                result['writes'] += writes
+                result['locked'] += locked
+                result['latencies'].extend(latencies)
+        
+        threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
@@ -0,0 +1,210 @@
+"""
+Explain the SQL of the API endpoints and background scans, flag full scans
+and sorts that no index serves, and propose indexes for them.
+
+Each endpoint is requested in-process as a seeded user (the one with the
+most tasks by default), with the response cache bypassed, and every query
+it runs is captured. Requests and scans run in transactions that are
+rolled back, so nothing is changed. Duplicate queries are explained once;
+the report lists which endpoints share them.
+
+For each flagged query the candidate indexes of monitoring.explain are
+created one at a time (again inside a rolled-back transaction) and the
+query is timed before and after. The report gives the speedup, whether
+the flags went away and the ``models.Index`` to add.
+
+Usage:
+    python manage.py explain_endpoints
+    python manage.py explain_endpoints --only task-overdue --only reminders --verbose
+    python manage.py explain_endpoints --path '/api/tasks/?status=pending&ordering=-due_date' --no-measure
+"""
+
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobqueue.worker import Worker
+from monitoring.explain import candidates, capture_queries, get_planner, measure
+from monitoring.querystats import fingerprint
+from tasks.archive import archivable, get_archive_settings
+from tasks.models import NotificationDelivery, Task
+from tasks.response_cache import response_cache
+from users.authentication import VersionedRefreshToken
+
+User = get_user_model()
+
+ENDPOINTS = [
+    'tasks:task-list', 'tasks:task-urgent', 'tasks:task-overdue', 'tasks:task-today', 'tasks:task-week',
+    'tasks:task-analytics', 'tasks:calendar-view', 'tasks:dashboard', 'tasks:smart-suggestions',
+    'tasks:notification-list', 'tasks:notification-unread-count', 'users:user-stats',
+]
+
+
+def reminder_scan(now):
+    """Tasks whose reminder is due; the query a reminder sender polls with."""
+    return list(
+        Task.objects.filter(
+            notification_enabled=True, notification_sent=False, reminder_time__lte=now,
+            status__in=Task.OPEN_STATUSES,
+        ).order_by('reminder_time').values_list('id', flat=True)[:500]
+    )
+
+
+def archive_scan(now):
+    config = get_archive_settings()
+    cutoff = now - timedelta(days=config['AGE_DAYS'])
+    return list(archivable(cutoff).order_by('updated_at').values_list('id', flat=True)[:config['BATCH_SIZE']])
+
+
+def push_scan(now):
+    return list(
+        NotificationDelivery.objects.filter(status='pending', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'device_id').values_list('id', flat=True)[:1000]
+    )
+
+
+def job_scan(now):
+    return Worker(name='explain_endpoints').claim(now)
+
+
+# Background queries that no endpoint runs
+SCANS = OrderedDict([
+    ('reminders', reminder_scan),
+    ('archive', archive_scan),
+    ('push-claim', push_scan),
+    ('job-claim', job_scan),
+])
+
+
+class Command(BaseCommand):
+    help = 'Explain the queries of the API endpoints and background scans and propose indexes.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Username to request the endpoints as (default: the one with most tasks)')
+        parser.add_argument('--only', action='append',
+                            help='Endpoint (URL name without namespace) or scan to check; repeatable')
+        parser.add_argument('--path', action='append', default=[], help='Extra URL path to request; repeatable')
+        parser.add_argument('--database', default='default')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Ignore full scans of tables with fewer rows')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query and index')
+        parser.add_argument('--no-measure', action='store_true', help='Propose indexes without timing them')
+        parser.add_argument('--verbose', action='store_true', help='Also print the plans of unflagged queries')
+    
+    def handle(self, *args, **options):
+        try:
+            planner = get_planner(options['database'])
+        except NotImplementedError as e:
+            raise CommandError(str(e))
+        user = self.get_user(options['user'])
+        self.stdout.write(f'Requesting endpoints as {user.username} ({connections[options["database"]].vendor})')
+        
+        queries = OrderedDict()  # fingerprint -> [query, {sources}]
+        for source, captured in self.capture(user, options):
+            for query in captured:
+                if not query.sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                entry = queries.setdefault(fingerprint(query.sql), [query, set()])
+                entry[1].add(source)
+        
+        flagged = 0
+        for query, sources in queries.values():
+            lines, findings = planner.findings(query, options['min_rows'])
+            if not findings and not options['verbose']:
+                continue
+            flagged += bool(findings)
+            self.stdout.write('')
+            self.stdout.write(self.style.WARNING('FLAGGED') if findings else 'ok')
+            self.stdout.write(f"  used by: {', '.join(sorted(sources))}")
+            self.stdout.write(f'  sql: {fingerprint(query.sql)[:400]}')
+            for line in lines:
+                self.stdout.write(f'    | {line}')
+            for finding in findings:
+                self.stdout.write(f'  - {finding.kind}: {finding.detail}')
+            if findings:
+                self.propose(planner, query, findings, options)
+        
+        self.stdout.write('')
+        self.stdout.write(f'{len(queries)} distinct queries, {flagged} flagged')
+    
+    def get_user(self, username):
+        if username:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'No user named "{username}".')
+            return user
+        user = User.objects.annotate(task_count=Count('tasks')).order_by('-task_count').first()
+        if user is None:
+            raise CommandError('No users found; seed the database first.')
+        return user
+    
+    def wanted(self, name, options):
+        return not options['only'] or name.split(':')[-1] in options['only']
+    
+    def capture(self, user, options):
+        """Yield (source, captured queries) for each endpoint, extra path and scan."""
+        using = options['database']
+        client = Client(HTTP_AUTHORIZATION=f'Bearer {VersionedRefreshToken.for_user(user).access_token}')
+        paths = [(name.split(':')[-1], reverse(name)) for name in ENDPOINTS if self.wanted(name, options)]
+        paths += [(path, path) for path in options['path']]
+        
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for source, path in paths:
+                response_cache.bump(user.pk)
+                with transaction.atomic(using=using), capture_queries(using) as captured:
+                    response = client.get(path)
+                    transaction.set_rollback(True, using=using)
+                if response.status_code != 200:
+                    self.stderr.write(f'{path} returned HTTP {response.status_code}; its queries may be incomplete')
+                yield source, captured
+        
+        now = timezone.now()
+        for name, scan in SCANS.items():
+            if self.wanted(name, options):
+                with transaction.atomic(using=using), capture_queries(using) as captured:
+                    scan(now)
+                    transaction.set_rollback(True, using=using)
+                yield f'scan:{name}', captured
+    
+    def propose(self, planner, query, findings, options):
+        tables = dict.fromkeys(finding.table for finding in findings if finding.table)
+        proposals = [candidate for table in tables for candidate in candidates(query, table, planner)]
+        if not proposals:
+            self.stdout.write('  no index proposal (no usable WHERE/ORDER BY columns)')
+            return
+        
+        results = []
+        for candidate in proposals:
+            if options['no_measure']:
+                results.append((candidate, None))
+                continue
+            try:
+                before, after, remaining = measure(planner, query, candidate, options['repeat'])
+            except Exception as e:  # e.g. a condition literal the database rejects
+                self.stdout.write(f'  could not try {candidate.ddl(planner.connection)}: {e}')
+                continue
+            results.append((candidate, (before, after, remaining)))
+        results.sort(key=lambda result: result[1][1] if result[1] else 0)
+        
+        for rank, (candidate, measured) in enumerate(results):
+            label = 'propose' if rank == 0 else 'alternative'
+            self.stdout.write(f'  {label}: {candidate.ddl(planner.connection)}')
+            if measured:
+                before, after, remaining = measured
+                resolved = {finding.kind for finding in findings} - {finding.kind for finding in remaining}
+                self.stdout.write(
+                    f'    {before:.2f} ms -> {after:.2f} ms ({before / max(after, 0.001):.1f}x), '
+                    f"resolves: {', '.join(sorted(resolved)) or 'nothing'}"
+                )
+            model_index = candidate.model_index()
+            if model_index:
+                self.stdout.write(f'    {model_index}')
@@ -0,0 +1,91 @@
+"""
+Dump (and optionally reset) the slow-query fingerprint table of a running server.
+
+The table lives in each server process, so this command reads it over HTTP
+from the staff-only ``/api/monitoring/queries/`` endpoint. With several
+worker processes each call reports the worker that handled it. Queries
+run outside requests (job workers, management commands) are not recorded.
+
+Usage:
+    python manage.py querystats --url http://localhost:8000 --limit 20
+    python manage.py querystats --reset --json > release-1.4-queries.json
+    python manage.py querystats --rollup --order count
+"""
+
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Dump and optionally reset the per-process query fingerprint table of a running server.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://localhost:8000', help='Base URL of the running server')
+        parser.add_argument('--user', help='Staff username to authenticate as (default: first active superuser)')
+        parser.add_argument('--limit', type=int, default=25, help='Number of fingerprints to show')
+        parser.add_argument('--order', default='total', choices=['total', 'count', 'max', 'mean'])
+        parser.add_argument('--view', help='Only show queries issued by this view name')
+        parser.add_argument(
+            '--rollup', action='store_true', help='Merge each fingerprint across views (totals for the whole process)'
+        )
+        parser.add_argument('--reset', action='store_true', help='Reset the table after dumping it')
+        parser.add_argument('--json', action='store_true', help='Print raw JSON instead of a table')
+    
+    def handle(self, *args, **options):
+        user = self.get_staff_user(options['user'])
+        params = {'limit': options['limit'], 'order': options['order']}
+        if options['view']:
+            params['view'] = options['view']
+        if options['rollup']:
+            params['rollup'] = 1
+        
+        url = options['url'].rstrip('/') + reverse('monitoring:query-stats') + '?' + urllib.parse.urlencode(params)
+        request = urllib.request.Request(
+            url,
+            method='DELETE' if options['reset'] else 'GET',
+            headers={'Authorization': f'Bearer {AccessToken.for_user(user)}', 'Accept': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                payload = json.load(response)
+        except urllib.error.HTTPError as e:
+            raise CommandError(f'{url} returned HTTP {e.code}: {e.read().decode(errors="replace")[:200]}')
+        except urllib.error.URLError as e:
+            raise CommandError(f'Could not reach {url}: {e.reason}')
+        
+        if options['json']:
+            self.stdout.write(json.dumps(payload, indent=2))
+            return
+        
+        self.stdout.write(
+            f"pid {payload['pid']}: {payload['entries']}/{payload['max_entries']} fingerprints, "
+            f"{payload['evicted']} evicted{' (table reset)' if payload['reset'] else ''}"
+        )
+        self.stdout.write(f"{'count':>8} {'total ms':>11} {'mean ms':>9} {'max ms':>9}  view / fingerprint")
+        for row in payload['queries']:
+            views = ', '.join(map(str, row['views'])) if 'views' in row else row['view']
+            self.stdout.write(
+                f"{row['count']:>8} {row['total_ms']:>11.1f} {row['mean_ms']:>9.2f} {row['max_ms']:>9.2f}  "
+                f"{views}\n{'':>41}{row['fingerprint'][:300]}"
+            )
+    
+    def get_staff_user(self, username):
+        staff = User.objects.filter(is_active=True, is_staff=True)
+        if username:
+            user = staff.filter(username=username).first()
+            if user is None:
+                raise CommandError(f'No active staff user named "{username}".')
+            return user
+        user = staff.filter(is_superuser=True).order_by('pk').first()
+        if user is None:
+            raise CommandError('No active superuser found; pass --user with a staff username.')
+        return user
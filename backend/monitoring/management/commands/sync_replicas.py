@@ -0,0 +1,45 @@
+"""
+Copy the primary SQLite database into each SQLite read replica.
+
+Real replicas are kept up to date by the database server; this stands in
+for replication when trying out replica routing with local SQLite files.
+
+Usage:
+    TASKMASTER_DB_REPLICAS=/tmp/replica.sqlite3 python manage.py sync_replicas
+"""
+
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from taskmaster.db import is_sqlite
+from taskmaster.routers import get_replica_settings
+
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database into the SQLite read replicas.'
+    
+    def handle(self, *args, **options):
+        aliases = get_replica_settings()['ALIASES']
+        if not aliases:
+            raise CommandError('No read replicas configured; set TASKMASTER_DB_REPLICAS.')
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]
+        if not is_sqlite(primary):
+            raise CommandError('The primary is not SQLite; use the database server\'s replication.')
+        
+        for alias in aliases:
+            replica = settings.DATABASES[alias]
+            if not is_sqlite(replica):
+                self.stdout.write(f'{alias}: skipped ({replica["ENGINE"]})')
+                continue
+            connections[alias].close()
+            source = sqlite3.connect(primary['NAME'])
+            target = sqlite3.connect(replica['NAME'])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(f'{alias}: copied {primary["NAME"]} -> {replica["NAME"]}'))
@@ -0,0 +1,96 @@
+import json
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from taskmaster.conf import settings_getter
+
+from .querystats import get_query_stats_settings, query_stats
+from .timing import RequestMetrics
+
+logger = logging.getLogger('monitoring.timing')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'PATHS': ['/api/'],
+    'EXCLUDE_PATHS': [],
+    'SERVER_TIMING_HEADER': True,
+    'LOG': False,  # One JSON log line per request on the monitoring.timing logger
+}
+
+
+get_timing_settings = settings_getter('REQUEST_TIMING', DEFAULTS)
+
+
+class RequestTimingMiddleware:
+    """
+    Record query count, DB, auth, view and render time plus response size
+    for each instrumented request, and report them as a ``Server-Timing``
+    header and a structured log line.
+    
+    Only paths under ``REQUEST_TIMING['PATHS']`` (and not under
+    ``EXCLUDE_PATHS``) are instrumented. When ``QUERY_STATS`` is enabled, the
+    same execute wrapper also feeds every query into the fingerprint table.
+    Works in both sync and async mode, so it does not force async views
+    back onto a thread.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        config = get_timing_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        
+        self.paths = tuple(config['PATHS'])
+        self.exclude_paths = tuple(config['EXCLUDE_PATHS'])
+        self.emit_header = config['SERVER_TIMING_HEADER']
+        self.emit_log = config['LOG']
+        self.query_observer = query_stats.record if get_query_stats_settings()['ENABLED'] else None
+    
+    def should_instrument(self, path):
+        return path.startswith(self.paths) and not (self.exclude_paths and path.startswith(self.exclude_paths))
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.should_instrument(request.path_info):
+            return self.get_response(request)
+        
+        metrics = RequestMetrics(request, query_observer=self.query_observer)
+        token = metrics.activate()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        
+        self.report(metrics, response)
+        return response
+    
+    async def __acall__(self, request):
+        if not self.should_instrument(request.path_info):
+            return await self.get_response(request)
+        
+        metrics = RequestMetrics(request, query_observer=self.query_observer)
+        token = metrics.activate()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        
+        self.report(metrics, response)
+        return response
+    
+    def report(self, metrics, response):
+        size = None if response.streaming else len(response.content)
+        if self.emit_header:
+            response['Server-Timing'] = metrics.server_timing()
+        if self.emit_log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(metrics.as_dict(status_code=response.status_code, size=size)))
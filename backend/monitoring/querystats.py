@@ -0,0 +1,175 @@
+"""
+In-process aggregation of SQL queries by normalized fingerprint.
+
+Only queries run while RequestTimingMiddleware instruments a request are
+recorded, under the view that ran them. Queries outside requests (job
+workers, management commands, startup) are not: they run in other
+processes, whose tables no endpoint could read. ``explain_endpoints``
+covers the background scans instead.
+"""
+
+import re
+import threading
+from functools import lru_cache
+
+from taskmaster.conf import settings_getter
+
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 500,
+    'MIN_DURATION_MS': 0,
+}
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w."])-?\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|\?')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_VALUES_RE = re.compile(r'(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+get_query_stats_settings = settings_getter('QUERY_STATS', DEFAULTS)
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(sql):
+    """
+    Normalize SQL so queries differing only in literals share a fingerprint.
+    
+    String and numeric literals and parameter placeholders become ``?``,
+    ``IN (?, ?, ...)`` lists and multi-row ``VALUES`` collapse to one form.
+    Django reuses the same SQL text for a given queryset shape, so the cache
+    makes repeated normalization nearly free.
+    """
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PLACEHOLDER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('(...)', sql)
+    sql = _VALUES_RE.sub(r'\1, ...', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+
+class QueryStats:
+    """
+    Thread-safe table of (fingerprint, view) -> count, total time, max time.
+    
+    The table holds at most ``max_entries`` rows. When it overflows, a tenth
+    of them is dropped, cheapest (lowest total time) first within each of
+    these groups, in order: rows not seen since the previous eviction, rows
+    seen since, and last rows added since. A new fingerprint therefore
+    survives at least one eviction, long enough to add up time before it is
+    ranked against the old ones, while rows that stopped occurring age out
+    first.
+    """
+    
+    ORDERINGS = ('total', 'count', 'max', 'mean')
+    
+    def __init__(self, max_entries=500, min_duration=0.0):
+        self.max_entries = max_entries
+        self.min_duration = min_duration
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> [count, total, max, epoch last seen, epoch added]
+        self._evicted = 0
+        self._epoch = 0  # Evictions so far
+    
+    def record(self, sql, duration, view_name=None):
+        """Add one query execution of ``duration`` seconds."""
+        if duration < self.min_duration:
+            return
+        key = (fingerprint(sql), view_name)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= self.max_entries:
+                    self._evict()
+                self._entries[key] = [1, duration, duration, self._epoch, self._epoch]
+            else:
+                entry[0] += 1
+                entry[3] = self._epoch
+                entry[1] += duration
+                if duration > entry[2]:
+                    entry[2] = duration
+    
+    def _evict(self):
+        """Drop a tenth of the table, stale and cheap rows first (caller holds the lock)."""
+        keep = int(self.max_entries * 0.9)
+        epoch = self._epoch
+        ranked = sorted(
+            self._entries.items(),
+            key=lambda item: (item[1][4] == epoch, item[1][3] == epoch, item[1][1]),
+            reverse=True,
+        )
+        self._evicted += len(ranked) - keep
+        self._entries = dict(ranked[:keep])
+        self._epoch += 1
+    
+    def snapshot(self, limit=None, order_by='total', view_name=None, rollup=False):
+        """
+        Return aggregated rows sorted by ``order_by``, times in milliseconds.
+        With ``rollup``, rows of the same fingerprint are merged across views
+        into one row listing the views in ``views``.
+        """
+        with self._lock:
+            items = [(key, tuple(entry[:3])) for key, entry in self._entries.items()]
+        return self._rows(items, limit, order_by, view_name, rollup)
+    
+    def reset(self, rollup=False):
+        """Clear the table and return the rows it held."""
+        with self._lock:
+            entries, self._entries = self._entries, {}
+            self._evicted = 0
+        return self._rows([(key, tuple(entry[:3])) for key, entry in entries.items()], rollup=rollup)
+    
+    def _rows(self, items, limit=None, order_by='total', view_name=None, rollup=False):
+        if order_by not in self.ORDERINGS:
+            raise ValueError(f'order_by must be one of {", ".join(self.ORDERINGS)}')
+        if view_name:
+            items = [(key, entry) for key, entry in items if key[1] == view_name]
+        if rollup:
+            items = self._rollup(items)
+        rows = []
+        for (sql, view), (count, total, maximum) in items:
+            rows.append({
+                'fingerprint': sql,
+                'views' if rollup else 'view': view,
+                'count': count,
+                'total_ms': round(total * 1000, 3),
+                'mean_ms': round(total / count * 1000, 3),
+                'max_ms': round(maximum * 1000, 3),
+            })
+        sort_key = {'total': 'total_ms', 'count': 'count', 'max': 'max_ms', 'mean': 'mean_ms'}[order_by]
+        rows.sort(key=lambda row: row[sort_key], reverse=True)
+        return rows[:limit] if limit else rows
+    
+    @staticmethod
+    def _rollup(items):
+        """Merge (fingerprint, view) items into (fingerprint, sorted views) items."""
+        merged = {}
+        for (sql, view), (count, total, maximum) in items:
+            entry = merged.get(sql)
+            if entry is None:
+                merged[sql] = [count, total, maximum, {view}]
+            else:
+                entry[0] += count
+                entry[1] += total
+                entry[2] = max(entry[2], maximum)
+                entry[3].add(view)
+        return [
+            ((sql, sorted(views, key=lambda view: (view is None, view or ''))), (count, total, maximum))
+            for sql, (count, total, maximum, views) in merged.items()
+        ]
+    
+    @property
+    def evicted(self):
+        return self._evicted
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+_config = get_query_stats_settings()
+query_stats = QueryStats(
+    max_entries=_config['MAX_ENTRIES'],
+    min_duration=_config['MIN_DURATION_MS'] / 1000,
+)
@@ -0,0 +1,26 @@
+"""
+Process-local statistics that other apps expose under /api/monitoring/.
+
+An app registers a source from its ``AppConfig.ready``, e.g. the response
+cache in tasks.apps, so that monitoring does not import the apps it reports
+on. The stats of source ``name`` are served at ``/api/monitoring/<name>/``.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_sources = {}
+
+
+def register_stats(name, stats, reset=None):
+    """
+    Serve ``stats()`` (a JSON-serializable dict) as the ``name`` source;
+    ``reset()``, if given, is called on DELETE after the stats are read.
+    """
+    with _lock:
+        _sources[name] = (stats, reset)
+
+
+def get_stats_source(name):
+    """The ``(stats, reset)`` pair registered as ``name``, or None."""
+    return _sources.get(name)
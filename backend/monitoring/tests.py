@@ -0,0 +1,156 @@
+import time
+
+from django.core.cache import caches
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from users.models import User
+
+from .querystats import QueryStats, fingerprint, query_stats
+from .timing import RequestMetrics, TimedSerializerMixin
+
+
+class SlowSerializer(TimedSerializerMixin, serializers.Serializer):
+    value = serializers.SerializerMethodField()
+    
+    def get_value(self, obj):
+        time.sleep(0.05)
+        return obj
+
+
+class NestingSerializer(TimedSerializerMixin, serializers.Serializer):
+    inner = SlowSerializer(source='*')
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_placeholders_share_a_fingerprint(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 12 AND name = 'x''y'"),
+            fingerprint('SELECT * FROM t WHERE id = %s AND name = %s'),
+        )
+    
+    def test_in_lists_and_values_collapse(self):
+        self.assertEqual(fingerprint('SELECT * FROM t WHERE id IN (1, 2, 3)'), 'SELECT * FROM t WHERE id IN (...)')
+        self.assertEqual(
+            fingerprint('INSERT INTO t VALUES (1, 2), (3, 4), (5, 6)'),
+            fingerprint('INSERT INTO t VALUES (7, 8), (9, 10)'),
+        )
+
+
+class QueryStatsTests(SimpleTestCase):
+    def test_aggregates_per_fingerprint_and_view(self):
+        stats = QueryStats()
+        stats.record('SELECT 1 FROM t', 0.002, 'a')
+        stats.record('SELECT 2 FROM t', 0.004, 'a')
+        stats.record('SELECT 3 FROM t', 0.001, 'b')
+        rows = stats.snapshot()
+        self.assertEqual([(row['view'], row['count']) for row in rows], [('a', 2), ('b', 1)])
+        self.assertEqual(rows[0]['total_ms'], 6.0)
+        self.assertEqual(rows[0]['max_ms'], 4.0)
+        self.assertEqual(stats.snapshot(view_name='b')[0]['count'], 1)
+    
+    def test_rollup_merges_views(self):
+        stats = QueryStats()
+        stats.record('SELECT 1 FROM t', 0.002, 'b')
+        stats.record('SELECT 2 FROM t', 0.004, 'a')
+        stats.record('SELECT 3 FROM t', 0.001, None)
+        stats.record('SELECT 1 FROM u', 0.001, 'a')
+        rows = stats.snapshot(rollup=True)
+        self.assertEqual(
+            [(row['views'], row['count'], row['total_ms'], row['max_ms']) for row in rows],
+            [(['a', 'b', None], 3, 7.0, 4.0), (['a'], 1, 1.0, 1.0)],
+        )
+        self.assertEqual(stats.snapshot(rollup=True, view_name='a')[0]['views'], ['a'])
+        self.assertEqual(len(stats.reset(rollup=True)), 2)
+    
+    def test_skips_queries_below_min_duration(self):
+        stats = QueryStats(min_duration=0.01)
+        stats.record('SELECT 1 FROM t', 0.005)
+        self.assertEqual(len(stats), 0)
+    
+    def test_new_fingerprint_survives_the_next_eviction(self):
+        stats = QueryStats(max_entries=100)
+        for table in range(100):
+            stats.record(f'SELECT * FROM old{table}', 1.0)
+        # Overflows the table: ten of the old rows go, the new one is added
+        stats.record('SELECT * FROM new', 0.001)
+        self.assertEqual(stats.evicted, 10)
+        # The remaining old rows stay busy while more new fingerprints overflow it again
+        for row in stats.snapshot():
+            if row['fingerprint'].startswith('SELECT * FROM old'):
+                stats.record(row['fingerprint'], 1.0)
+        for table in range(10):
+            stats.record(f'SELECT * FROM newer{table}', 0.001)
+        self.assertEqual(stats.evicted, 20)
+        fingerprints = {row['fingerprint'] for row in stats.snapshot()}
+        self.assertIn('SELECT * FROM new', fingerprints)
+        self.assertIn('SELECT * FROM newer9', fingerprints)
+    
+    def test_stale_rows_are_evicted_before_busy_ones(self):
+        stats = QueryStats(max_entries=100)
+        for table in range(100):
+            stats.record(f'SELECT * FROM t{table}', 5.0 if table < 50 else 1.0)
+        stats.record('SELECT * FROM first', 0.001)  # First eviction: ten of the cheap rows go
+        # Only the remaining cheap rows keep running; the expensive ones stopped
+        busy = {f'SELECT * FROM t{table}' for table in range(50, 100)} & {row['fingerprint'] for row in stats.snapshot()}
+        for sql in busy:
+            stats.record(sql, 1.0)
+        for table in range(10):
+            stats.record(f'SELECT * FROM extra{table}', 0.001)
+        fingerprints = {row['fingerprint'] for row in stats.snapshot()}
+        self.assertEqual(len(busy), 40)
+        self.assertTrue(busy <= fingerprints)  # None lost in the second eviction
+        self.assertEqual(len({f'SELECT * FROM t{table}' for table in range(50)} & fingerprints), 40)
+        self.assertIn('SELECT * FROM first', fingerprints)
+    
+    def test_reset_returns_rows_and_clears(self):
+        stats = QueryStats()
+        stats.record('SELECT 1 FROM t', 0.001)
+        self.assertEqual(len(stats.reset()), 1)
+        self.assertEqual(len(stats), 0)
+        self.assertEqual(stats.snapshot(), [])
+
+
+class RequestTimingTests(TestCase):
+    def measure(self, serialize):
+        metrics = RequestMetrics(RequestFactory().get('/api/tasks/'))
+        token = metrics.activate()
+        try:
+            serialize()
+        finally:
+            metrics.deactivate(token)
+        self.assertFalse(metrics.serializing)
+        return metrics.serializer_time
+    
+    def test_serializer_time_covers_list_items(self):
+        self.assertGreaterEqual(self.measure(lambda: SlowSerializer([1, 2], many=True).data), 0.1)
+    
+    def test_nested_serializers_are_not_counted_twice(self):
+        self.assertLess(self.measure(lambda: NestingSerializer(1).data), 0.1)
+    
+    def test_serializers_outside_requests_are_not_timed(self):
+        self.assertEqual(SlowSerializer(1).data, {'value': 1})
+    
+    def test_server_timing_header_splits_the_phases(self):
+        caches['throttle'].clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('alice', 'alice@example.com', 'pass-1234'))
+        header = client.get(reverse('tasks:task-list'))['Server-Timing']
+        self.assertEqual(
+            [entry.split(';')[0] for entry in header.split(', ')],
+            ['db', 'auth', 'view', 'serializer', 'render', 'total'],
+        )
+    
+    def test_query_stats_rollup_covers_every_view(self):
+        caches['throttle'].clear()
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('root', 'root@example.com', 'pass-1234'))
+        query_stats.reset()
+        client.get(reverse('tasks:task-list'))
+        client.get(reverse('tasks:task-analytics'))
+        response = client.get(reverse('monitoring:query-stats'), {'rollup': '1'})
+        self.assertTrue(response.data['rollup'])
+        views = set().union(*(row['views'] for row in response.data['queries']))
+        self.assertTrue({'tasks:task-list', 'tasks:task-analytics'} <= views)
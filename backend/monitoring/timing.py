@@ -0,0 +1,202 @@
+"""
+Per-request timing state shared by the timing middleware, the DRF view
+mixin that fills in the auth, view and render phases, and the serializer
+mixin that fills in serializer time.
+"""
+
+import time
+from contextvars import ContextVar
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+
+def get_current_metrics():
+    """Return the RequestMetrics of the request being handled, if it is instrumented."""
+    return _current_metrics.get()
+
+
+class RequestMetrics:
+    """Timings collected while handling one request. All durations are in seconds."""
+    
+    __slots__ = (
+        'request', 'query_observer', 'started', 'query_count', 'db_time', 'auth_time',
+        'view_time', 'serializer_time', 'render_time', 'view_started', 'serializing',
+    )
+    
+    def __init__(self, request, query_observer=None):
+        self.request = request
+        self.query_observer = query_observer
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.auth_time = 0.0
+        self.view_time = 0.0
+        self.serializer_time = 0.0
+        self.render_time = 0.0
+        self.view_started = None  # (time, db_time, serializer_time) when the outermost DRF view's handler started
+        self.serializing = False  # Inside a timed serializer, whose nested serializers are not timed again
+    
+    @property
+    def path(self):
+        return self.request.path_info
+    
+    @property
+    def view_name(self):
+        """Resolved view name; available once URL resolution has run."""
+        return getattr(getattr(self.request, 'resolver_match', None), 'view_name', None)
+    
+    def activate(self):
+        return _current_metrics.set(self)
+    
+    @staticmethod
+    def deactivate(token):
+        _current_metrics.reset(token)
+    
+    def record_query(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting queries and DB time."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.db_time += duration
+            self.query_count += 1
+            if self.query_observer is not None:
+                self.query_observer(sql, duration, self.view_name)
+    
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+    
+    def as_dict(self, status_code=None, size=None):
+        """Structured representation used for the log line (milliseconds)."""
+        return {
+            'path': self.path,
+            'view': self.view_name,
+            'status': status_code,
+            'queries': self.query_count,
+            'db_ms': round(self.db_time * 1000, 2),
+            'auth_ms': round(self.auth_time * 1000, 2),
+            'view_ms': round(self.view_time * 1000, 2),
+            'serializer_ms': round(self.serializer_time * 1000, 2),
+            'render_ms': round(self.render_time * 1000, 2),
+            'total_ms': round(self.total_time * 1000, 2),
+            'size': size,
+        }
+    
+    def server_timing(self):
+        """Value for the ``Server-Timing`` response header."""
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.query_count} queries"',
+            f'auth;dur={self.auth_time * 1000:.2f}',
+            f'view;dur={self.view_time * 1000:.2f};desc="excluding db and serializers"',
+            f'serializer;dur={self.serializer_time * 1000:.2f};desc="excluding db"',
+            f'render;dur={self.render_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ])
+
+
+def execute_wrapper(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every DB connection (see install_execute_wrapper).
+    
+    Connections are per thread, and async views run their queries in a
+    sync_to_async worker thread, so the middleware cannot wrap "the"
+    connection itself. Context variables do follow the request into those
+    threads, so this looks up the active RequestMetrics instead.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+def install_execute_wrapper(sender, connection, **kwargs):
+    """``connection_created`` receiver adding execute_wrapper to new connections."""
+    if execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(execute_wrapper)
+
+
+class TimedViewMixin:
+    """
+    DRF view mixin feeding the request's RequestMetrics: authentication
+    time (perform_authentication), view time (the handler with its DB and
+    serializer time taken out) and render time
+    (a post-render callback added in finalize_response). Only the outermost
+    view of a request is timed, so batch sub-requests count towards the
+    batch's view time. Requests the middleware skips pay one context
+    variable lookup per hook.
+    
+    Function views get it from ``timed_api_view`` in place of ``api_view``.
+    """
+    
+    def perform_authentication(self, request):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().perform_authentication(request)
+        start = time.perf_counter()
+        try:
+            return super().perform_authentication(request)
+        finally:
+            metrics.auth_time += time.perf_counter() - start
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        metrics = _current_metrics.get()
+        if metrics is not None and metrics.view_started is None:
+            metrics.view_started = (time.perf_counter(), metrics.db_time, metrics.serializer_time)
+            self._timed_view = True
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        metrics = _current_metrics.get()
+        if metrics is None or not getattr(self, '_timed_view', False):
+            return response
+        started, db_time, serializer_time = metrics.view_started
+        finished = time.perf_counter()
+        metrics.view_time += (
+            finished - started - (metrics.db_time - db_time) - (metrics.serializer_time - serializer_time)
+        )
+        
+        def rendered(response):
+            metrics.render_time += time.perf_counter() - finished
+        
+        # Django renders the response right after the view returns it
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class TimedSerializerMixin:
+    """
+    Serializer mixin adding ``to_representation`` time, minus the queries it
+    runs, to the request's serializer time. Only the outermost timed
+    serializer is measured: a timed list serializer covers its items, and
+    nested serializers count towards their parent. Serializers used only
+    for input validation don't need it.
+    """
+    
+    def to_representation(self, instance):
+        metrics = _current_metrics.get()
+        if metrics is None or metrics.serializing:
+            return super().to_representation(instance)
+        metrics.serializing = True
+        start = time.perf_counter()
+        db_time = metrics.db_time
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start - (metrics.db_time - db_time)
+            metrics.serializing = False
+
+
+def timed_api_view(http_method_names=None):
+    """``rest_framework.decorators.api_view`` whose view class is a TimedViewMixin."""
+    
+    # Imported here: users.authentication imports this module while DRF's settings load
+    from rest_framework.decorators import api_view
+    
+    def decorator(func):
+        view_class = api_view(http_method_names)(func).cls
+        return type(view_class.__name__, (TimedViewMixin, view_class), {}).as_view()
+    
+    return decorator
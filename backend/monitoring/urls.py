@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'monitoring'
+
+urlpatterns = [
+    path('monitoring/queries/', views.query_stats_view, name='query-stats'),
+    path('monitoring/<slug:name>/', views.stats_view, name='stats'),
+]
@@ -0,0 +1,74 @@
+import os
+
+from rest_framework import status, permissions
+from rest_framework.decorators import permission_classes
+from rest_framework.response import Response
+
+from .querystats import query_stats
+from .registry import get_stats_source
+from .timing import timed_api_view
+
+
+@timed_api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAdminUser])
+def query_stats_view(request):
+    """
+    Dump the query fingerprint table of the process serving this request.
+    
+    GET returns the table; DELETE returns it and resets it. Supports
+    ``limit``, ``order`` (total, count, max, mean) and ``view`` query params;
+    ``rollup=1`` merges each fingerprint's rows across views. Only queries
+    run by requests are in it (see monitoring.querystats).
+    """
+    rollup = request.query_params.get('rollup', '').lower() in ('1', 'true', 'yes')
+    if request.method == 'DELETE':
+        rows = query_stats.reset(rollup=rollup)
+    else:
+        try:
+            rows = query_stats.snapshot(
+                order_by=request.query_params.get('order', 'total'),
+                view_name=request.query_params.get('view'),
+                rollup=rollup,
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    limit = request.query_params.get('limit')
+    if limit:
+        try:
+            rows = rows[:int(limit)]
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        'pid': os.getpid(),
+        'entries': len(query_stats),
+        'max_entries': query_stats.max_entries,
+        'evicted': query_stats.evicted,
+        'reset': request.method == 'DELETE',
+        'rollup': rollup,
+        'queries': rows,
+    })
+
+
+@timed_api_view(['GET', 'DELETE'])
+@permission_classes([permissions.IsAdminUser])
+def stats_view(request, name):
+    """
+    Counters of a registered stats source (see monitoring.registry) in the
+    process serving this request. DELETE also resets them if the source
+    supports it.
+    """
+    source = get_stats_source(name)
+    if source is None:
+        return Response({'error': f'Unknown stats source "{name}"'}, status=status.HTTP_404_NOT_FOUND)
+    stats, reset = source
+    data = stats()
+    if request.method == 'DELETE' and reset is not None:
+        reset()
+    
+    return Response({
+        'pid': os.getpid(),
+        'reset': request.method == 'DELETE' and reset is not None,
+        **data,
+    })
@@ -0,0 +1,149 @@
+"""
+Admin changelists that stay fast on large tables.
+
+Django's changelist counts the filtered rows and the whole table with
+exact ``COUNT(*)`` queries, lists every related object in foreign key
+sidebar filters and builds the date hierarchy from a ``SELECT DISTINCT``
+over a date truncation of the column. Each of these reads the whole
+table. ScalableAdminMixin avoids them:
+
+- Unfiltered lists of tables estimated above ``ESTIMATE_OVER`` rows show
+  the planner's row estimate instead of a count (refreshed by ANALYZE,
+  e.g. ``python manage.py sqlite_maintenance``). Filtered lists count at
+  most ``MAX_COUNT`` rows; narrow the filters to page further.
+- The whole-table count next to filtered results is not shown.
+- The date hierarchy offers each year, month or day between the first and
+  last date of the listed rows, found with MIN/MAX (an index on the column
+  answers them), including periods without rows.
+- The filters named in ``user_filters`` are left out when ``USER_FILTERS``
+  is off.
+"""
+
+from datetime import date, timedelta
+from functools import lru_cache
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .conf import settings_getter
+
+DEFAULTS = {
+    'ESTIMATE_OVER': 100000,  # Rows; smaller tables are counted exactly
+    'MAX_COUNT': 10000,  # Rows counted at most for filtered lists (None: no limit)
+    'USER_FILTERS': True,  # Per-user sidebar filters, which list every user
+}
+
+
+get_admin_settings = settings_getter('ADMIN_LISTS', DEFAULTS)
+
+
+def estimate_rows(model, using):
+    """The planner's estimate of the rows of ``model``'s table, or None if there is none."""
+    connection = connections[using]
+    table = model._meta.db_table
+    queries = {
+        'postgresql': ('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table]),
+        'sqlite': ('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table]),
+        'mysql': (
+            'SELECT table_rows FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s',
+            [table],
+        ),
+    }
+    if connection.vendor not in queries:
+        return None
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(*queries[connection.vendor])
+            row = cursor.fetchone()
+    except DatabaseError:  # No statistics yet (sqlite_stat1 only exists after ANALYZE)
+        return None
+    if row is None or row[0] is None:
+        return None
+    # sqlite_stat1 rows start with the table's row count; PostgreSQL has -1 before the first ANALYZE
+    estimate = int(str(row[0]).split()[0]) if connection.vendor == 'sqlite' else int(row[0])
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that estimates large unfiltered counts and caps filtered ones."""
+    
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not hasattr(queryset, 'query'):
+            return super().count
+        config = get_admin_settings()
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > config['ESTIMATE_OVER']:
+                return estimate
+        elif config['MAX_COUNT']:
+            return queryset.order_by()[:config['MAX_COUNT']].count()
+        return super().count
+
+
+class RangeDatesMixin:
+    """QuerySet mixin whose dates()/datetimes() list every period between the first and last date."""
+    
+    def dates(self, field_name, kind, order='ASC'):
+        return self.periods(field_name, kind)
+    
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None, is_dst=None):
+        return self.periods(field_name, kind)
+    
+    def periods(self, field_name, kind):
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        first, last = bounds['first'], bounds['last']
+        if first is None:
+            return []
+        if hasattr(first, 'tzinfo') and timezone.is_aware(first):
+            first, last = timezone.localtime(first), timezone.localtime(last)
+        first, last = _truncate(first, kind), _truncate(last, kind)
+        periods = []
+        while first <= last:
+            periods.append(first)
+            if kind == 'year':
+                first = first.replace(year=first.year + 1)
+            elif kind == 'month':
+                first = first.replace(year=first.year + first.month // 12, month=first.month % 12 + 1)
+            else:
+                first += timedelta(days=1)
+        return periods
+
+
+def _truncate(value, kind):
+    return date(value.year, 1 if kind == 'year' else value.month, value.day if kind == 'day' else 1)
+
+
+@lru_cache(maxsize=None)
+def _range_dates_class(queryset_class):
+    return type(f'RangeDates{queryset_class.__name__}', (RangeDatesMixin, queryset_class), {})
+
+
+class ScalableChangeList(ChangeList):
+    def get_queryset(self, request, *args, **kwargs):
+        queryset = super().get_queryset(request, *args, **kwargs)
+        # Only the date hierarchy calls dates()/datetimes() on the changelist queryset
+        queryset.__class__ = _range_dates_class(queryset.__class__)
+        return queryset
+
+
+class ScalableAdminMixin:
+    """ModelAdmin mixin for large tables (see the module docstring)."""
+    
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    user_filters = ['user']  # list_filter entries dropped when ADMIN_LISTS['USER_FILTERS'] is off
+    
+    def get_changelist(self, request, **kwargs):
+        return ScalableChangeList
+    
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if get_admin_settings()['USER_FILTERS']:
+            return list_filter
+        return [entry for entry in list_filter if entry not in self.user_filters]
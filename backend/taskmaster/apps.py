@@ -0,0 +1,19 @@
+from django.apps import AppConfig
+
+
+class TaskmasterConfig(AppConfig):
+    name = 'taskmaster'
+    verbose_name = 'TaskMaster'
+    
+    def ready(self):
+        from .conf import require_shared_cache
+        from .routers import get_replica_settings
+        from .throttling import get_throttle_settings
+        
+        # Startup checks: state every worker process must agree on
+        replicas = get_replica_settings()
+        if replicas['ALIASES']:
+            require_shared_cache(replicas['CACHE'], "READ_REPLICAS['CACHE']")
+        throttling = get_throttle_settings()
+        if throttling['ENABLED']:
+            require_shared_cache(throttling['CACHE'], "THROTTLING['CACHE']")
@@ -0,0 +1,185 @@
+"""
+Batch endpoint: several API calls in one HTTP request.
+
+``POST /api/batch/`` takes ``{"requests": [{"method", "path", "body"}, ...]}``
+and runs the sub-requests in order through the URL resolver. The reply is
+``{"responses": [{"status", "headers", "body"}, ...]}`` in the same order.
+Sub-requests run as the batch's user: DRF views reuse the user and token
+the batch request was authenticated with, and async views see its
+Authorization header. They skip the middleware and always get JSON bodies
+(as values, in whatever format the batch response is rendered in).
+
+With ``"atomic": true`` the sub-requests share one transaction. The first
+error response (status 400 or higher) rolls back all of them, and the
+sub-requests after it are not run and get a 424. ``rolled_back`` in the
+reply says whether that happened.
+
+At most ``MAX_REQUESTS`` sub-requests are accepted per batch.
+"""
+
+import json
+import logging
+from io import BytesIO
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, get_resolver
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from monitoring.timing import timed_api_view
+from tasks.response_cache import response_cache
+
+from .conf import settings_getter
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'MAX_REQUESTS': 20,  # Sub-requests per batch
+    'METHODS': ['GET', 'POST', 'PUT', 'PATCH', 'DELETE'],
+}
+
+
+get_batch_settings = settings_getter('BATCH_REQUESTS', DEFAULTS)
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.CharField()
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+    
+    def validate_method(self, value):
+        method = value.upper()
+        if method not in get_batch_settings()['METHODS']:
+            raise serializers.ValidationError(f'Method "{value}" is not allowed in a batch.')
+        return method
+    
+    def validate_path(self, value):
+        if not value.startswith('/'):
+            raise serializers.ValidationError('Must be an absolute path, e.g. "/api/tasks/".')
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    atomic = serializers.BooleanField(default=False)
+    
+    def get_fields(self):
+        max_requests = get_batch_settings()['MAX_REQUESTS']
+        return {
+            'requests': SubRequestSerializer(many=True, allow_empty=False, max_length=max_requests),
+            **super().get_fields(),
+        }
+
+
+class SubRequest(HttpRequest):
+    """A sub-request of ``parent``, authenticated as it was."""
+    
+    def __init__(self, parent, method, path, body):
+        super().__init__()
+        path_info, _, query = path.partition('?')
+        content = b'' if body is None else json.dumps(body).encode()
+        self.parent = parent
+        self.method = method
+        self.path_info = path_info
+        self.path = parent.META.get('SCRIPT_NAME', '') + path_info
+        self.META = {
+            **parent.META,
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path_info,
+            'QUERY_STRING': query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(content)),
+            'HTTP_ACCEPT': 'application/json',
+            'wsgi.input': BytesIO(content),
+        }
+        self.META.pop('HTTP_CONTENT_TYPE', None)
+        self.GET = QueryDict(query)
+        self.COOKIES = parent.COOKIES
+        self.content_type = 'application/json'
+        self._stream = BytesIO(content)
+        self._read_started = False
+        # Picked up by rest_framework.request.Request instead of authenticating again
+        self.user = self._force_auth_user = parent.user
+        self._force_auth_token = parent.auth
+    
+    def _get_scheme(self):
+        return self.parent.scheme
+
+
+def _error(status, detail):
+    return {'status': status, 'headers': {}, 'body': {'detail': detail}}
+
+
+def _entry(response):
+    """The batch reply entry for a sub-request's response."""
+    if response.streaming:
+        response.close()
+        return _error(400, 'Streaming responses cannot be batched.')
+    if isinstance(response, Response):  # Not rendered yet
+        body = response.data
+    elif not response.content:
+        body = None
+    elif response.get('Content-Type', '').startswith('application/json'):
+        body = json.loads(response.content)
+    else:
+        body = response.content.decode(response.charset, 'replace')
+    headers = {
+        name: value for name, value in response.items() if name.lower() not in ('content-type', 'content-length', 'vary')
+    }
+    return {'status': response.status_code, 'headers': headers, 'body': body}
+
+
+def dispatch(request, method, path, body=None):
+    """Run one sub-request of the DRF ``request`` and return its reply entry."""
+    sub = SubRequest(request, method, path, body)
+    try:
+        match = get_resolver(getattr(request, 'urlconf', None)).resolve(sub.path_info)
+    except Resolver404:
+        return _error(404, 'Not found.')
+    if match.func is batch_view:
+        return _error(400, 'Batch requests cannot be nested.')
+    sub.resolver_match = match
+    
+    view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+    try:
+        return _entry(view(sub, *match.args, **match.kwargs))
+    except Http404:
+        return _error(404, 'Not found.')
+    except PermissionDenied:
+        return _error(403, 'You do not have permission to perform this action.')
+    except Exception:
+        logger.exception('Batch sub-request %s %s failed', method, path)
+        return _error(500, 'Server error.')
+
+
+@timed_api_view(['POST'])
+def batch_view(request):
+    """Run several API requests in order and return all of their responses (see taskmaster.batch)."""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    subrequests = serializer.validated_data['requests']
+    atomic = serializer.validated_data['atomic']
+    
+    if not atomic:
+        responses = [dispatch(request, item['method'], item['path'], item.get('body')) for item in subrequests]
+        return Response({'atomic': False, 'rolled_back': False, 'responses': responses})
+    
+    responses = []
+    failed = None
+    with transaction.atomic():
+        for index, item in enumerate(subrequests):
+            responses.append(dispatch(request, item['method'], item['path'], item.get('body')))
+            if responses[-1]['status'] >= 400:
+                failed = index
+                transaction.set_rollback(True)
+                break
+    if failed is not None:
+        # GETs after a write may have cached data that was never committed
+        response_cache.bump(request.user.pk)
+        responses += [
+            _error(424, f'Not run: request {failed} failed and the batch was rolled back.')
+            for _ in subrequests[failed + 1:]
+        ]
+    return Response({'atomic': True, 'rolled_back': failed is not None, 'responses': responses})
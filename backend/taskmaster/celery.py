@@ -0,0 +1,26 @@
+"""
+Celery application for JOB_QUEUE['BACKEND'] = 'celery' (see jobqueue.api).
+
+    celery -A taskmaster.celery worker
+    celery -A taskmaster.celery beat
+
+The @job functions of every app's jobs module are registered as Celery
+tasks under the same names, and JOB_QUEUE['SCHEDULE'] is the beat schedule.
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskmaster.settings')
+
+app = Celery('taskmaster')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks(related_name='jobs')
+
+
+@app.on_after_finalize.connect
+def setup_schedule(sender, **kwargs):
+    from jobqueue.api import get_job_settings
+    
+    sender.conf.beat_schedule = get_job_settings()['SCHEDULE']
@@ -0,0 +1,53 @@
+"""
+Settings helpers for the project's configurable modules.
+
+Each module keeps a ``DEFAULTS`` dict and exposes its settings through a
+getter made by ``settings_getter``, e.g.::
+
+    get_throttle_settings = settings_getter('THROTTLING', DEFAULTS)
+
+Keys set in the project settings dict replace the defaults one for one.
+The getter reads the settings on every call, so ``override_settings``
+applies to code that calls it at use time.
+
+``require_shared_cache`` is the startup check (see taskmaster.apps) for
+state that every worker process must see, such as the read replica pins.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+def settings_getter(name, defaults):
+    """Return a function giving the ``name`` settings dict merged over ``defaults``."""
+    
+    def get_settings():
+        return {**defaults, **getattr(settings, name, {})}
+    
+    get_settings.__doc__ = f'Return {name} settings merged over the defaults.'
+    return get_settings
+
+
+# Backends whose entries only the process that wrote them can see
+PROCESS_LOCAL_CACHES = frozenset([
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+])
+
+
+def require_shared_cache(alias, setting):
+    """
+    Raise ImproperlyConfigured if the ``alias`` cache is process-local while
+    the site runs in several worker processes (``WEB_WORKERS``), for state
+    that every worker must see. ``setting`` names the setting that picked
+    the alias, for the error message.
+    """
+    if alias not in settings.CACHES:
+        raise ImproperlyConfigured(f'{setting} names cache "{alias}", which is not in CACHES.')
+    backend = settings.CACHES[alias]['BACKEND']
+    workers = getattr(settings, 'WEB_WORKERS', 1)
+    if backend in PROCESS_LOCAL_CACHES and workers > 1:
+        raise ImproperlyConfigured(
+            f'{setting} needs a cache shared by all {workers} worker processes (e.g. Redis or '
+            f'Memcached), but "{alias}" uses {backend}.'
+        )
@@ -0,0 +1,197 @@
+"""
+MessagePack renderer and parser, a compact binary alternative to JSON.
+
+Clients opt in with ``Accept: application/msgpack`` (responses) and
+``Content-Type: application/msgpack`` (request bodies). The payload is the
+JSON payload with three kinds of strings packed into MessagePack
+extension types:
+
+- UUIDs in canonical form become ext type 1 with the 16 raw bytes.
+- UTC datetimes as the serializers write them (``2026-01-31T09:30:00Z``,
+  optionally with 6 fractional digits) become the standard timestamp
+  extension (type -1): seconds and nanoseconds since the epoch.
+- ``priority`` and ``status`` values become ext types 2 and 3 with a
+  one-byte code from PRIORITY_CODES and STATUS_CODES.
+
+A string is only packed if unpacking gives back exactly the same string,
+so decoding (unpack) restores the JSON payload value for value. Anything
+else, e.g. a datetime with a UTC offset, stays a string.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.utils.mediatypes import media_type_matches, order_by_precedence
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is optional
+    msgpack = None
+
+MEDIA_TYPE = 'application/msgpack'
+
+EXT_UUID = 1
+EXT_PRIORITY = 2
+EXT_STATUS = 3
+
+# The codes are part of the wire format: append new values, never reorder
+PRIORITY_CODES = ['low', 'medium', 'high', 'urgent']
+STATUS_CODES = ['pending', 'in_progress', 'completed', 'cancelled', 'overdue']
+
+# Keys whose values are packed as enum codes: key -> (ext type, value -> code)
+ENUMS = {
+    'priority': (EXT_PRIORITY, {value: bytes([code]) for code, value in enumerate(PRIORITY_CODES)}),
+    'status': (EXT_STATUS, {value: bytes([code]) for code, value in enumerate(STATUS_CODES)}),
+}
+ENUM_VALUES = {EXT_PRIORITY: PRIORITY_CODES, EXT_STATUS: STATUS_CODES}
+
+_UUID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z')
+_DATETIME_RE = re.compile(r'\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d(?:\.\d{6})?Z\Z')
+_EPOCH = datetime(1970, 1, 1)
+_encoder = JSONEncoder()
+_PLAIN = frozenset([type(None), bool, int, float])  # Packed as they are
+
+
+def _require_msgpack():
+    if msgpack is None:
+        raise ImproperlyConfigured('taskmaster.renderers requires the msgpack package.')
+
+
+def _format_datetime(value):
+    return value.isoformat() + 'Z'
+
+
+def _timestamp(value):
+    """The msgpack Timestamp for a datetime string, or None if it would not unpack to the same string."""
+    if len(value) not in (20, 27) or value[10] != 'T' or not _DATETIME_RE.match(value):
+        return None
+    try:
+        moment = datetime.fromisoformat(value[:-1])
+    except ValueError:
+        return None
+    if _format_datetime(moment) != value:
+        return None
+    delta = moment - _EPOCH
+    return msgpack.Timestamp(delta.days * 86400 + delta.seconds, delta.microseconds * 1000)
+
+
+def _compact(value, key=None):
+    """``value`` with its packable strings replaced by extension types (see the module docstring)."""
+    # Called for every value of every response, so the common cases come first
+    if isinstance(value, str):
+        if key in ENUMS:
+            ext, codes = ENUMS[key]
+            if value in codes:
+                return msgpack.ExtType(ext, codes[value])
+        if len(value) == 36 and _UUID_RE.match(value):
+            return msgpack.ExtType(EXT_UUID, bytes.fromhex(value.replace('-', '')))
+        return _timestamp(value) or value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return {
+            name if isinstance(name, str) else _json_key(name): item if type(item) in _PLAIN else _compact(item, name)
+            for name, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return [item if type(item) in _PLAIN else _compact(item) for item in value]
+    # Whatever JSONRenderer would make of it (dates, decimals, UUIDs, lazy strings, ...)
+    return _compact(_encoder.default(value), key)
+
+
+def _json_key(key):
+    """Object keys as JSON writes them."""
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, (bool, int, float)):
+        return _encoder.encode(key)
+    return str(_encoder.default(key))
+
+
+def _ext_hook(code, data):
+    if code == EXT_UUID:
+        if len(data) != 16:
+            raise ValueError(f'A UUID is 16 bytes, got {len(data)}')
+        digits = data.hex()
+        return f'{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}'
+    if code in ENUM_VALUES:
+        values = ENUM_VALUES[code]
+        if len(data) != 1 or data[0] >= len(values):
+            raise ValueError(f'Unknown code {data!r} for ext type {code}')
+        return values[data[0]]
+    return msgpack.ExtType(code, data)
+
+
+def _restore(value):
+    if isinstance(value, msgpack.Timestamp):
+        return _format_datetime(_EPOCH + timedelta(seconds=value.seconds, microseconds=value.nanoseconds // 1000))
+    return value
+
+
+def _restore_map(value):
+    for name, item in value.items():
+        if type(item) is msgpack.Timestamp:
+            value[name] = _restore(item)
+    return value
+
+
+def _restore_list(value):
+    for index, item in enumerate(value):
+        if type(item) is msgpack.Timestamp:
+            value[index] = _restore(item)
+    return value
+
+
+def pack(data):
+    """Encode ``data`` (as passed to JSONRenderer) as compact MessagePack."""
+    _require_msgpack()
+    return msgpack.packb(_compact(data), use_bin_type=True)
+
+
+def unpack(content):
+    """Decode compact MessagePack into the value JSON decoding would give."""
+    _require_msgpack()
+    return _restore(msgpack.unpackb(
+        content, ext_hook=_ext_hook, object_hook=_restore_map, list_hook=_restore_list, timestamp=0,
+    ))
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = MEDIA_TYPE
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return pack(data)
+
+
+class MessagePackParser(BaseParser):
+    media_type = MEDIA_TYPE
+    
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return unpack(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'MessagePack parse error - {str(exc) or type(exc).__name__}')
+
+
+def select_renderer(request):
+    """
+    Renderer for a plain Django ``request`` (the async views) by its Accept
+    header, like DRF's content negotiation; JSON when nothing else matches.
+    """
+    renderers = [JSONRenderer()] + ([MessagePackRenderer()] if msgpack is not None else [])
+    accept = request.headers.get('Accept', '')
+    for media_types in order_by_precedence([token.strip() for token in accept.split(',') if token.strip()]):
+        for renderer in renderers:
+            if any(media_type_matches(renderer.media_type, media_type) for media_type in media_types):
+                return renderer
+    return renderers[0]
@@ -0,0 +1,184 @@
+"""
+Read replica routing for heavy read endpoints.
+
+ReplicaRoutingMiddleware tracks the current request. On its first read
+query, ReplicaRouter checks whether it is a GET/HEAD to one of the views
+in ``READ_REPLICAS['VIEWS']`` (or an admin changelist) and if so sends its
+reads to one of the configured replicas, round robin. Everything else,
+including queries inside a transaction and reads of ``PRIMARY_APPS``
+(users, sessions, tokens), stays on the primary. After a user writes,
+their reads are pinned to the primary for ``PIN_SECONDS`` so they see
+their own changes despite replication lag.
+
+The pins live in the ``CACHE`` alias, so a write handled by one worker
+pins the reads served by all the others. With replicas configured and
+more than one worker (``WEB_WORKERS``), the site refuses to start unless
+that cache is shared, e.g. Redis or Memcached (taskmaster.apps).
+"""
+
+import itertools
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.state import token_backend
+
+from .conf import settings_getter
+
+DEFAULTS = {
+    'ALIASES': [],
+    'VIEWS': ['tasks:task-analytics', 'tasks:calendar-view', 'tasks:smart-suggestions', 'tasks:task-export'],
+    'VIEW_SUFFIXES': ['_changelist'],  # admin changelists
+    # Authentication state must never lag behind: always read it from the primary
+    'PRIMARY_APPS': ['auth', 'sessions', 'users', 'token_blacklist'],
+    'PIN_SECONDS': 5,
+    'CACHE': 'default',  # Holds the pins; must be shared by all processes
+}
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+get_replica_settings = settings_getter('READ_REPLICAS', DEFAULTS)
+
+
+class RoutingState:
+    """Per-request replica decision (made on the first read) and write flag."""
+    
+    __slots__ = ('request', 'policy', 'wrote', '_read_alias', '_decided')
+    
+    def __init__(self, request, policy):
+        self.request = request
+        self.policy = policy
+        self.wrote = False
+        self._read_alias = None
+        self._decided = False
+    
+    def read_alias(self):
+        if not self._decided:
+            # Before URL resolution (in middleware) the view is unknown; decide later
+            if getattr(self.request, 'resolver_match', None) is None:
+                return None
+            # Mark first: the pin check may load the session user, which reads too
+            self._decided = True
+            self._read_alias = self.policy.choose_replica(self.request)
+        return self._read_alias
+
+
+class ReplicaRouter:
+    """Route reads of replica-marked requests to a replica; all writes go to the primary."""
+    
+    def __init__(self):
+        self.primary_apps = frozenset(get_replica_settings()['PRIMARY_APPS'])
+    
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        if state is None or state.wrote or model._meta.app_label in self.primary_apps:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.read_alias()
+    
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+    
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+    
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication (or sync_replicas)
+        return db == DEFAULT_DB_ALIAS
+
+
+def request_user_id(request):
+    """
+    Best-effort user id without extra queries: the JWT subject for API
+    requests (unverified, it only picks a database), else the session user.
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if header.startswith('Bearer '):
+        try:
+            return token_backend.decode(header[len('Bearer '):], verify=False).get(api_settings.USER_ID_CLAIM)
+        except Exception:
+            return None
+    user = getattr(request, 'user', None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Decide per request whether reads may use a replica, and pin users who
+    wrote to the primary. Disabled when no replicas are configured.
+    """
+    
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        config = get_replica_settings()
+        if not config['ALIASES']:
+            raise MiddlewareNotUsed
+        
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        
+        self.views = set(config['VIEWS'])
+        self.view_suffixes = tuple(config['VIEW_SUFFIXES'])
+        self.pin_seconds = config['PIN_SECONDS']
+        self.pins = caches[config['CACHE']]
+        self._replicas = itertools.cycle(config['ALIASES'])
+        self._lock = threading.Lock()
+    
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        state = RoutingState(request, self)
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        self.pin_if_wrote(request, state)
+        return response
+    
+    async def __acall__(self, request):
+        state = RoutingState(request, self)
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        self.pin_if_wrote(request, state)
+        return response
+    
+    def choose_replica(self, request):
+        """Return a replica alias for ``request``, or None to use the primary."""
+        match = request.resolver_match
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if match.view_name not in self.views and not match.view_name.endswith(self.view_suffixes):
+            return None
+        user_id = request_user_id(request)
+        if user_id is not None and self.pins.get(self.pin_key(user_id)):
+            return None
+        with self._lock:
+            return next(self._replicas)
+    
+    def pin_if_wrote(self, request, state):
+        if state.wrote:
+            user_id = request_user_id(request)
+            if user_id is not None:
+                self.pins.set(self.pin_key(user_id), True, self.pin_seconds)
+    
+    @staticmethod
+    def pin_key(user_id):
+        return f'replica-pin:{user_id}'
@@ -3,9 +3,12 @@ Django settings for TaskMaster project.
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from datetime import timedelta
 
+from .db import database_from_url, replica_databases
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -29,21 +32,27 @@ INSTALLED_APPS = [
 	'django.contrib.sessions',
 	'django.contrib.messages',
 	'django.contrib.staticfiles',
+	'taskmaster',
 	'rest_framework',
 	'rest_framework_simplejwt',
+	'rest_framework_simplejwt.token_blacklist',
 	'corsheaders',
 	# 'django_filter',  # Temporarily commented out
 	'tasks',
 	'users',
+	'monitoring',
+	'jobqueue',
 ]
 
 MIDDLEWARE = [
+	'monitoring.middleware.RequestTimingMiddleware',
 	'corsheaders.middleware.CorsMiddleware',
 	'django.middleware.security.SecurityMiddleware',
 	'django.contrib.sessions.middleware.SessionMiddleware',
 	'django.middleware.common.CommonMiddleware',
 	'django.middleware.csrf.CsrfViewMiddleware',
 	'django.contrib.auth.middleware.AuthenticationMiddleware',
+	'taskmaster.routers.ReplicaRoutingMiddleware',
 	'django.contrib.messages.middleware.MessageMiddleware',
 	'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,11 +80,58 @@ WSGI_APPLICATION = 'taskmaster.wsgi.application'
 # Database
 DATABASES = {
 	'default': {
-		'ENGINE': 'django.db.backends.sqlite3',
+		# Django's SQLite backend plus WAL, mmap, cache and busy timeout tuning
+		# (see taskmaster/backends/sqlite3/base.py for the defaults)
+		'ENGINE': 'taskmaster.backends.sqlite3',
 		'NAME': BASE_DIR / 'db.sqlite3',
+		'OPTIONS': {
+			'timeout': 20,  # Seconds to wait for a lock before "database is locked"
+			'transaction_mode': 'IMMEDIATE',  # Take the write lock when a transaction starts
+			'pragmas': {
+				'journal_mode': 'WAL',
+				'synchronous': 'NORMAL',
+				'cache_size': -64000,  # 64 MB
+				'mmap_size': 268435456,  # 256 MB
+				'temp_store': 'MEMORY',
+			},
+		},
 	}
 }
 
+# Optional primary URL and comma-separated read replica URLs (taskmaster.db),
+# e.g. TASKMASTER_DB_REPLICAS=/tmp/replica.sqlite3 for local testing
+if os.environ.get('TASKMASTER_DB_URL'):
+	DATABASES['default'] = database_from_url(os.environ['TASKMASTER_DB_URL'], DATABASES['default'])
+DATABASES.update(replica_databases(os.environ.get('TASKMASTER_DB_REPLICAS', ''), DATABASES['default']))
+
+DATABASE_ROUTERS = ['taskmaster.routers.ReplicaRouter']
+
+# Web server worker processes; gunicorn and uvicorn read WEB_CONCURRENCY too. With more
+# than one, caches holding state every worker must see (replica pins, throttle buckets)
+# have to be shared ones such as Redis, or the site refuses to start (taskmaster.apps).
+WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+
+# Caches. 'throttle' holds the request throttling buckets (THROTTLING below), one entry
+# per active user and endpoint class; use a shared backend such as Redis in production.
+CACHES = {
+	'default': {
+		'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+	},
+	'throttle': {
+		'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+		'LOCATION': 'throttle',
+		'OPTIONS': {'MAX_ENTRIES': 100000},
+	},
+}
+
+# Heavy GET views read from the replicas above (taskmaster.routers)
+READ_REPLICAS = {
+	'ALIASES': [alias for alias in DATABASES if alias != 'default'],
+	'VIEWS': ['tasks:task-analytics', 'tasks:calendar-view', 'tasks:smart-suggestions', 'tasks:task-export'],
+	'PIN_SECONDS': 5,  # Keep a user on the primary this long after they write
+	'CACHE': 'default',  # Holds those pins; must be shared by all processes when replicas are configured
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
 	{
@@ -115,7 +171,7 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework settings
 REST_FRAMEWORK = {
 	'DEFAULT_AUTHENTICATION_CLASSES': (
-		'rest_framework_simplejwt.authentication.JWTAuthentication',
+		'users.authentication.CachedJWTAuthentication',
 	),
 	'DEFAULT_PERMISSION_CLASSES': (
 		'rest_framework.permissions.IsAuthenticated',
@@ -127,16 +183,167 @@ REST_FRAMEWORK = {
 	),
 	'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
 	'PAGE_SIZE': 20,
+	'DEFAULT_THROTTLE_CLASSES': (
+		'taskmaster.throttling.TokenBucketThrottle',
+	),
+	'DEFAULT_RENDERER_CLASSES': (
+		'rest_framework.renderers.JSONRenderer',
+		'rest_framework.renderers.BrowsableAPIRenderer',
+	),
+	'DEFAULT_PARSER_CLASSES': (
+		'rest_framework.parsers.JSONParser',
+		'rest_framework.parsers.FormParser',
+		'rest_framework.parsers.MultiPartParser',
+	),
 }
 
+# MessagePack (Accept/Content-Type: application/msgpack) when the msgpack package is installed
+if find_spec('msgpack') is not None:
+	REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] += ('taskmaster.renderers.MessagePackRenderer',)
+	REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'] += ('taskmaster.renderers.MessagePackParser',)
+
 # JWT settings
 SIMPLE_JWT = {
 	'ACCESS_TOKEN_LIFETIME': timedelta(hours=1),
 	'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
 	'ROTATE_REFRESH_TOKENS': True,
 	'BLACKLIST_AFTER_ROTATION': True,
+	'TOKEN_REFRESH_SERIALIZER': 'users.serializers.TokenRefreshSerializer',
+}
+
+# In-memory Bloom filter in front of the refresh token blacklist (users.revocation)
+TOKEN_REVOCATION = {
+	'CAPACITY': 100000,
+	'ERROR_RATE': 0.001,
+	'SYNC_INTERVAL': 5,  # Seconds a token blacklisted by another process may still pass
+	'REBUILD_INTERVAL': 3600,
+	'SYNC_OVERLAP': 60,  # Seconds each sync re-reads, for late commits and clock skew between servers
+}
+
+# Request timing instrumentation (Server-Timing header + structured log line)
+REQUEST_TIMING = {
+	'ENABLED': True,
+	'PATHS': ['/api/'],  # Path prefixes to instrument
+	'EXCLUDE_PATHS': [],
+	'SERVER_TIMING_HEADER': True,
+	'LOG': False,  # Per-request JSON log line on monitoring.timing; opt in when debugging
+}
+
+# Slow-query fingerprint table (recorded by RequestTimingMiddleware, see /api/monitoring/queries/)
+QUERY_STATS = {
+	'ENABLED': True,
+	'MAX_ENTRIES': 500,  # Cheapest fingerprints are evicted beyond this
+	'MIN_DURATION_MS': 0,  # Ignore queries faster than this
+}
+
+LOGGING = {
+	'version': 1,
+	'disable_existing_loggers': False,
+	'handlers': {
+		'console': {
+			'class': 'logging.StreamHandler',
+		},
+	},
+	'loggers': {
+		'monitoring': {
+			'handlers': ['console'],
+			'level': 'INFO',
+		},
+	},
+}
+
+# Cache of the user fields request.user needs (users.authentication)
+AUTH_USER_CACHE = {
+	'CACHE': 'default',  # Must be shared by all processes when running several workers
+	'TTL': 60,  # Seconds a snapshot can outlive a write that bypasses User.save() (queryset updates)
+}
+
+# Smart suggestion ranking (tasks.suggestions); see DEFAULTS there for the scoring weights
+SMART_SUGGESTIONS = {
+	'TOP_K': 13,
+	'TYPE_LIMITS': {'overdue': 5, 'due_soon': 5, 'high_priority': 3},
+	'CACHE': 'default',  # Rendered lists; must be shared when WEB_CONCURRENCY > 1
+	'CACHE_TTL': 60,  # Seconds; task writes invalidate sooner
+}
+
+# Versioned per-user cache for today/week/overdue/calendar/analytics (tasks.response_cache).
+# Set SHARED_CACHE to a CACHES alias (e.g. Redis) to share entries and versions between processes.
+RESPONSE_CACHE = {
+	'ENABLED': os.environ.get('TASKMASTER_RESPONSE_CACHE', '1') == '1',
+	'MAX_ENTRIES': 5000,  # Local LRU size per process
+	'TTL': 60,  # Seconds; bounds staleness of time-dependent fields
+	'SHARED_CACHE': None,  # Optional shared tier for response bodies, e.g. a Redis alias
+	'VERSION_CACHE': 'default',  # Per-user data versions; must be shared when WEB_CONCURRENCY > 1
+}
+
+# Serialized categories kept per process (tasks.categories); category writes bump a
+# version in CACHE so every process reloads. MAX_AGE bounds staleness with a local cache.
+CATEGORY_REGISTRY = {
+	'CACHE': 'default',
+	'MAX_AGE': 300,  # Seconds
+}
+
+# Archive tier (tasks.archive): `python manage.py archive_tasks` moves tasks in STATUSES
+# unchanged for AGE_DAYS days, with their notifications, to the archive tables.
+TASK_ARCHIVE = {
+	'AGE_DAYS': 180,
+	'BATCH_SIZE': 500,  # Tasks moved per transaction
+	'STATUSES': ['completed', 'cancelled'],
+}
+
+# Push delivery of notifications (tasks.push), run by `python manage.py deliver_notifications`.
+# TRANSPORT is any class with send(device, messages); see WebhookTransport for OPTIONS.
+PUSH_DELIVERY = {
+	'TRANSPORT': 'tasks.push.LogTransport',
+	'OPTIONS': {},
+	'BATCH_SIZE': 100,  # Messages per transport call
+	'CONCURRENCY': 8,  # Transport calls in flight
+	'MAX_ATTEMPTS': 6,  # Then the delivery is dead-lettered
+	'BACKOFF_BASE': 2,  # Seconds, doubling per attempt, with jitter
+	'BACKOFF_MAX': 3600,
 }
 
+# Live task change feed at /api/live/ under ASGI (tasks.live). With several server processes,
+# set BROKER to 'tasks.live.RedisBroker' and OPTIONS to {'URL': 'redis://...'} so events reach every process.
+LIVE_EVENTS = {
+	'BROKER': 'tasks.live.LocalBroker',
+	'OPTIONS': {},
+	'BUFFER': 100,  # Recent events kept per streaming user for Last-Event-ID resume
+	'HEARTBEAT': 15,  # Seconds
+	'MAX_AGE': 300,  # Seconds before clients are asked to reconnect
+}
+
+# Admin changelists of large tables (taskmaster.admin_lists)
+ADMIN_LISTS = {
+	'ESTIMATE_OVER': 100000,  # Unfiltered lists of larger tables show the planner's row estimate
+	'MAX_COUNT': 10000,  # Filtered lists count at most this many rows
+	'USER_FILTERS': True,  # Turn off to drop the per-user sidebar filters, which list every user
+}
+
+# Token-bucket throttling per user and endpoint class (taskmaster.throttling): each
+# bucket holds BURST requests and refills at RATE per second. Set CACHE to a shared
+# alias (e.g. Redis) so that all processes share the buckets.
+THROTTLING = {
+	'ENABLED': os.environ.get('TASKMASTER_THROTTLING', '1') == '1',
+	'CACHE': 'throttle',
+	'BUCKETS': {
+		'read': {'RATE': 10, 'BURST': 100},  # GET/HEAD/OPTIONS
+		'write': {'RATE': 2, 'BURST': 30},  # Everything else
+		'analytics': {'RATE': 0.2, 'BURST': 10},  # Analytics, calendar, suggestions, stats, export
+		'auth': {'RATE': 0.1, 'BURST': 10},  # Login, registration, token refresh (per IP when anonymous)
+	},
+}
+
+# POST /api/batch/ (taskmaster.batch): sub-requests per batch and the methods they may use
+BATCH_REQUESTS = {
+	'MAX_REQUESTS': 20,
+	'METHODS': ['GET', 'POST', 'PUT', 'PATCH', 'DELETE'],
+}
+
+# Serve the read-only task/stats endpoints from async views (tasks.async_views).
+# taskmaster/asgi.py turns this on; WSGI deployments keep the sync DRF views.
+ASYNC_READ_VIEWS = os.environ.get('TASKMASTER_ASYNC_VIEWS', '0') == '1'
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
 	"http://localhost:3000",
@@ -151,9 +358,25 @@ if DEBUG:
 
 CORS_ALLOW_CREDENTIALS = True
 
+# Background jobs (jobqueue.api). 'database' needs no broker: run `python manage.py run_jobs`.
+# 'celery' sends jobs to the broker below (taskmaster/celery.py); 'eager' runs them inline.
+JOB_QUEUE = {
+	'BACKEND': os.environ.get('TASKMASTER_JOB_BACKEND', 'database'),
+	'QUEUES': ['default'],
+	'MAX_RETRIES': 3,
+	'RETRY_DELAY': 10,  # Seconds, doubling per attempt
+	'LEASE': 300,  # Seconds without a lease renewal before a running job is presumed dead and requeued
+	'SCHEDULE': {
+		'deliver-push': {'task': 'tasks.jobs.deliver_push', 'schedule': 60},
+		'rollup-analytics': {'task': 'tasks.jobs.rollup_analytics', 'schedule': 3600, 'kwargs': {'days_ago': 1}},
+		'archive-tasks': {'task': 'tasks.jobs.archive_sweep', 'schedule': 86400},
+		'prune-tokens': {'task': 'users.jobs.prune_tokens', 'schedule': 86400},
+	},
+}
+
 # Celery settings
-CELERY_BROKER_URL = 'redis://localhost:6379/0'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
@@ -0,0 +1,256 @@
+import json
+import threading
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipIf
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from tasks.live import live_hub
+from tasks.models import Task
+from users.models import User
+
+from .conf import require_shared_cache
+from .renderers import MEDIA_TYPE, msgpack, pack, select_renderer, unpack
+from .throttling import consume, take
+
+
+def json_round_trip(data):
+    return json.loads(JSONRenderer().render(data))
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackTests(SimpleTestCase):
+    def test_round_trip_matches_json(self):
+        data = {
+            'id': uuid.uuid4(),
+            'parent': str(uuid.uuid4()),
+            'priority': 'urgent',
+            'status': 'in_progress',
+            'created_at': '2026-01-31T09:30:00Z',
+            'updated_at': '2026-01-31T09:30:00.123456Z',
+            'due_date': datetime(2026, 2, 1, 12, tzinfo=dt_timezone.utc),
+            'estimate': Decimal('1.50'),
+            'tags': ['work', None, True, 3, 2.5],
+            'counts': {1: 'one', None: 'none'},
+            'subtasks': [{'status': 'done', 'priority': 'medium'}],
+        }
+        self.assertEqual(unpack(pack(data)), json_round_trip(data))
+    
+    def test_known_strings_are_packed_as_extensions(self):
+        task_id = str(uuid.uuid4())
+        packed = msgpack.unpackb(
+            pack({'id': task_id, 'status': 'completed', 'at': '2026-01-31T09:30:00Z'}), timestamp=0,
+        )
+        self.assertEqual(packed['id'], msgpack.ExtType(1, uuid.UUID(task_id).bytes))
+        self.assertEqual(packed['status'], msgpack.ExtType(3, bytes([2])))
+        self.assertIsInstance(packed['at'], msgpack.Timestamp)
+    
+    def test_strings_that_would_not_round_trip_stay_strings(self):
+        data = {
+            'id': str(uuid.uuid4()).upper(),
+            'status': 'archived',
+            'title': 'pending',
+            'with_offset': '2026-01-31T09:30:00+02:00',
+            'millis': '2026-01-31T09:30:00.123Z',
+            'invalid': '2026-02-30T09:30:00Z',
+        }
+        self.assertEqual(msgpack.unpackb(pack(data)), data)
+        self.assertEqual(unpack(pack(data)), data)
+    
+    def test_unknown_enum_code_is_rejected(self):
+        content = msgpack.packb({'status': msgpack.ExtType(3, bytes([99]))})
+        with self.assertRaises(ValueError):
+            unpack(content)
+    
+    def test_select_renderer_follows_accept(self):
+        factory = RequestFactory()
+        self.assertEqual(select_renderer(factory.get('/', HTTP_ACCEPT=MEDIA_TYPE)).format, 'msgpack')
+        self.assertEqual(
+            select_renderer(factory.get('/', HTTP_ACCEPT=f'application/json, {MEDIA_TYPE};q=0.5')).format, 'json'
+        )
+        self.assertEqual(select_renderer(factory.get('/')).format, 'json')
+
+
+@skipIf(msgpack is None, 'msgpack is not installed')
+class MessagePackAPITests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def test_response_matches_json_response(self):
+        Task.objects.create(user=self.user, title='Write tests', priority='high', status='in_progress')
+        url = reverse('tasks:task-list')
+        as_json = self.client.get(url, HTTP_ACCEPT='application/json')
+        as_msgpack = self.client.get(url, HTTP_ACCEPT=MEDIA_TYPE)
+        self.assertEqual(as_msgpack['Content-Type'], MEDIA_TYPE)
+        self.assertEqual(unpack(as_msgpack.content), json.loads(as_json.content))
+        self.assertLess(len(as_msgpack.content), len(as_json.content))
+    
+    def test_request_body_is_parsed(self):
+        body = pack({'title': 'Packed', 'priority': 'urgent', 'due_date': '2026-12-31T09:00:00Z'})
+        response = self.client.post(
+            reverse('tasks:task-list'), body, content_type=MEDIA_TYPE, HTTP_ACCEPT='application/json',
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        task = Task.objects.get(title='Packed')
+        self.assertEqual(task.priority, 'urgent')
+        self.assertEqual(task.due_date, datetime(2026, 12, 31, 9, tzinfo=dt_timezone.utc))
+    
+    def test_malformed_body_is_a_bad_request(self):
+        response = self.client.post(reverse('tasks:task-list'), b'\xc1', content_type=MEDIA_TYPE)
+        self.assertEqual(response.status_code, 400)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def batch(self, requests, **options):
+        return self.client.post(reverse('batch'), {'requests': requests, **options}, format='json')
+    
+    def test_sub_requests_run_in_order(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {'title': 'First'}},
+            {'method': 'GET', 'path': '/api/tasks/?search=First'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        created, listed = response.data['responses']
+        self.assertEqual(created['status'], 201)
+        self.assertEqual([task['title'] for task in listed['body']['results']], ['First'])
+    
+    def test_failures_do_not_stop_a_plain_batch(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {}},
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {'title': 'Kept'}},
+        ])
+        self.assertEqual([entry['status'] for entry in response.data['responses']], [400, 404, 201])
+        self.assertFalse(response.data['rolled_back'])
+        self.assertTrue(Task.objects.filter(title='Kept').exists())
+    
+    def test_atomic_batch_rolls_back_on_the_first_error(self):
+        with mock.patch.object(live_hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.batch([
+                    {'method': 'POST', 'path': '/api/tasks/', 'body': {'title': 'Rolled back'}},
+                    {'method': 'POST', 'path': '/api/tasks/', 'body': {}},
+                    {'method': 'POST', 'path': '/api/tasks/', 'body': {'title': 'Never run'}},
+                ], atomic=True)
+        self.assertTrue(response.data['rolled_back'])
+        self.assertEqual([entry['status'] for entry in response.data['responses']], [201, 400, 424])
+        self.assertFalse(Task.objects.exists())
+        publish.assert_not_called()  # No change events for writes that were undone
+    
+    def test_atomic_batch_commits_when_all_succeed(self):
+        response = self.batch([
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {'title': 'One'}},
+            {'method': 'POST', 'path': '/api/tasks/', 'body': {'title': 'Two'}},
+        ], atomic=True)
+        self.assertFalse(response.data['rolled_back'])
+        self.assertEqual(Task.objects.count(), 2)
+    
+    def test_sub_requests_run_as_the_batch_user(self):
+        other = User.objects.create_user('bob', 'bob@example.com', 'pass-1234')
+        task = Task.objects.create(user=other, title='Not yours')
+        response = self.batch([{'method': 'GET', 'path': f'/api/tasks/{task.pk}/'}])
+        self.assertEqual(response.data['responses'][0]['status'], 404)
+    
+    def test_batches_cannot_be_nested(self):
+        response = self.batch([{'method': 'POST', 'path': '/api/batch/', 'body': {'requests': []}}])
+        self.assertEqual(response.data['responses'][0]['status'], 400)
+    
+    @override_settings(BATCH_REQUESTS={'MAX_REQUESTS': 2, 'METHODS': ['GET']})
+    def test_size_and_methods_are_limited(self):
+        self.assertEqual(self.batch([{'method': 'GET', 'path': '/api/tasks/'}] * 3).status_code, 400)
+        self.assertEqual(self.batch([{'method': 'DELETE', 'path': '/api/tasks/'}]).status_code, 400)
+
+
+class TokenBucketTests(SimpleTestCase):
+    bucket = {'RATE': 2, 'BURST': 3}
+    
+    def test_take_drains_and_refills(self):
+        state = None
+        for _ in range(3):
+            state, wait = take(state, 100.0, self.bucket)
+            self.assertEqual(wait, 0)
+        self.assertEqual(take(state, 100.0, self.bucket), (None, 0.5))
+        state, wait = take(state, 100.5, self.bucket)  # One token refilled
+        self.assertEqual((state, wait), ((0, 100.5), 0))
+    
+    def test_refill_is_capped_at_burst(self):
+        state, _ = take((0, 0.0), 1000.0, self.bucket)
+        self.assertEqual(state, (2, 1000.0))
+    
+    @override_settings(THROTTLING={'CACHE': 'throttle', 'BUCKETS': {'read': {'RATE': 0.001, 'BURST': 10}}})
+    def test_concurrent_requests_cannot_overdraw_a_bucket(self):
+        caches['throttle'].clear()
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        request.user = AnonymousUser()
+        results = []
+        start = threading.Barrier(30)
+        
+        def hit():
+            start.wait()
+            results.append(consume(request))
+        
+        threads = [threading.Thread(target=hit) for _ in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(0), 10)
+    
+    def test_process_local_cache_is_refused_with_several_workers(self):
+        with override_settings(WEB_WORKERS=2):
+            with self.assertRaises(ImproperlyConfigured):
+                require_shared_cache('throttle', "THROTTLING['CACHE']")
+        with override_settings(WEB_WORKERS=1):
+            require_shared_cache('throttle', "THROTTLING['CACHE']")
+        with self.assertRaises(ImproperlyConfigured):
+            require_shared_cache('missing', "THROTTLING['CACHE']")
+
+
+@override_settings(THROTTLING={
+    'CACHE': 'throttle',
+    'BUCKETS': {'read': {'RATE': 0.001, 'BURST': 2}, 'write': None, 'analytics': {'RATE': 0.001, 'BURST': 1}},
+    'VIEWS': {'tasks:task-analytics': 'analytics'},
+})
+class ThrottlingAPITests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def test_empty_bucket_gets_429_with_retry_after(self):
+        url = reverse('tasks:task-list')
+        self.assertEqual([self.client.get(url).status_code for _ in range(3)], [200, 200, 429])
+        self.assertEqual(int(self.client.get(url)['Retry-After']), 1000)
+    
+    def test_buckets_are_per_user_and_endpoint_class(self):
+        self.assertEqual(self.client.get(reverse('tasks:task-analytics')).status_code, 200)
+        self.assertEqual(self.client.get(reverse('tasks:task-analytics')).status_code, 429)
+        self.assertEqual(self.client.get(reverse('tasks:task-list')).status_code, 200)
+        self.assertEqual(self.client.post(reverse('tasks:task-list'), {'title': 'Unlimited'}).status_code, 201)
+        
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user('bob', 'bob@example.com', 'pass-1234'))
+        self.assertEqual(other.get(reverse('tasks:task-analytics')).status_code, 200)
+    
+    def test_disabled_throttling_lets_everything_through(self):
+        with override_settings(THROTTLING={'ENABLED': False}):
+            statuses = {self.client.get(reverse('tasks:task-list')).status_code for _ in range(5)}
+        self.assertEqual(statuses, {200})
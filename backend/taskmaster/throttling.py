@@ -0,0 +1,164 @@
+"""
+Token-bucket request throttling.
+
+Every request takes a token from a bucket kept per user (per client IP
+when anonymous) and per endpoint class:
+
+- the class ``VIEWS`` maps its URL name to, e.g. ``analytics`` for the
+  heavy reports or ``auth`` for login;
+- otherwise ``read`` for GET, HEAD and OPTIONS and ``write`` for the rest.
+
+A bucket holds up to ``BURST`` tokens and refills at ``RATE`` tokens per
+second. A request that finds it empty gets a 429 whose ``Retry-After``
+header gives the seconds until the next token.
+
+A bucket is a single ``(tokens, updated)`` pair in the ``CACHE`` alias,
+refilled from the elapsed time when it is next used, so the state per key
+stays the same size whatever the rate (DRF's rate throttles keep a
+timestamp per request in the window). Entries expire once the bucket
+would be full again.
+
+Taking a token reads the pair and writes it back while holding a per-bucket
+lock taken with the cache's atomic ``add``, so concurrent requests cannot
+overdraw a bucket. A request that cannot get the lock within
+``LOCK_ATTEMPTS`` tries is throttled like one that found the bucket empty.
+
+All processes must draw from the same buckets. With more than one worker
+(``WEB_WORKERS``), the site refuses to start unless ``CACHE`` is a shared
+cache such as Redis or Memcached (taskmaster.apps).
+"""
+
+import asyncio
+import math
+import time
+
+from django.core.cache import caches
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+from .conf import settings_getter
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE': 'default',
+    # Endpoint class -> RATE (tokens per second) and BURST (bucket size); None is unlimited
+    'BUCKETS': {
+        'read': {'RATE': 10, 'BURST': 100},
+        'write': {'RATE': 2, 'BURST': 30},
+        'analytics': {'RATE': 0.2, 'BURST': 10},
+        'auth': {'RATE': 0.1, 'BURST': 10},
+    },
+    # URL name -> endpoint class, for views that are not plain reads or writes
+    'VIEWS': {
+        'tasks:task-analytics': 'analytics',
+        'tasks:calendar-view': 'analytics',
+        'tasks:smart-suggestions': 'analytics',
+        'tasks:task-export': 'analytics',
+        'users:user-stats': 'analytics',
+        'users:login': 'auth',
+        'users:register': 'auth',
+        'users:token-refresh': 'auth',
+    },
+}
+
+# Per-bucket lock: a holder that died frees it after LOCK_TIMEOUT seconds
+LOCK_TIMEOUT = 1
+LOCK_ATTEMPTS = 20
+LOCK_WAIT = 0.005  # Seconds between attempts
+
+_ident = BaseThrottle()
+
+
+get_throttle_settings = settings_getter('THROTTLING', DEFAULTS)
+
+
+def bucket_for(request, config):
+    """(cache key, bucket settings) for ``request``, or None if its endpoint class is unlimited."""
+    match = getattr(request, 'resolver_match', None)
+    name = config['VIEWS'].get(match.view_name) if match is not None else None
+    name = name or ('read' if request.method in SAFE_METHODS else 'write')
+    bucket = config['BUCKETS'].get(name)
+    if not bucket:
+        return None
+    user = getattr(request, 'user', None)
+    owner = f'user:{user.pk}' if user is not None and user.is_authenticated else f'ip:{_ident.get_ident(request)}'
+    return f'throttle:{name}:{owner}', bucket
+
+
+def take(state, now, bucket):
+    """
+    Refill the bucket ``state`` (``(tokens, updated)``, None when full) up
+    to ``now`` and take a token. Returns the new state and 0, or None and
+    the seconds until a token is available if the bucket is empty.
+    """
+    rate, burst = bucket['RATE'], bucket['BURST']
+    tokens, updated = state if state is not None else (burst, now)
+    tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    if tokens < 1:
+        return None, (1 - tokens) / rate
+    return (tokens - 1, now), 0
+
+
+def _expiry(state, bucket):
+    """Seconds until the bucket is full again and its entry can go."""
+    return math.ceil((bucket['BURST'] - state[0]) / bucket['RATE']) + 1
+
+
+def consume(request):
+    """Take a token for ``request``; return 0, or the seconds to wait if it is throttled."""
+    config = get_throttle_settings()
+    found = bucket_for(request, config) if config['ENABLED'] else None
+    if found is None:
+        return 0
+    key, bucket = found
+    cache = caches[config['CACHE']]
+    lock = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if cache.add(lock, 1, LOCK_TIMEOUT):
+            break
+        time.sleep(LOCK_WAIT)
+    else:
+        # Too many requests for this bucket in flight
+        return 1 / bucket['RATE']
+    try:
+        state, wait = take(cache.get(key), time.time(), bucket)
+        if state is not None:
+            cache.set(key, state, _expiry(state, bucket))
+    finally:
+        cache.delete(lock)
+    return wait
+
+
+async def aconsume(request):
+    """Async ``consume`` for plain Django async views (see users.authentication.async_jwt_view)."""
+    config = get_throttle_settings()
+    found = bucket_for(request, config) if config['ENABLED'] else None
+    if found is None:
+        return 0
+    key, bucket = found
+    cache = caches[config['CACHE']]
+    lock = f'{key}:lock'
+    for _ in range(LOCK_ATTEMPTS):
+        if await cache.aadd(lock, 1, LOCK_TIMEOUT):
+            break
+        await asyncio.sleep(LOCK_WAIT)
+    else:
+        return 1 / bucket['RATE']
+    try:
+        state, wait = take(await cache.aget(key), time.time(), bucket)
+        if state is not None:
+            await cache.aset(key, state, _expiry(state, bucket))
+    finally:
+        await cache.adelete(lock)
+    return wait
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """DRF throttle drawing from the request's token bucket (see the module docstring)."""
+    
+    def allow_request(self, request, view):
+        self.retry_after = consume(request)
+        return not self.retry_after
+    
+    def wait(self):
+        return self.retry_after
@@ -6,10 +6,14 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .batch import batch_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/batch/', batch_view, name='batch'),
     path('api/', include('users.urls')),
     path('api/', include('tasks.urls')),
+    path('api/', include('monitoring.urls')),
 ]
 
 if settings.DEBUG:
@@ -1,5 +1,11 @@
 from django.contrib import admin
-from .models import Task, Category, TaskNotification, TaskAnalytics
+from django.db.models import BooleanField, Case, Value, When
+from django.utils import timezone
+
+from taskmaster.admin_lists import ScalableAdminMixin
+from .derived import ACTIVE_STATUSES
+from .models import Task, Category, TaskNotification, TaskAnalytics, ArchivedTask, Device, NotificationDelivery
+from .push import requeue_dead
 
 
 @admin.register(Category)
@@ -13,12 +19,12 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Task)
-class TaskAdmin(admin.ModelAdmin):
+class TaskAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin configuration for Task model."""
     
     list_display = [
         'title', 'user', 'category', 'priority', 'status', 
-        'due_date', 'progress', 'is_overdue'
+        'due_date', 'progress', 'overdue'
     ]
     list_filter = [
         'status', 'priority', 'category', 'is_recurring', 
@@ -26,6 +32,8 @@ class TaskAdmin(admin.ModelAdmin):
     ]
     search_fields = ['title', 'description', 'user__username']
     ordering = ['-created_at']  # urgency_score is a property, can't be used in ordering
+    date_hierarchy = 'due_date'
+    autocomplete_fields = ['user', 'category', 'parent_task']
     readonly_fields = ['id', 'created_at', 'updated_at', 'urgency_score', 'is_overdue']
     
     fieldsets = (
@@ -51,12 +59,22 @@ class TaskAdmin(admin.ModelAdmin):
     )
     
     def get_queryset(self, request):
-        """Optimize queryset with select_related."""
-        return super().get_queryset(request).select_related('user', 'category')
+        """Optimize queryset with select_related; the overdue column is computed in SQL."""
+        return super().get_queryset(request).select_related('user', 'category').annotate(
+            overdue_now=Case(
+                When(status__in=ACTIVE_STATUSES, due_date__lt=timezone.now(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+    
+    @admin.display(boolean=True, description='Is overdue')
+    def overdue(self, obj):
+        return obj.overdue_now
 
 
 @admin.register(TaskNotification)
-class TaskNotificationAdmin(admin.ModelAdmin):
+class TaskNotificationAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin configuration for TaskNotification model."""
     
     list_display = [
@@ -66,10 +84,12 @@ class TaskNotificationAdmin(admin.ModelAdmin):
     search_fields = ['task__title', 'message']
     ordering = ['-sent_at']
     readonly_fields = ['sent_at']
+    autocomplete_fields = ['task', 'user']
+    list_select_related = ['task__user']
 
 
 @admin.register(TaskAnalytics)
-class TaskAnalyticsAdmin(admin.ModelAdmin):
+class TaskAnalyticsAdmin(ScalableAdminMixin, admin.ModelAdmin):
     """Admin configuration for TaskAnalytics model."""
     
     list_display = [
@@ -79,4 +99,58 @@ class TaskAnalyticsAdmin(admin.ModelAdmin):
     list_filter = ['date', 'user']
     search_fields = ['user__username']
     ordering = ['-date']
-    readonly_fields = ['date'] 
\ No newline at end of file
+    date_hierarchy = 'date'
+    autocomplete_fields = ['user']
+    list_select_related = ['user']
+    readonly_fields = ['date'] 
+
+
+@admin.register(ArchivedTask)
+class ArchivedTaskAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """Read-only admin for archived tasks; they come back through the API (tasks.archive)."""
+    
+    list_display = ['title', 'user', 'category', 'priority', 'status', 'completed_at', 'archived_at']
+    list_filter = ['status', 'priority', 'category']
+    search_fields = ['title', 'user__username']
+    ordering = ['-archived_at']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user', 'category')
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Device)
+class DeviceAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """Admin configuration for push devices."""
+    
+    list_display = ['user', 'platform', 'is_active', 'created_at', 'last_seen_at']
+    list_filter = ['platform', 'is_active']
+    search_fields = ['user__username', 'token']
+    raw_id_fields = ['user']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
+
+
+@admin.register(NotificationDelivery)
+class NotificationDeliveryAdmin(ScalableAdminMixin, admin.ModelAdmin):
+    """Push delivery outbox; filter by status ``dead`` for the dead-letter queue."""
+    
+    list_display = ['notification', 'device', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error']
+    list_filter = ['status']
+    raw_id_fields = ['notification', 'device']
+    readonly_fields = ['attempts', 'sent_at', 'last_error']
+    actions = ['requeue']
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('notification__task', 'device')
+    
+    @admin.action(description='Requeue selected dead deliveries')
+    def requeue(self, request, queryset):
+        count = requeue_dead(list(queryset.filter(status='dead').values_list('id', flat=True)))
+        self.message_user(request, f'Requeued {count} deliveries.')
@@ -3,4 +3,16 @@ from django.apps import AppConfig
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'tasks' 
\ No newline at end of file
+    name = 'tasks'
+    
+    def ready(self):
+        from monitoring.registry import register_stats
+        from taskmaster.conf import require_shared_cache
+        from . import signals  # noqa: F401
+        from .response_cache import get_response_cache_settings, response_cache
+        from .suggestions import get_suggestion_settings
+        
+        register_stats('cache', response_cache.stats, response_cache.reset)
+        # Writes in one worker must invalidate the cached responses and suggestions of all of them
+        require_shared_cache(get_response_cache_settings()['VERSION_CACHE'], "RESPONSE_CACHE['VERSION_CACHE']")
+        require_shared_cache(get_suggestion_settings()['CACHE'], "SMART_SUGGESTIONS['CACHE']")
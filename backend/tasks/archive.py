@@ -0,0 +1,194 @@
+"""
+Archive tier for finished tasks.
+
+Completed and cancelled tasks that have not changed for ``AGE_DAYS`` days
+are moved, with their notifications, from Task/TaskNotification into
+ArchivedTask/ArchivedNotification (``python manage.py archive_tasks``).
+Each batch of ``BATCH_SIZE`` tasks is copied and deleted in one transaction,
+so a task is always in exactly one tier. The per-row delete receivers
+(live feed, unread counters, cache bumps) are muted for the batch, which
+updates the counters and caches of its users once instead. Parents are only archived once
+none of their subtasks is left in the live table.
+
+History reads (analytics, user stats, export) combine both tiers through
+the helpers below. Writing to an archived task restores it first (see
+TaskViewSet.get_object), together with its archived ancestors; deleting
+one deletes it from the archive (delete_archived_tasks).
+"""
+
+from functools import lru_cache
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from taskmaster.conf import settings_getter
+
+from .models import ArchivedNotification, ArchivedTask, Task, TaskNotification
+from .live import publish_task_change
+from .notifications import recount_unread
+from .response_cache import response_cache
+from .signals import muted_task_signals
+from .suggestions import suggestion_engine
+
+DEFAULTS = {
+    'AGE_DAYS': 180,
+    'BATCH_SIZE': 500,
+    'STATUSES': ['completed', 'cancelled'],
+}
+
+
+get_archive_settings = settings_getter('TASK_ARCHIVE', DEFAULTS)
+
+
+@lru_cache(maxsize=None)
+def _shared_attnames(source, target):
+    target_names = {field.attname for field in target._meta.concrete_fields}
+    return tuple(field.attname for field in source._meta.concrete_fields if field.attname in target_names)
+
+
+def _copy(obj, model, **extra):
+    """Instance of ``model`` with the column values ``obj`` shares with it."""
+    values = {name: getattr(obj, name) for name in _shared_attnames(type(obj), model)}
+    values.update(extra)
+    return model(**values)
+
+
+def archivable(cutoff, statuses=None):
+    """Live tasks eligible for archiving: finished before ``cutoff`` and without live subtasks."""
+    statuses = statuses or get_archive_settings()['STATUSES']
+    return Task.objects.filter(status__in=statuses, updated_at__lt=cutoff).exclude(subtasks__isnull=False)
+
+
+def archive_batch(cutoff, batch_size, statuses=None):
+    """Move up to ``batch_size`` eligible tasks to the archive. Returns how many moved."""
+    with transaction.atomic():
+        queryset = archivable(cutoff, statuses).order_by('updated_at')
+        if connections[queryset.db].features.has_select_for_update_skip_locked:
+            # Skip tasks another archiver (or a request) holds
+            queryset = queryset.select_for_update(skip_locked=True)
+        tasks = list(queryset[:batch_size])
+        if not tasks:
+            return 0
+        
+        archived_at = timezone.now()
+        ArchivedTask.objects.bulk_create([_copy(task, ArchivedTask, archived_at=archived_at) for task in tasks])
+        ArchivedNotification.objects.bulk_create([
+            _copy(notification, ArchivedNotification)
+            for notification in TaskNotification.objects.filter(task__in=tasks)
+        ])
+        with muted_task_signals():
+            Task.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+    
+    # Archived tasks stay in the user's history, so this is not a delete for the
+    # live feed; update the per-user counters and caches once for the batch
+    user_ids = {task.user_id for task in tasks}
+    recount_unread(user_ids)
+    for user_id in user_ids:
+        response_cache.bump(user_id)
+    suggestion_engine.invalidate_many(user_ids)
+    return len(tasks)
+
+
+def archive_tasks(age_days=None, batch_size=None, max_batches=None, statuses=None):
+    """
+    Archive eligible tasks batch by batch until none are left (or
+    ``max_batches`` ran). Yields the size of each batch.
+    """
+    config = get_archive_settings()
+    age_days = config['AGE_DAYS'] if age_days is None else age_days
+    batch_size = batch_size or config['BATCH_SIZE']
+    cutoff = timezone.now() - timezone.timedelta(days=age_days)
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size, statuses)
+        if not moved:
+            return
+        batches += 1
+        yield moved
+
+
+def restore_tasks(user, task_ids):
+    """
+    Move the given archived tasks of ``user`` back to the live table, with
+    their notifications and archived ancestors. Returns the restored ids.
+    """
+    with transaction.atomic():
+        archived = {}
+        wanted = set(task_ids)
+        while wanted:
+            found = list(ArchivedTask.objects.filter(user=user, pk__in=wanted))
+            archived.update((task.pk, task) for task in found)
+            wanted = {task.parent_task_id for task in found if task.parent_task_id is not None} - set(archived)
+        if not archived:
+            return []
+        
+        # Parents deleted since archiving cannot be referenced any more
+        parents = {task.parent_task_id for task in archived.values() if task.parent_task_id is not None}
+        existing = set(archived)
+        existing.update(Task.objects.filter(pk__in=parents - existing).values_list('pk', flat=True))
+        for task in archived.values():
+            if task.parent_task_id not in existing:
+                task.parent_task_id = None
+        
+        # bulk_create applies auto_now_add, so put the original timestamps back afterwards
+        tasks = Task.objects.bulk_create([_copy(task, Task) for task in archived.values()])
+        for task in tasks:
+            task.created_at = archived[task.pk].created_at
+        Task.objects.bulk_update(tasks, ['created_at'])
+        
+        archived_notifications = list(ArchivedNotification.objects.filter(task__in=list(archived)))
+        notifications = TaskNotification.objects.bulk_create(
+            [_copy(notification, TaskNotification, user_id=user.pk) for notification in archived_notifications]
+        )
+        for notification, original in zip(notifications, archived_notifications):
+            notification.sent_at = original.sent_at
+        TaskNotification.objects.bulk_update(notifications, ['sent_at'])
+        
+        ArchivedTask.objects.filter(pk__in=list(archived)).delete()
+    
+    # bulk_create sends no post_save signals
+    for task in tasks:
+        publish_task_change(user.pk, task.pk, 'create', task.updated_at)
+    recount_unread([user.pk])
+    response_cache.bump(user.pk)
+    suggestion_engine.invalidate(user.pk)
+    return list(archived)
+
+
+def delete_archived_tasks(user, task_ids):
+    """
+    Delete the given archived tasks of ``user`` with their archived subtasks,
+    as deleting a live task cascades to its subtasks, and their
+    notifications. Returns the deleted ids.
+    """
+    with transaction.atomic():
+        deleted = set()
+        wanted = set(ArchivedTask.objects.filter(user=user, pk__in=task_ids).values_list('pk', flat=True))
+        while wanted:
+            deleted |= wanted
+            wanted = set(
+                ArchivedTask.objects.filter(user=user, parent_task_id__in=wanted).values_list('pk', flat=True)
+            ) - deleted
+        if not deleted:
+            return []
+        ArchivedTask.objects.filter(pk__in=list(deleted)).delete()
+        # History reads (user stats) include archived tasks
+        transaction.on_commit(lambda: response_cache.bump(user.pk))
+    return list(deleted)
+
+
+def history_querysets(user):
+    """The user's tasks in both tiers, for history reads."""
+    return Task.objects.filter(user=user), ArchivedTask.objects.filter(user=user)
+
+
+def merge_counts(key, *tiers):
+    """
+    Merge ``.values(key).annotate(count=...)`` rows of several tiers into
+    one list, summing counts of equal keys in first-seen order.
+    """
+    totals = {}
+    for rows in tiers:
+        for row in rows:
+            totals[row[key]] = totals.get(row[key], 0) + row['count']
+    return [{key: value, 'count': count} for value, count in totals.items()]
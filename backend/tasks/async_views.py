@@ -0,0 +1,155 @@
+"""
+Async versions of the read-only task endpoints, served when running under ASGI.
+
+These serve the same data as the sync views in tasks.views, from the same
+querysets and report builders (tasks.reports) and the same pagination
+class. They are plain Django async views because DRF's APIView is sync
+only; authentication goes through users.authentication.async_jwt_view.
+
+The database work runs through sync_to_async, as the async ORM itself
+does. It is thread-sensitive, so a request's queries run one after
+another on the one thread that owns the database connection; what the
+event loop gains is that a request waiting on the database or on a live
+event stream does not hold a worker thread.
+"""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from taskmaster.renderers import select_renderer
+from users.authentication import async_jwt_view
+
+from . import reports
+from .dashboard import build_dashboard, open_tasks, parse_limit
+from .live import live_hub
+from .models import Task
+from .response_cache import acached_response
+from .serializers import TaskListSerializer
+from .sparse import request_sparse, sparse_queryset
+from .suggestions import suggestion_engine
+from .windows import request_windows
+
+_renderer = JSONRenderer()
+
+
+def json_response(data, status=200, request=None):
+    """
+    Render ``data`` exactly as DRF's JSONRenderer would for the sync views,
+    or as MessagePack if ``request`` accepts it (taskmaster.renderers).
+    """
+    renderer = _renderer if request is None else select_renderer(request)
+    return HttpResponse(renderer.render(data), status=status, content_type=renderer.media_type)
+
+
+def task_page(request, queryset, sparse):
+    """The page of ``queryset`` the list actions of TaskViewSet return, as data."""
+    paginator = api_settings.DEFAULT_PAGINATION_CLASS()
+    page = paginator.paginate_queryset(queryset, Request(request))
+    serializer = TaskListSerializer(page, many=True, context={'sparse': sparse})
+    return paginator.get_paginated_response(serializer.data).data
+
+
+async def paginated_tasks(request, queryset):
+    """Page ``queryset`` with the default pagination class and serialize it with TaskListSerializer."""
+    sparse = request_sparse(request)
+    try:
+        queryset = sparse_queryset(queryset, TaskListSerializer, sparse)
+    except ValidationError as e:
+        return json_response(e.detail, status=400, request=request)
+    try:
+        data = await sync_to_async(task_page)(request, queryset, sparse)
+    except NotFound as e:
+        return json_response({'detail': e.detail}, status=404, request=request)
+    return json_response(data, request=request)
+
+
+def user_tasks(request):
+    return Task.objects.filter(user=request.user)
+
+
+@async_jwt_view('GET')
+async def urgent_tasks(request):
+    """Get urgent tasks (high priority or due soon)."""
+    return await paginated_tasks(request, reports.urgent_tasks(user_tasks(request), timezone.now()))
+
+
+@async_jwt_view('GET')
+@acached_response('overdue')
+async def overdue_tasks(request):
+    """Get overdue tasks."""
+    return await paginated_tasks(request, reports.overdue_tasks(user_tasks(request), timezone.now()))
+
+
+@async_jwt_view('GET')
+@acached_response('today')
+async def today_tasks(request):
+    """Get tasks due today."""
+    return await paginated_tasks(request, reports.today_tasks(user_tasks(request), request_windows(request)))
+
+
+@async_jwt_view('GET')
+@acached_response('week')
+async def week_tasks(request):
+    """Get tasks due this week."""
+    return await paginated_tasks(request, reports.week_tasks(user_tasks(request), request_windows(request)))
+
+
+@async_jwt_view('GET')
+@acached_response('analytics')
+async def task_analytics(request):
+    """Get task analytics for the current user."""
+    days = int(request.GET.get('days', 30))
+    data = await sync_to_async(reports.task_analytics)(request.user, request_windows(request), days)
+    return json_response(data, request=request)
+
+
+@async_jwt_view('GET')
+async def smart_suggestions(request):
+    """Get the user's top-ranked task suggestions (see tasks.suggestions)."""
+    suggestions = await suggestion_engine.afor_user(request.user)
+    return json_response({
+        'suggestions': suggestions,
+        'total_count': len(suggestions)
+    }, request=request)
+
+
+@async_jwt_view('GET')
+@acached_response('calendar')
+async def calendar_view(request):
+    """Get calendar view data for tasks."""
+    windows = request_windows(request)
+    month = int(request.GET.get('month', windows.today.month))
+    year = int(request.GET.get('year', windows.today.year))
+    data = await sync_to_async(reports.calendar)(request.user, windows, month, year)
+    return json_response(data, request=request)
+
+
+@async_jwt_view('GET')
+async def dashboard_view(request):
+    """Get the home screen sections, suggestions and counts in one response."""
+    windows = request_windows(request)
+    sparse = request_sparse(request)
+    try:
+        tasks = sparse_queryset(open_tasks(request.user, windows.now), TaskListSerializer, sparse, project=False)
+    except ValidationError as e:
+        return json_response(e.detail, status=400, request=request)
+    limit = parse_limit(request.GET.get('limit'))
+    tasks = await sync_to_async(list)(tasks)
+    data = await sync_to_async(build_dashboard)(tasks, windows, limit=limit, sparse=sparse)
+    return json_response(data, request=request)
+
+
+@async_jwt_view('GET')
+async def live_events(request):
+    """Stream the user's task changes as Server-Sent Events (see tasks.live)."""
+    last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    return StreamingHttpResponse(
+        live_hub.stream(request.user.pk, last_id),
+        content_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,131 @@
+"""
+Process-local registry of serialized categories.
+
+Categories are a small, global table that rarely changes, yet every task
+response embeds one. The registry loads all of them once, serialized with
+CategorySerializer, so task queries only need ``category_id`` and the
+serializers look the representation up instead of joining and serializing
+the category per task.
+
+Category writes bump a version number in the cache (after the transaction
+commits, see tasks.signals). Each process compares its loaded version with
+it on every snapshot and reloads when it moved, and at least every
+``MAX_AGE`` seconds in case the cache is not shared between processes.
+
+Async views must ``await category_registry.asnapshot()`` before serializing
+tasks; inside the event loop snapshot() serves what was loaded last since
+it cannot query the database.
+"""
+
+import asyncio
+import threading
+import time
+
+from django.core.cache import caches
+
+from taskmaster.conf import settings_getter
+
+from .models import Category
+
+DEFAULTS = {
+    'CACHE': 'default',  # CACHES alias holding the version; share it between processes
+    'MAX_AGE': 300,  # seconds
+}
+
+
+get_category_registry_settings = settings_getter('CATEGORY_REGISTRY', DEFAULTS)
+
+
+def _in_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class CategoryRegistry:
+    """``{category id: serialized category}``, reloaded when the version changes."""
+    
+    version_key = 'category-registry-version'
+    
+    def __init__(self, cache, max_age=300):
+        self.cache = cache
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # (version, loaded at, categories), replaced as a whole
+        self._state = None
+    
+    def _fresh(self, version):
+        state = self._state
+        if state is None or state[0] != version or time.monotonic() - state[1] >= self.max_age:
+            return None
+        return state[2]
+    
+    def current_version(self):
+        version = self.cache.get(self.version_key)
+        if version is None:
+            # Start from the clock so a lost version never matches an old load
+            self.cache.add(self.version_key, time.time_ns(), None)
+            version = self.cache.get(self.version_key)
+        return version
+    
+    async def acurrent_version(self):
+        version = await self.cache.aget(self.version_key)
+        if version is None:
+            await self.cache.aadd(self.version_key, time.time_ns(), None)
+            version = await self.cache.aget(self.version_key)
+        return version
+    
+    def snapshot(self):
+        """Return the current ``{id: data}`` mapping, reloading it if stale."""
+        if _in_event_loop() and self._state is not None:
+            return self._state[2]
+        version = self.current_version()
+        categories = self._fresh(version)
+        if categories is None:
+            with self._lock:
+                categories = self._fresh(version)
+                if categories is None:
+                    categories = self._load(version, list(Category.objects.all()))
+        return categories
+    
+    async def asnapshot(self):
+        version = await self.acurrent_version()
+        categories = self._fresh(version)
+        if categories is None:
+            categories = self._load(version, [category async for category in Category.objects.all()])
+        return categories
+    
+    def _load(self, version, categories):
+        # Imported here: the serializers resolve categories through this module
+        from .serializers import CategorySerializer
+        
+        data = {category.pk: dict(CategorySerializer(category).data) for category in categories}
+        self._state = (version, time.monotonic(), data)
+        return data
+    
+    def get(self, pk, categories=None):
+        """
+        Serialized category ``pk`` from ``categories`` (a snapshot) or the
+        current snapshot. A miss means the category was created after the
+        snapshot was loaded, so the registry reloads once outside async code.
+        """
+        categories = self.snapshot() if categories is None else categories
+        data = categories.get(pk)
+        if data is None and not _in_event_loop():
+            self._state = None
+            data = self.snapshot().get(pk)
+        return data
+    
+    def invalidate(self):
+        """Make every process reload on its next snapshot."""
+        self._state = None
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.add(self.version_key, time.time_ns(), None)
+
+
+_config = get_category_registry_settings()
+category_registry = CategoryRegistry(caches[_config['CACHE']], max_age=_config['MAX_AGE'])
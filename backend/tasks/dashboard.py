@@ -0,0 +1,108 @@
+"""
+Home screen dashboard built from a single query over the user's open tasks.
+
+The app used to call the today, urgent and overdue lists, suggestions and
+stats separately, re-querying mostly the same rows each time. Here the
+open tasks are loaded once, partitioned in memory, and every task is
+serialized once into ``tasks`` while the sections list task IDs.
+"""
+
+from datetime import timedelta
+
+
+from .models import Task
+from .serializers import TaskListSerializer
+from .sparse import NO_SELECTION, Sparse
+from .suggestions import suggestion_engine
+
+HIGH_PRIORITIES = ('high', 'urgent')
+
+SECTIONS = ('today', 'urgent', 'overdue', 'due_soon', 'high_priority')
+
+MAX_SECTION_LIMIT = 100
+
+
+def open_tasks(user, now):
+    """Queryset of the user's open tasks, annotated with ``urgency`` (user/status index)."""
+    return Task.objects.filter(user=user).open().with_urgency_score(now)
+
+
+def parse_limit(value, default=20):
+    """Clamp the ``?limit=`` query parameter to 1..MAX_SECTION_LIMIT."""
+    try:
+        return max(1, min(int(value), MAX_SECTION_LIMIT))
+    except (TypeError, ValueError):
+        return default
+
+
+def partition(tasks, windows):
+    """Split open tasks into the dashboard sections, each in its list endpoint's order."""
+    now = windows.now
+    today_start, today_end = windows.day()
+    soon = now + timedelta(days=1)
+    sections = {name: [] for name in SECTIONS}
+    
+    for task in tasks:
+        due = task.due_date
+        high = task.priority in HIGH_PRIORITIES
+        if due is not None:
+            if today_start <= due < today_end:
+                sections['today'].append(task)
+            if due < now:
+                sections['overdue'].append(task)
+            elif due <= soon and task.status == 'pending':
+                sections['due_soon'].append(task)
+        if high or (due is not None and due <= soon):
+            sections['urgent'].append(task)
+        if high and task.status == 'pending':
+            sections['high_priority'].append(task)
+    
+    sections['today'].sort(key=lambda task: (task.priority, task.due_date))
+    sections['urgent'].sort(key=lambda task: -task.urgency)
+    sections['overdue'].sort(key=lambda task: task.due_date)
+    sections['due_soon'].sort(key=lambda task: (task.priority, task.due_date))
+    sections['high_priority'].sort(key=lambda task: -task.urgency)
+    return sections
+
+
+def build_dashboard(tasks, windows, limit=20, sparse=NO_SELECTION):
+    """
+    Build the dashboard payload from the user's open ``tasks``, with
+    "today" taken from their DateWindows (tasks.windows).
+    
+    Each section lists at most ``limit`` task IDs; ``counts`` has the full
+    section sizes. ``tasks`` maps every referenced ID to its serialized task,
+    with the fields selected by ``sparse`` (tasks.sparse) plus ``id``.
+    """
+    now = windows.now
+    sections = partition(tasks, windows)
+    ranked = suggestion_engine.rank(tasks, now)
+    
+    referenced = {}
+    for name in SECTIONS:
+        for task in sections[name][:limit]:
+            referenced.setdefault(task.id, task)
+    for _, _, task in ranked:
+        referenced.setdefault(task.id, task)
+    
+    status_counts = dict.fromkeys(Task.OPEN_STATUSES, 0)
+    for task in tasks:
+        status_counts[task.status] += 1
+    
+    if sparse.fields is not None:
+        sparse = Sparse(sparse.fields | {'id'}, sparse.expand)
+    serialized = TaskListSerializer(
+        list(referenced.values()), many=True, context={'now': now, 'sparse': sparse}
+    ).data
+    suggestions = suggestion_engine.render(ranked, now, task_data={task_id: str(task_id) for task_id in referenced})
+    return {
+        'generated_at': now,
+        'counts': {
+            'open': len(tasks),
+            **{f'open_{status}': count for status, count in status_counts.items()},
+            **{name: len(sections[name]) for name in SECTIONS},
+        },
+        'sections': {name: [str(task.id) for task in sections[name][:limit]] for name in SECTIONS},
+        'suggestions': suggestions,
+        'tasks': {item['id']: item for item in serialized},
+    }
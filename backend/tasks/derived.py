@@ -0,0 +1,145 @@
+"""
+Derived task fields (urgency score, overdue flag, remaining time) computed
+for a whole page of tasks against one ``now``.
+
+Computing them per field and per row called timezone.now() several times
+per task, so one row could be overdue in one field and not in another.
+Pages of at least NUMPY_MIN_ROWS rows are computed over datetime64 arrays
+when NumPy is installed; smaller pages (and installs without NumPy) use the
+scalar helpers, which Task's properties also use.
+"""
+
+from collections import namedtuple
+from operator import attrgetter, itemgetter
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy is optional
+    np = None
+
+PRIORITY_SCORES = {'low': 10, 'medium': 20, 'high': 30, 'urgent': 40}
+ACTIVE_STATUSES = ('pending', 'in_progress')
+
+# (upper bound in seconds until due, score); overdue is checked first
+DUE_SCORES = ((3600, 40), (86400, 30), (604800, 20))
+OVERDUE_SCORE = 50
+IN_PROGRESS_SCORE = 5
+
+# (unit length in seconds, label) for humanized remaining time
+TIME_UNITS = ((1, 'seconds'), (60, 'minutes'), (3600, 'hours'), (86400, 'days'))
+
+NUMPY_MIN_ROWS = 64
+
+DerivedFields = namedtuple('DerivedFields', ['urgency_score', 'is_overdue', 'remaining_time'])
+
+
+def urgency_score(priority, status, due_date, now):
+    """Priority score plus a due date bucket, plus a bonus for tasks in progress."""
+    score = PRIORITY_SCORES.get(priority, 0)
+    if due_date is not None:
+        seconds = (due_date - now).total_seconds()
+        if seconds < 0:
+            score += OVERDUE_SCORE
+        else:
+            for bound, bucket_score in DUE_SCORES:
+                if seconds < bound:
+                    score += bucket_score
+                    break
+    if status == 'in_progress':
+        score += IN_PROGRESS_SCORE
+    return score
+
+
+def is_overdue(status, due_date, now):
+    return due_date is not None and status in ACTIVE_STATUSES and now > due_date
+
+
+def humanize_seconds(seconds):
+    """Format a positive number of seconds in the largest unit that fits, e.g. '3 hours'."""
+    seconds = int(seconds)
+    for length, label in reversed(TIME_UNITS):
+        if seconds >= length or length == 1:
+            return f'{seconds // length} {label}'
+
+
+def remaining_time(due_date, now):
+    """Humanized time until ``due_date``, or None if it has passed or is unset."""
+    if due_date is None:
+        return None
+    seconds = (due_date - now).total_seconds()
+    return humanize_seconds(seconds) if seconds > 0 else None
+
+
+def _get(row, name):
+    return row[name] if isinstance(row, dict) else getattr(row, name)
+
+
+def derive_fields(rows, now):
+    """
+    Return ``{pk: DerivedFields}`` for task instances or ``.values()`` dicts.
+    
+    Rows need ``id``, ``priority``, ``status`` and ``due_date``.
+    """
+    rows = list(rows)
+    if np is not None and len(rows) >= NUMPY_MIN_ROWS:
+        return _derive_vectorized(rows, now)
+    result = {}
+    for row in rows:
+        priority, status, due = _get(row, 'priority'), _get(row, 'status'), _get(row, 'due_date')
+        result[_get(row, 'id')] = DerivedFields(
+            urgency_score(priority, status, due, now),
+            is_overdue(status, due, now),
+            remaining_time(due, now),
+        )
+    return result
+
+
+def _columns(rows):
+    """Split rows into id, priority, status and due date columns."""
+    names = ('id', 'priority', 'status', 'due_date')
+    getter = itemgetter(*names) if isinstance(rows[0], dict) else attrgetter(*names)
+    return zip(*map(getter, rows))
+
+
+def _derive_vectorized(rows, now):
+    ids, priorities, statuses, due_dates = _columns(rows)
+    
+    # Microseconds since the epoch viewed as datetime64; NaT marks a missing due date
+    nat = np.iinfo(np.int64).min
+    due = np.array(
+        [nat if due is None else int(due.timestamp() * 1e6) for due in due_dates], dtype=np.int64
+    ).view('datetime64[us]')
+    has_due = ~np.isnat(due)
+    seconds = (due - np.datetime64(int(now.timestamp() * 1e6), 'us')) / np.timedelta64(1, 's')
+    seconds = np.where(has_due, seconds, np.inf)
+    
+    statuses = np.array(statuses, dtype=object)
+    in_progress = statuses == 'in_progress'
+    due_score = np.select(
+        [seconds < 0] + [seconds < bound for bound, _ in DUE_SCORES],
+        [OVERDUE_SCORE] + [bucket_score for _, bucket_score in DUE_SCORES],
+        default=0,
+    )
+    scores = (
+        np.array([PRIORITY_SCORES.get(priority, 0) for priority in priorities], dtype=np.int64)
+        + due_score
+        + np.where(in_progress, IN_PROGRESS_SCORE, 0)
+    )
+    overdue = (seconds < 0) & ((statuses == 'pending') | in_progress)
+    
+    # Humanize: the largest unit not exceeding the remaining whole seconds
+    pending = has_due & (seconds > 0)
+    whole = np.floor(np.where(pending, seconds, 0)).astype(np.int64)
+    lengths = np.array([length for length, _ in TIME_UNITS], dtype=np.int64)
+    unit = np.maximum(np.searchsorted(lengths, whole, side='right') - 1, 0)
+    counts = whole // lengths[unit]
+    labels = [label for _, label in TIME_UNITS]
+    remaining = [
+        f'{count} {labels[u]}' if is_pending else None
+        for count, u, is_pending in zip(counts.tolist(), unit.tolist(), pending.tolist())
+    ]
+    
+    return {
+        pk: DerivedFields(score, is_overdue, remaining_time)
+        for pk, score, is_overdue, remaining_time in zip(ids, scores.tolist(), overdue.tolist(), remaining)
+    }
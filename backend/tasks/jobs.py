@@ -0,0 +1,102 @@
+"""
+Background jobs of the tasks app (see jobqueue.api); JOB_QUEUE['SCHEDULE']
+in settings runs them periodically.
+"""
+
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum
+
+from jobqueue.api import job
+
+from .archive import archive_tasks
+from .models import ArchivedTask, Task, TaskAnalytics
+from .push import Dispatcher
+from .response_cache import response_cache
+from .windows import DateWindows, get_zone, in_range
+
+
+@job(priority=-5)
+def rollup_analytics(days_ago=1):
+    """
+    Recompute the TaskAnalytics rows of the local day ``days_ago`` days
+    back from live and archived tasks; users without activity that day get
+    no row. Users are processed per timezone so each gets their own
+    calendar day. Returns the number of rows written.
+    """
+    User = get_user_model()
+    rows = 0
+    for zone in User.objects.order_by().values_list('timezone', flat=True).distinct():
+        windows = DateWindows(get_zone(zone))
+        day = windows.today - windows.today.resolution * days_ago
+        period = windows.dates(day, day)
+        stats = defaultdict(lambda: {'created': 0, 'completed': 0, 'overdue': 0, 'duration': 0, 'timed': 0,
+                                     'priorities': {}})
+        
+        for tier in (Task.objects.filter(user__timezone=zone), ArchivedTask.objects.filter(user__timezone=zone)):
+            created = tier.filter(**in_range('created_at', period)).order_by().values('user_id', 'priority')
+            for row in created.annotate(count=Count('id')):
+                user_stats = stats[row['user_id']]
+                user_stats['created'] += row['count']
+                user_stats['priorities'][row['priority']] = user_stats['priorities'].get(row['priority'], 0) + row['count']
+            
+            completed = tier.filter(status='completed', **in_range('completed_at', period)).order_by().values('user_id')
+            for row in completed.annotate(count=Count('id'), duration=Sum('actual_duration'), timed=Count('actual_duration')):
+                user_stats = stats[row['user_id']]
+                user_stats['completed'] += row['count']
+                user_stats['duration'] += row['duration'] or 0
+                user_stats['timed'] += row['timed']
+        
+        # Still open tasks that fell due that day; archived tasks are never overdue
+        overdue = Task.objects.filter(
+            user__timezone=zone, status__in=Task.OPEN_STATUSES,
+            **in_range('due_date', (period[0], min(period[1], windows.now)))
+        ).order_by().values('user_id').annotate(count=Count('id'))
+        for row in overdue:
+            stats[row['user_id']]['overdue'] += row['count']
+        
+        TaskAnalytics.objects.bulk_create([
+            TaskAnalytics(
+                user_id=user_id,
+                date=day,
+                tasks_created=user_stats['created'],
+                tasks_completed=user_stats['completed'],
+                tasks_overdue=user_stats['overdue'],
+                total_duration=user_stats['duration'],
+                completion_rate=user_stats['completed'] / user_stats['created'] * 100 if user_stats['created'] else 0,
+                average_task_duration=user_stats['duration'] / user_stats['timed'] if user_stats['timed'] else 0,
+                priority_distribution=user_stats['priorities'],
+            )
+            for user_id, user_stats in stats.items()
+        ], update_conflicts=True, unique_fields=['user', 'date'], update_fields=[
+            'tasks_created', 'tasks_completed', 'tasks_overdue', 'total_duration',
+            'completion_rate', 'average_task_duration', 'priority_distribution',
+        ], batch_size=500)
+        
+        # Rows of users without activity that day are stale
+        stale = TaskAnalytics.objects.filter(date=day, user__timezone=zone).exclude(user_id__in=list(stats))
+        stale_users = list(stale.values_list('user_id', flat=True))
+        TaskAnalytics.objects.filter(date=day, user_id__in=stale_users).delete()
+        
+        # bulk_create and update send no signals
+        for user_id in [*stats, *stale_users]:
+            response_cache.bump(user_id)
+        rows += len(stats)
+    return rows
+
+
+@job
+def archive_sweep():
+    """Move old finished tasks to the archive (see tasks.archive)."""
+    return sum(archive_tasks())
+
+
+@job(priority=10)
+def deliver_push():
+    """Deliver due push notifications (see tasks.push), for setups without a deliver_notifications worker."""
+    dispatcher = Dispatcher()
+    try:
+        return dispatcher.run(until_idle=True)
+    finally:
+        dispatcher.close()
@@ -0,0 +1,235 @@
+"""
+Live change feed: Server-Sent Events of a user's task changes.
+
+Clients keep ``GET /api/live/`` open (ASGI only) instead of polling the list
+endpoints. Every committed task change is pushed as a compact event::
+
+    id: 1760000000123456
+    event: task
+    data: {"task": "<uuid>", "op": "update", "version": 1760000000123, "fields": ["status", "progress"]}
+
+``op`` is ``create``, ``update`` or ``delete``. ``version`` is the task's
+``updated_at`` in epoch milliseconds. ``fields`` lists the changed fields,
+or is null when unknown, in which case the client refetches the task.
+
+Events are published to the process-local LiveHub through a pluggable
+broker. LocalBroker only reaches streams of the same process; RedisBroker
+(``OPTIONS['URL']``, needs the redis package) fans events out to every
+process. Each process keeps the last ``BUFFER`` events of the users
+streaming from it. A reconnecting client sends ``Last-Event-ID`` and gets
+what it missed. If that is no longer buffered, it gets a ``reset`` event
+and refetches its lists.
+
+Streams close after ``MAX_AGE`` seconds (clients reconnect with
+Last-Event-ID), which also bounds streams of clients that went away
+silently.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+from taskmaster.conf import settings_getter
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis is optional
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BROKER': 'tasks.live.LocalBroker',
+    'OPTIONS': {},  # Passed to the broker, e.g. {'URL': 'redis://...'} for RedisBroker
+    'BUFFER': 100,  # Recent events kept per streaming user, for resume
+    'MAX_USERS': 10000,  # Users with buffered events per process
+    'HEARTBEAT': 15,  # Seconds between keep-alive comments
+    'MAX_AGE': 300,  # Seconds before a stream is closed for the client to reconnect
+    'RETRY': 3000,  # Milliseconds clients wait before reconnecting
+}
+
+
+get_live_settings = settings_getter('LIVE_EVENTS', DEFAULTS)
+
+
+def frame(event_id, event, data):
+    return f'id: {event_id}\nevent: {event}\ndata: {data}\n\n'
+
+
+class LocalBroker:
+    """Fan-out within this process only."""
+    
+    def __init__(self, config, deliver):
+        self.deliver = deliver
+    
+    def publish(self, user_id, event_id, data):
+        self.deliver(user_id, event_id, data)
+    
+    def listen(self):
+        pass
+
+
+class RedisBroker:
+    """Fan-out to every process through a Redis pub/sub channel."""
+    
+    def __init__(self, config, deliver):
+        if redis is None:
+            raise ImproperlyConfigured('tasks.live.RedisBroker requires the redis package.')
+        options = config['OPTIONS']
+        self.client = redis.Redis.from_url(options['URL'])
+        self.channel = options.get('CHANNEL', 'taskmaster:live')
+        self.deliver = deliver
+        self.lock = threading.Lock()
+        self.thread = None
+    
+    def publish(self, user_id, event_id, data):
+        self.client.publish(self.channel, json.dumps([user_id, event_id, data]))
+    
+    def listen(self):
+        """Start receiving events, once a stream is open in this process."""
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='live-events', daemon=True)
+                self.thread.start()
+    
+    def run(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    self.deliver(*json.loads(message['data']))
+            except redis.RedisError:
+                logger.exception('Live event subscription failed; reconnecting')
+                time.sleep(1)
+
+
+class LiveHub:
+    """Per-process subscribers and resume buffers of the live feed."""
+    
+    def __init__(self, config=None):
+        self.config = config or get_live_settings()
+        self.lock = threading.Lock()
+        self.buffers = OrderedDict()  # user id -> deque of (event id, frame), LRU order
+        self.subscribers = defaultdict(set)  # user id -> {(loop, queue)}
+        self.last_id = 0
+    
+    @cached_property
+    def broker(self):
+        return import_string(self.config['BROKER'])(self.config, self.deliver)
+    
+    def next_id(self):
+        """Microsecond timestamp, strictly increasing within the process."""
+        with self.lock:
+            self.last_id = max(self.last_id + 1, time.time_ns() // 1000)
+            return self.last_id
+    
+    def publish(self, user_id, payload):
+        try:
+            self.broker.publish(user_id, self.next_id(), json.dumps(payload, separators=(',', ':')))
+        except Exception:  # The write already committed; clients catch up on their next reset
+            logger.exception('Publishing a live event failed')
+    
+    def deliver(self, user_id, event_id, data):
+        """Buffer an event and hand it to the user's open streams; called from any thread."""
+        with self.lock:
+            buffer = self.buffers.get(user_id)
+            if buffer is None:  # Nobody streams from this process
+                return
+            item = (event_id, frame(event_id, 'task', data))
+            buffer.append(item)
+            subscribers = list(self.subscribers[user_id])
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:  # Loop closed
+                pass
+    
+    def subscribe(self, user_id):
+        self.broker.listen()
+        queue = asyncio.Queue()
+        with self.lock:
+            if user_id in self.buffers:
+                self.buffers.move_to_end(user_id)
+            else:
+                self.buffers[user_id] = deque(maxlen=self.config['BUFFER'])
+                while len(self.buffers) > self.config['MAX_USERS']:
+                    self.buffers.popitem(last=False)
+            self.subscribers[user_id].add((asyncio.get_running_loop(), queue))
+        return queue
+    
+    def unsubscribe(self, user_id, queue):
+        with self.lock:
+            subscribers = self.subscribers[user_id]
+            subscribers.difference_update({item for item in subscribers if item[1] is queue})
+            if not subscribers:
+                del self.subscribers[user_id]
+    
+    def mark(self, user_id):
+        """Buffer a position without an event (after a reset) and return its id."""
+        event_id = self.next_id()
+        with self.lock:
+            buffer = self.buffers.get(user_id)
+            if buffer is not None:
+                buffer.append((event_id, None))
+        return event_id
+    
+    def replay(self, user_id, last_id):
+        """Buffered events after ``last_id``, or None if ``last_id`` is no longer buffered."""
+        with self.lock:
+            buffer = list(self.buffers.get(user_id, ()))
+        for index, (event_id, _) in enumerate(buffer):
+            if str(event_id) == last_id:
+                return buffer[index + 1:]
+        return None
+    
+    async def stream(self, user_id, last_id=None):
+        """SSE body of one client connection."""
+        queue = self.subscribe(user_id)
+        try:
+            yield f"retry: {self.config['RETRY']}\n\n"
+            replayed = set()
+            if last_id:
+                backlog = self.replay(user_id, last_id)
+                if backlog is None:
+                    yield frame(self.mark(user_id), 'reset', '{}')
+                else:
+                    for event_id, text in backlog:
+                        replayed.add(event_id)
+                        if text is not None:
+                            yield text
+            
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.config['MAX_AGE']
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    event_id, text = await asyncio.wait_for(queue.get(), min(self.config['HEARTBEAT'], remaining))
+                except asyncio.TimeoutError:
+                    yield ': ping\n\n'
+                    continue
+                if event_id not in replayed:
+                    yield text
+        finally:
+            self.unsubscribe(user_id, queue)
+
+
+live_hub = LiveHub()
+
+
+def publish_task_change(user_id, task_id, op, updated_at, fields=None):
+    """Publish a task change to the owner's live feed once the transaction commits."""
+    payload = {
+        'task': str(task_id),
+        'op': op,
+        'version': int(updated_at.timestamp() * 1000),
+        'fields': fields,
+    }
+    transaction.on_commit(lambda: live_hub.publish(user_id, payload))
@@ -0,0 +1,34 @@
+"""
+Move old completed/cancelled tasks and their notifications to the archive
+tables in batches (see tasks.archive). Run it periodically, e.g. nightly.
+"""
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tasks.archive import archivable, archive_tasks, get_archive_settings
+
+
+class Command(BaseCommand):
+    help = 'Archive completed and cancelled tasks older than TASK_ARCHIVE["AGE_DAYS"] days.'
+    
+    def add_arguments(self, parser):
+        config = get_archive_settings()
+        parser.add_argument('--days', type=int, default=config['AGE_DAYS'], help='Minimum age since last change')
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'], help='Tasks moved per transaction')
+        parser.add_argument('--max-batches', type=int, help='Stop after this many batches')
+        parser.add_argument('--dry-run', action='store_true', help='Only count eligible tasks')
+    
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            count = archivable(timezone.now() - timezone.timedelta(days=options['days'])).count()
+            self.stdout.write(f'{count} tasks eligible for archiving')
+            return
+        
+        archived = 0
+        for moved in archive_tasks(options['days'], options['batch_size'], options['max_batches']):
+            archived += moved
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Archived {archived} tasks')
+        
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} tasks'))
@@ -0,0 +1,37 @@
+"""
+Push pending notification deliveries to devices (see tasks.push). Run one
+or more of these as long-lived workers, or with --until-idle from cron.
+"""
+
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from tasks.push import Dispatcher, requeue_dead
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued push notifications in per-device batches.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--until-idle', action='store_true', help='Exit once nothing is due')
+        parser.add_argument('--requeue-dead', action='store_true', help='Retry dead-lettered deliveries first')
+    
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            self.stdout.write(f'Requeued {requeue_dead()} dead deliveries')
+        
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        
+        dispatcher = Dispatcher()
+        try:
+            totals = dispatcher.run(until_idle=options['until_idle'], stop=stop)
+        finally:
+            dispatcher.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {totals.get('sent', 0)}, retried {totals.get('retried', 0)}, "
+            f"dead-lettered {totals.get('dead', 0)}"
+        ))
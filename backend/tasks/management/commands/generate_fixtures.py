@@ -0,0 +1,578 @@
+"""
+Generate a large, reproducible data set for load and performance testing.
+
+Users go through bulk_create. Tasks, notifications and analytics rows are
+generated as tuples of database-ready values and written with COPY on
+PostgreSQL and one executemany INSERT per batch elsewhere, so no model
+instances are built and no per-field preparation runs for them. Columns
+the generator does not fill get their field's default (see RowWriter).
+
+Usage:
+    python manage.py generate_fixtures --users 1000 --tasks-per-user 1000 --seed 42
+"""
+
+import bisect
+import io
+import itertools
+import json
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from tasks.models import Category, NotificationCounter, NotificationDelivery, Task, TaskNotification, TaskAnalytics
+from tasks.notifications import recount_unread
+
+User = get_user_model()
+
+CATEGORIES = [
+    {'name': 'Work', 'color': '#3F51B5', 'icon': '💼', 'description': 'Professional and work-related tasks'},
+    {'name': 'Personal', 'color': '#E91E63', 'icon': '❤️', 'description': 'Personal and family-related tasks'},
+    {'name': 'Study', 'color': '#009688', 'icon': '📚', 'description': 'Learning and educational tasks'},
+    {'name': 'Health', 'color': '#4CAF50', 'icon': '🏃‍♂️', 'description': 'Health and fitness related tasks'},
+    {'name': 'Finance', 'color': '#FF9800', 'icon': '💰', 'description': 'Financial planning and budgeting tasks'},
+    {'name': 'Other', 'color': '#9E9E9E', 'icon': '📋', 'description': 'Miscellaneous tasks'},
+]
+
+# (value, weight) pairs used for weighted sampling
+PRIORITY_WEIGHTS = [('low', 25), ('medium', 40), ('high', 25), ('urgent', 10)]
+CATEGORY_WEIGHTS = [('Work', 35), ('Personal', 25), ('Study', 12), ('Health', 10), ('Finance', 8), ('Other', 10)]
+PAST_STATUS_WEIGHTS = [('completed', 70), ('cancelled', 5), ('overdue', 10), ('pending', 8), ('in_progress', 7)]
+FUTURE_STATUS_WEIGHTS = [('pending', 65), ('in_progress', 25), ('completed', 8), ('cancelled', 2)]
+TIMEZONES = [
+    ('UTC', 20), ('America/New_York', 20), ('America/Los_Angeles', 15), ('Europe/London', 15),
+    ('Europe/Berlin', 10), ('Asia/Kolkata', 10), ('Asia/Tokyo', 5), ('Australia/Sydney', 5),
+]
+RECURRENCE_PATTERNS = [
+    {'frequency': 'daily', 'interval': 1},
+    {'frequency': 'weekly', 'interval': 1, 'days': ['mon', 'wed', 'fri']},
+    {'frequency': 'weekly', 'interval': 2},
+    {'frequency': 'monthly', 'interval': 1, 'day_of_month': 1},
+]
+TAGS = [
+    'meeting', 'email', 'review', 'client', 'urgent', 'home', 'errand', 'reading',
+    'workout', 'budget', 'planning', 'call', 'bug', 'feature', 'docs', 'travel',
+    'family', 'shopping', 'health', 'learning',
+]
+VERBS = ['Finish', 'Review', 'Plan', 'Call', 'Write', 'Prepare', 'Update', 'Fix', 'Read', 'Schedule', 'Pay', 'Clean']
+NOUNS = [
+    'report', 'proposal', 'budget', 'slides', 'code review', 'invoice', 'grocery list', 'workout plan',
+    'dentist appointment', 'chapter 4', 'newsletter', 'tax forms', 'project roadmap', 'bug backlog',
+]
+
+DURATIONS = [None, 15, 30, 45, 60, 90, 120, 180, 240]
+REMINDER_OFFSETS = [timedelta(minutes=15), timedelta(hours=1), timedelta(days=1)]
+ACTIONS = ['', '', 'snooze', 'complete', 'reschedule']
+
+# Fields (attnames) of the generated rows, in order
+TASK_COLUMNS = [
+    'id', 'title', 'description', 'user_id', 'category_id', 'priority', 'status',
+    'created_at', 'updated_at', 'due_date', 'completed_at', 'reminder_time',
+    'estimated_duration', 'actual_duration', 'is_recurring', 'recurrence_pattern', 'tags',
+    'notification_enabled', 'notification_sent', 'snooze_count', 'last_snoozed',
+    'progress', 'parent_task_id', 'is_synced', 'last_synced',
+]
+NOTIFICATION_COLUMNS = ['task_id', 'user_id', 'notification_type', 'message', 'sent_at', 'is_read', 'action_taken']
+ANALYTICS_COLUMNS = [
+    'user_id', 'date', 'tasks_created', 'tasks_completed', 'tasks_overdue', 'total_duration',
+    'completion_rate', 'average_task_duration', 'priority_distribution',
+]
+
+# Bits that uuid.UUID(int=..., version=4) clears and sets
+UUID4_CLEAR = ~((0xc000 << 48) | (0xf000 << 64))
+UUID4_SET = (0x8000 << 48) | (4 << 76)
+
+COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _weighted(choices):
+    """Split (value, weight) pairs into values and cumulative weights for ``FixtureGenerator.pick``."""
+    values, weights = zip(*choices)
+    return list(values), list(itertools.accumulate(weights))
+
+
+def _copy_value(value):
+    """A value in PostgreSQL's COPY text format."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    return str(value).translate(COPY_ESCAPES)
+
+
+def _default_value(field, now):
+    """
+    ``field``'s default, database-ready (JSON as text, like the generated
+    rows); ``now`` for auto_now and auto_now_add fields.
+    """
+    if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+        return field.get_db_prep_save(now, connection)
+    if isinstance(field, models.JSONField):
+        return json.dumps(field.get_default())
+    return field.get_db_prep_save(field.get_default(), connection)
+
+
+def _copy(cursor, statement, data):
+    """Run ``COPY ... FROM STDIN`` with psycopg 3 (``copy``) or psycopg2 (``copy_expert``)."""
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(statement, io.StringIO(data))
+    else:
+        with cursor.copy(statement) as copy:
+            copy.write(data)
+
+
+class RowWriter:
+    """
+    Insert tuples of database-ready values for ``fields`` (attnames, in
+    row order) into ``model``'s table: COPY on PostgreSQL, a single
+    executemany INSERT elsewhere. The other concrete fields of the model
+    get their default (NULL if nullable, ``now`` if auto_now, the
+    database's if an auto primary key); a field with none of those raises
+    CommandError.
+    """
+    
+    def __init__(self, model, fields, now=None):
+        concrete = {field.attname: field for field in model._meta.concrete_fields}
+        unknown = [name for name in fields if name not in concrete]
+        if unknown:
+            raise CommandError(f"{model.__name__} has no field(s) {', '.join(unknown)}.")
+        
+        columns = [concrete[name].column for name in fields]
+        defaults = []
+        for name, field in concrete.items():
+            if name in fields or field.db_returning:  # Auto primary keys
+                continue
+            auto = getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+            if not (auto or field.has_default() or field.null):
+                raise CommandError(
+                    f'{model.__name__}.{field.name} has no default; generate a value for it in generate_fixtures.'
+                )
+            columns.append(field.column)
+            defaults.append(_default_value(field, now or timezone.now()))
+        self.defaults = tuple(defaults)
+        
+        quote = connection.ops.quote_name
+        self.target = f"{quote(model._meta.db_table)} ({', '.join(quote(column) for column in columns)})"
+        self.placeholders = ', '.join(['%s'] * len(columns))
+    
+    def write(self, rows):
+        if not rows:
+            return
+        if self.defaults:
+            rows = [row + self.defaults for row in rows]
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                data = ''.join('\t'.join(map(_copy_value, row)) + '\n' for row in rows)
+                _copy(cursor, f'COPY {self.target} FROM STDIN', data)
+            else:
+                cursor.executemany(f'INSERT INTO {self.target} VALUES ({self.placeholders})', rows)
+
+
+@contextmanager
+def suspend_auto_now(*models):
+    """Temporarily disable auto_now/auto_now_add so generated timestamps are kept."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+@contextmanager
+def deferred_indexes(*models):
+    """
+    On SQLite, drop the secondary indexes of ``models`` and recreate them on
+    exit: building an index over the loaded rows is much cheaper than
+    updating it row by row. Use inside a transaction, so that an error
+    rolls the DROPs back. Does nothing on other databases.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    yield
+    with connection.cursor() as cursor:
+        for _, sql in indexes:
+            cursor.execute(sql)
+
+
+def delete_generated(users):
+    """
+    Delete ``users`` with everything generated for them. Their tasks,
+    notifications, analytics and counters go in plain DELETEs first: the
+    ORM cascade would load every row and send its delete signals (live
+    events, unread counters, cache bumps) one at a time.
+    """
+    quote = connection.ops.quote_name
+    user_ids = list(users.values_list('id', flat=True))
+    with connection.cursor() as cursor:
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            owned = f"{quote('user_id')} IN ({', '.join(['%s'] * len(chunk))})"
+            cursor.execute(
+                f"DELETE FROM {quote(NotificationDelivery._meta.db_table)} WHERE {quote('notification_id')} IN "
+                f"(SELECT {quote('id')} FROM {quote(TaskNotification._meta.db_table)} WHERE {owned})",
+                chunk,
+            )
+            for model in (TaskNotification, Task, TaskAnalytics, NotificationCounter):
+                cursor.execute(f'DELETE FROM {quote(model._meta.db_table)} WHERE {owned}', chunk)
+    User.objects.filter(id__in=user_ids).delete()
+
+
+class FixtureGenerator:
+    """Seeded generator producing users and rows of tasks, notifications and analytics."""
+    
+    def __init__(self, seed, now, history_days=90, subtask_ratio=0.15, max_depth=3):
+        self.rng = random.Random(seed)
+        self.now = now
+        # Rows hold naive UTC datetimes as str() formats them, which is how Django stores
+        # them on SQLite and how PostgreSQL (Django connects in UTC) reads them
+        self.utc_now = now.astimezone(dt_timezone.utc).replace(tzinfo=None)
+        self.history_days = history_days
+        self.subtask_ratio = subtask_ratio
+        self.max_depth = max_depth
+        
+        self.priorities = _weighted(PRIORITY_WEIGHTS)
+        self.categories = _weighted(CATEGORY_WEIGHTS)
+        self.past_statuses = _weighted(PAST_STATUS_WEIGHTS)
+        self.future_statuses = _weighted(FUTURE_STATUS_WEIGHTS)
+        self.timezones = _weighted(TIMEZONES)
+        self.recurrence_patterns = [json.dumps(pattern) for pattern in RECURRENCE_PATTERNS]
+        self.titles = [f'{verb} {noun}' for verb in VERBS for noun in NOUNS]
+        
+        # Building timedeltas and formatting datetimes are most of the cost of a row: the
+        # offsets are built once, due dates (quarter hours within history_days of now,
+        # oldest first) are picked from a list and recurring datetimes formatted once (text)
+        self.hours = [timedelta(hours=hours) for hours in range(24 * max(21, history_days) + 1)]
+        hour = self.utc_now.replace(minute=0, second=0, microsecond=0)
+        quarters = 4 * 24 * history_days
+        self.due_dates = [hour + timedelta(minutes=15 * quarter) for quarter in range(-quarters, quarters + 4)]
+        self.texts = {}
+    
+    def uuid(self):
+        """
+        A UUID4 drawn from the seeded RNG, as the 32 hex digits UUIDField
+        stores on SQLite (PostgreSQL accepts them too).
+        """
+        return '%032x' % (self.rng.getrandbits(128) & UUID4_CLEAR | UUID4_SET)
+    
+    def pick(self, weighted):
+        """Weighted choice; much cheaper than ``Random.choices`` for a single draw."""
+        values, cum_weights = weighted
+        return values[bisect.bisect(cum_weights, self.rng.random() * cum_weights[-1])]
+    
+    def draw(self, values):
+        """Uniform choice; cheaper than ``Random.choice``, which draws random bits until they fit."""
+        return values[int(self.rng.random() * len(values))]
+    
+    def text(self, value):
+        """``str(value)``, cached; for datetimes that recur across rows."""
+        text = self.texts.get(value)
+        if text is None:
+            text = self.texts[value] = str(value)
+        return text
+    
+    def user(self, username, password_hash):
+        """Build an unsaved user."""
+        joined = self.now - timedelta(days=self.rng.randint(self.history_days, self.history_days * 4))
+        return User(
+            username=username,
+            email=f'{username}@example.com',
+            password=password_hash,
+            timezone=self.pick(self.timezones),
+            default_priority=self.pick(self.priorities),
+            date_joined=joined,
+            created_at=joined,
+            updated_at=joined,
+        )
+    
+    def tasks_for_user(self, user_id, category_ids, count):
+        """
+        Yield ``(task row, notification rows)`` pairs, in TASK_COLUMNS and
+        NOTIFICATION_COLUMNS order; parents always come before their subtasks.
+        """
+        # One iteration per generated task, so everything it calls is bound locally
+        random = self.rng.random
+        gauss = self.rng.gauss
+        pick = self.pick
+        draw = self.draw
+        text = self.text
+        uuid = self.uuid
+        now = self.utc_now
+        hours = self.hours
+        due_dates = self.due_dates
+        history_days = self.history_days
+        now_hours = (now - due_dates[0]) / hours[1]  # due_dates index / 4 of now
+        two_days = timedelta(days=2)
+        depths = []  # (task id, depth) of tasks that can still take subtasks
+        
+        for _ in range(count):
+            priority = pick(self.priorities)
+            
+            # Due dates cluster around now: most within a couple of weeks, a long tail either side
+            due_date = None
+            if random() >= 0.1:
+                offset = max(-history_days, min(history_days, gauss(2, 10)))
+                due_date = due_dates[4 * int(now_hours + 24 * offset) + int(random() * 4)]
+            
+            if due_date is not None and due_date < now:
+                status = pick(self.past_statuses)
+                created_at = due_date - hours[1 + int(random() * 24 * 21)]
+            else:
+                status = pick(self.future_statuses)
+                created_at = now - hours[1 + int(random() * 24 * history_days)]
+            
+            parent_id = None
+            depth = 0
+            if depths and random() < self.subtask_ratio:
+                parent_id, parent_depth = draw(depths[-50:])
+                depth = parent_depth + 1
+            
+            completed_at = None
+            actual_duration = None
+            progress = 0
+            estimated_duration = draw(DURATIONS)
+            if status == 'completed':
+                latest = min(now, (due_date or now) + two_days)
+                span = max(0, int((latest - created_at).total_seconds()))
+                completed_at = created_at + timedelta(0, int(random() * (span + 1)))
+                progress = 100
+                if estimated_duration:
+                    actual_duration = max(5, int(gauss(estimated_duration, estimated_duration / 3)))
+            elif status == 'in_progress':
+                progress = (1 + int(random() * 9)) * 10
+            
+            reminder_time = None
+            if due_date is not None and random() < 0.4:
+                reminder_time = due_date - draw(REMINDER_OFFSETS)
+            
+            is_recurring = random() < 0.08
+            tag_count = int(-math.log(1.0 - random()))  # Exponential, mean 1
+            tags = json.dumps(self.rng.sample(TAGS, k=min(len(TAGS), tag_count))) if tag_count else '[]'
+            snooze_count = int(-math.log(1.0 - random()) / 1.5) if reminder_time else 0
+            
+            task_id = uuid()
+            title = draw(self.titles)
+            notification_enabled = random() < 0.85
+            created = text(created_at)
+            completed = None if completed_at is None else str(completed_at)
+            reminder = None if reminder_time is None else text(reminder_time)
+            yield (
+                task_id,
+                title,
+                '' if random() < 0.5 else 'Generated load-test task.',
+                user_id,
+                category_ids[pick(self.categories)] if random() < 0.85 else None,
+                priority,
+                status,
+                created,
+                completed or created,
+                None if due_date is None else text(due_date),
+                completed,
+                reminder,
+                estimated_duration,
+                actual_duration,
+                is_recurring,
+                draw(self.recurrence_patterns) if is_recurring else '{}',
+                tags,
+                notification_enabled,
+                reminder_time is not None and reminder_time < now,
+                snooze_count,
+                reminder if snooze_count else None,
+                progress,
+                parent_id,
+                False,
+                None,
+            ), (
+                self.notifications_for(task_id, user_id, title, status, due_date, reminder_time, completed_at)
+                if notification_enabled and due_date is not None else ()
+            )
+            if depth < self.max_depth:
+                depths.append((task_id, depth))
+    
+    def notifications_for(self, task_id, user_id, title, status, due_date, reminder_time, completed_at):
+        """Notification rows a task would have accumulated by now."""
+        now = self.utc_now
+        notifications = []
+        if reminder_time and reminder_time < now:
+            notifications.append(('reminder', f'Reminder: {title}', self.text(reminder_time)))
+        if due_date < now and status in ('pending', 'in_progress', 'overdue'):
+            notifications.append(('overdue', f'Task "{title}" is overdue', self.text(due_date)))
+        elif due_date - self.hours[24] < now and status != 'completed':
+            notifications.append(('due_soon', f'Task "{title}" is due soon', self.text(due_date - self.hours[24])))
+        if completed_at:
+            notifications.append(('completed', f'Task "{title}" completed', str(completed_at)))
+        
+        random = self.rng.random
+        return [
+            (task_id, user_id, kind, message, sent_at, random() < 0.6, self.draw(ACTIONS))
+            for kind, message, sent_at in notifications
+        ]
+    
+    def analytics_for_user(self, user_id, tasks_per_user):
+        """One analytics row per day of history with Poisson-like daily counts, in ANALYTICS_COLUMNS order."""
+        rng = self.rng
+        daily_rate = max(1.0, tasks_per_user / max(1, self.history_days))
+        today = self.now.date()
+        rows = []
+        for offset in range(self.history_days):
+            created = int(rng.gauss(daily_rate, daily_rate ** 0.5))
+            created = max(0, created)
+            completed = min(created, max(0, int(created * rng.uniform(0.4, 0.9))))
+            overdue = max(0, int(rng.expovariate(1.0 / max(1.0, daily_rate * 0.1))))
+            total_duration = completed * rng.randint(20, 90)
+            distribution = {}
+            for _ in range(created):
+                priority = self.pick(self.priorities)
+                distribution[priority] = distribution.get(priority, 0) + 1
+            rows.append((
+                user_id,
+                str(today - timedelta(days=offset)),
+                created,
+                completed,
+                overdue,
+                total_duration,
+                (completed / created * 100) if created else 0.0,
+                (total_duration / completed) if completed else 0.0,
+                json.dumps(distribution),
+            ))
+        return rows
+
+
+class Command(BaseCommand):
+    help = 'Generate N users x M tasks of realistic, reproducible load-test data using bulk inserts.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='Number of users to create')
+        parser.add_argument('--tasks-per-user', type=int, default=100, help='Tasks to create for each user')
+        parser.add_argument('--seed', type=int, default=42, help='RNG seed; the same seed yields the same data')
+        parser.add_argument('--history-days', type=int, default=90, help='Days of analytics and task history')
+        parser.add_argument('--subtask-ratio', type=float, default=0.15, help='Fraction of tasks that are subtasks')
+        parser.add_argument('--max-depth', type=int, default=3, help='Maximum subtask nesting depth')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per INSERT or COPY')
+        parser.add_argument('--prefix', default='loaduser', help='Username prefix for generated users')
+        parser.add_argument('--password', default='loadtest123', help='Password shared by all generated users')
+        parser.add_argument(
+            '--flush', action='store_true',
+            help='Delete previously generated users (and their data) with the same prefix first'
+        )
+    
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        batch_size = options['batch_size']
+        existing = User.objects.filter(username__startswith=prefix)
+        if existing.exists():
+            if not options['flush']:
+                raise CommandError(
+                    f'Users with prefix "{prefix}" already exist; use --flush or a different --prefix.'
+                )
+            self.stdout.write(f'Deleting existing "{prefix}*" users...')
+            with transaction.atomic():
+                delete_generated(existing)
+        
+        # Mixing the prefix into the seed keeps task UUIDs distinct between prefixes.
+        generator = FixtureGenerator(
+            seed=f"{prefix}:{options['seed']}",
+            now=timezone.now(),
+            history_days=options['history_days'],
+            subtask_ratio=options['subtask_ratio'],
+            max_depth=options['max_depth'],
+        )
+        started = time.monotonic()
+        
+        category_ids = {}
+        for data in CATEGORIES:
+            category, _ = Category.objects.get_or_create(name=data['name'], defaults=data)
+            category_ids[category.name] = category.id
+        
+        # Hashing is deliberately slow, so every generated user shares one hash.
+        password_hash = make_password(options['password'])
+        usernames = [f'{prefix}{i:06d}' for i in range(options['users'])]
+        
+        # Foreign keys are checked once at the end, as loaddata does, instead of per row
+        # (SQLite can only switch the checks off outside a transaction)
+        tables = [model._meta.db_table for model in (Task, TaskNotification, TaskAnalytics)]
+        with suspend_auto_now(User), connection.constraint_checks_disabled(), transaction.atomic():
+            User.objects.bulk_create(
+                [generator.user(name, password_hash) for name in usernames],
+                batch_size=batch_size,
+            )
+            user_ids = list(
+                User.objects.filter(username__in=usernames).order_by('username').values_list('id', flat=True)
+            )
+            
+            with deferred_indexes(Task, TaskNotification):
+                task_count, notification_count = self._create_tasks(
+                    generator, user_ids, category_ids, options['tasks_per_user'], batch_size
+                )
+            for start in range(0, len(user_ids), 500):
+                recount_unread(user_ids[start:start + 500])
+            
+            writer = RowWriter(TaskAnalytics, ANALYTICS_COLUMNS, generator.now)
+            analytics = []
+            analytics_count = 0
+            for user_id in user_ids:
+                analytics.extend(generator.analytics_for_user(user_id, options['tasks_per_user']))
+                if len(analytics) >= batch_size:
+                    writer.write(analytics)
+                    analytics_count += len(analytics)
+                    analytics = []
+            writer.write(analytics)
+            analytics_count += len(analytics)
+            connection.check_constraints(table_names=tables)
+        
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(user_ids)} users, {task_count} tasks, {notification_count} notifications '
+            f'and {analytics_count} analytics rows in {elapsed:.1f}s'
+        ))
+    
+    def _create_tasks(self, generator, user_ids, category_ids, tasks_per_user, batch_size):
+        """Stream tasks into the database in batches, inserting notifications after their tasks."""
+        task_writer = RowWriter(Task, TASK_COLUMNS, generator.now)
+        notification_writer = RowWriter(TaskNotification, NOTIFICATION_COLUMNS, generator.now)
+        tasks = []
+        notifications = []
+        task_count = 0
+        notification_count = 0
+        
+        for index, user_id in enumerate(user_ids, start=1):
+            for task, task_notifications in generator.tasks_for_user(user_id, category_ids, tasks_per_user):
+                tasks.append(task)
+                notifications.extend(task_notifications)
+                if len(tasks) >= batch_size:
+                    task_writer.write(tasks)
+                    notification_writer.write(notifications)
+                    task_count += len(tasks)
+                    notification_count += len(notifications)
+                    tasks = []
+                    notifications = []
+            if index % 100 == 0:
+                self.stdout.write(f'  {index}/{len(user_ids)} users generated')
+        
+        task_writer.write(tasks)
+        notification_writer.write(notifications)
+        return task_count + len(tasks), notification_count + len(notifications)
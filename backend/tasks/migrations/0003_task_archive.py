@@ -0,0 +1,89 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:18
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('notification_type', models.CharField(choices=[('reminder', 'Reminder'), ('overdue', 'Overdue'), ('due_soon', 'Due Soon'), ('completed', 'Completed')], max_length=20)),
+                ('message', models.TextField()),
+                ('sent_at', models.DateTimeField()),
+                ('is_read', models.BooleanField(default=False)),
+                ('action_taken', models.CharField(blank=True, max_length=50)),
+            ],
+            options={
+                'ordering': ['-sent_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField(blank=True)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled'), ('overdue', 'Overdue')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('reminder_time', models.DateTimeField(blank=True, null=True)),
+                ('estimated_duration', models.PositiveIntegerField(blank=True, null=True)),
+                ('actual_duration', models.PositiveIntegerField(blank=True, null=True)),
+                ('is_recurring', models.BooleanField(default=False)),
+                ('recurrence_pattern', models.JSONField(blank=True, default=dict)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('notification_enabled', models.BooleanField(default=True)),
+                ('notification_sent', models.BooleanField(default=False)),
+                ('snooze_count', models.PositiveIntegerField(default=0)),
+                ('last_snoozed', models.DateTimeField(blank=True, null=True)),
+                ('progress', models.PositiveIntegerField(default=0)),
+                ('parent_task_id', models.UUIDField(blank=True, db_index=True, null=True)),
+                ('is_synced', models.BooleanField(default=False)),
+                ('last_synced', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-completed_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['status', 'updated_at'], name='tasks_task_status_2dc0fe_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tasks.category'),
+        ),
+        migrations.AddField(
+            model_name='archivedtask',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_tasks', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='task',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='tasks.archivedtask'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'created_at'], name='tasks_archi_user_id_a9d0b6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'completed_at'], name='tasks_archi_user_id_a1418e_idx'),
+        ),
+    ]
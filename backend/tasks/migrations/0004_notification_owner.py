@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_owner(apps, schema_editor):
+    TaskNotification = apps.get_model('tasks', 'TaskNotification')
+    Task = apps.get_model('tasks', 'Task')
+    TaskNotification.objects.filter(user__isnull=True).update(
+        user=models.Subquery(Task.objects.filter(pk=models.OuterRef('task_id')).values('user_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0003_task_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasknotification',
+            name='user',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(backfill_owner, migrations.RunPython.noop),
+    ]
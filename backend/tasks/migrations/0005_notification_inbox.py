@@ -0,0 +1,50 @@
+# Generated by Django 4.2.7 on 2026-10-19 04:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def count_unread(apps, schema_editor):
+    TaskNotification = apps.get_model('tasks', 'TaskNotification')
+    NotificationCounter = apps.get_model('tasks', 'NotificationCounter')
+    NotificationCounter.objects.bulk_create(
+        [
+            NotificationCounter(user_id=row['user_id'], unread=row['unread'])
+            for row in TaskNotification.objects.filter(is_read=False).order_by()
+            .values('user_id').annotate(unread=models.Count('id'))
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('tasks', '0004_notification_owner'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='tasknotification',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='NotificationCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='tasknotification',
+            index=models.Index(fields=['user', '-sent_at', '-id'], name='tasks_notif_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasknotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', '-sent_at'], name='tasks_notif_unread_idx'),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-19 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_push_delivery'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskanalytics',
+            index=models.Index(fields=['date'], name='tasks_taska_date_5accca_idx'),
+        ),
+    ]
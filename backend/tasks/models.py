@@ -1,9 +1,14 @@
 from django.db import models
+from django.db.models import Case, IntegerField, Value, When
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
+from datetime import timedelta
 import uuid
 
+from . import derived
+from .derived import DUE_SCORES, IN_PROGRESS_SCORE, OVERDUE_SCORE, PRIORITY_SCORES
+
 User = get_user_model()
 
 
@@ -23,6 +28,38 @@ class Category(models.Model):
         return self.name
 
 
+class TaskQuerySet(models.QuerySet):
+    """QuerySet for Task with database-side versions of computed properties."""
+    
+    def open(self):
+        """Tasks that still need doing."""
+        return self.filter(status__in=Task.OPEN_STATUSES)
+    
+    def with_urgency_score(self, now=None):
+        """
+        Annotate ``urgency``, the SQL equivalent of ``Task.urgency_score``,
+        so task lists can be ordered by it in the database.
+        """
+        now = now or timezone.now()
+        priority_score = Case(
+            *[When(priority=priority, then=Value(score)) for priority, score in PRIORITY_SCORES.items()],
+            default=Value(0),
+        )
+        due_score = Case(
+            When(due_date__isnull=True, then=Value(0)),
+            When(due_date__lt=now, then=Value(OVERDUE_SCORE)),
+            *[
+                When(due_date__lt=now + timedelta(seconds=bound), then=Value(score))
+                for bound, score in DUE_SCORES
+            ],
+            default=Value(0),
+        )
+        status_score = Case(When(status='in_progress', then=Value(IN_PROGRESS_SCORE)), default=Value(0))
+        return self.annotate(urgency=models.ExpressionWrapper(
+            priority_score + due_score + status_score, output_field=IntegerField()
+        ))
+
+
 class Task(models.Model):
     """Task model with intelligent features."""
     
@@ -41,6 +78,8 @@ class Task(models.Model):
         ('overdue', 'Overdue'),
     ]
     
+    OPEN_STATUSES = ['pending', 'in_progress', 'overdue']
+    
     # Basic fields
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     title = models.CharField(max_length=200)
@@ -100,6 +139,8 @@ class Task(models.Model):
     is_synced = models.BooleanField(default=False)
     last_synced = models.DateTimeField(null=True, blank=True)
     
+    objects = TaskQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-priority', 'due_date', 'created_at']
         indexes = [
@@ -107,11 +148,19 @@ class Task(models.Model):
             models.Index(fields=['user', 'due_date']),
             models.Index(fields=['user', 'priority']),
             models.Index(fields=['due_date']),
+            models.Index(fields=['status', 'updated_at']),  # archive candidates
         ]
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded values so save() can tell which fields changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = (field_names, values)
+        return instance
+    
     def save(self, *args, **kwargs):
         """Override save to handle status updates and smart features."""
         # Update status based on due date
@@ -123,41 +172,35 @@ class Task(models.Model):
         if self.status == 'completed' and not self.completed_at:
             self.completed_at = timezone.now()
         
+        self.changed_fields = self._changed_fields()
         super().save(*args, **kwargs)
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None:
+            self._loaded_values = (loaded[0], [getattr(self, name) for name in loaded[0]])
+    
+    def _changed_fields(self):
+        """
+        Names of the fields that differ from the loaded values (live change
+        events, see tasks.live); None for instances not loaded from the database.
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or self._state.adding:
+            return None
+        return [
+            self._meta.get_field(attname).name
+            for attname, value in zip(*loaded)
+            if attname != 'updated_at' and getattr(self, attname) != value
+        ]
     
     @property
     def is_overdue(self):
         """Check if task is overdue."""
-        if self.due_date and self.status in ['pending', 'in_progress']:
-            return timezone.now() > self.due_date
-        return False
+        return derived.is_overdue(self.status, self.due_date, timezone.now())
     
     @property
     def urgency_score(self):
         """Calculate urgency score for smart prioritization."""
-        score = 0
-        
-        # Priority score
-        priority_scores = {'low': 1, 'medium': 2, 'high': 3, 'urgent': 4}
-        score += priority_scores.get(self.priority, 0) * 10
-        
-        # Due date urgency
-        if self.due_date:
-            time_until_due = (self.due_date - timezone.now()).total_seconds()
-            if time_until_due < 0:  # Overdue
-                score += 50
-            elif time_until_due < 3600:  # Less than 1 hour
-                score += 40
-            elif time_until_due < 86400:  # Less than 1 day
-                score += 30
-            elif time_until_due < 604800:  # Less than 1 week
-                score += 20
-        
-        # Status score
-        if self.status == 'in_progress':
-            score += 5
-        
-        return score
+        return derived.urgency_score(self.priority, self.status, self.due_date, timezone.now())
     
     def get_remaining_time(self):
         """Get remaining time until due date."""
@@ -201,6 +244,8 @@ class TaskNotification(models.Model):
     ]
     
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notifications')
+    # Denormalized task owner, so the inbox needs no join through Task
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', db_index=False)
     notification_type = models.CharField(max_length=20, choices=NOTIFICATION_TYPES)
     message = models.TextField()
     sent_at = models.DateTimeField(auto_now_add=True)
@@ -209,9 +254,95 @@ class TaskNotification(models.Model):
     
     class Meta:
         ordering = ['-sent_at']
+        indexes = [
+            models.Index(fields=['user', '-sent_at', '-id'], name='tasks_notif_inbox_idx'),
+            models.Index(
+                fields=['user', '-sent_at'], condition=models.Q(is_read=False), name='tasks_notif_unread_idx'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.task.title} - {self.notification_type}"
+    
+    def save(self, *args, **kwargs):
+        if self.user_id is None and self.task_id is not None:
+            self.user_id = self.task.user_id
+        super().save(*args, **kwargs)
+
+
+class NotificationCounter(models.Model):
+    """
+    Per-user count of unread notifications, kept up to date by
+    tasks.signals and the inbox endpoints (tasks.notifications).
+    """
+    
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    unread = models.PositiveIntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
+
+
+class Device(models.Model):
+    """A user's device registered for push notifications."""
+    
+    PLATFORM_CHOICES = [
+        ('ios', 'iOS'),
+        ('android', 'Android'),
+        ('web', 'Web'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='devices')
+    platform = models.CharField(max_length=10, choices=PLATFORM_CHOICES)
+    token = models.CharField(max_length=255, unique=True)  # Push provider's registration token
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'is_active']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} - {self.platform}"
+
+
+class NotificationDelivery(models.Model):
+    """
+    Outbox row for pushing one notification to one device (tasks.push).
+    Pending rows are retried with backoff until sent or dead-lettered.
+    """
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    ]
+    
+    notification = models.ForeignKey(TaskNotification, on_delete=models.CASCADE, related_name='deliveries')
+    device = models.ForeignKey(Device, on_delete=models.CASCADE, related_name='deliveries')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    # When the row is next due; claiming a row pushes it out by the lease
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    class Meta:
+        verbose_name_plural = 'Notification deliveries'
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'device'], name='tasks_delivery_unique'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at', 'device'], condition=models.Q(status='pending'),
+                name='tasks_delivery_due_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.notification_id} -> {self.device_id} ({self.status})"
 
 
 class TaskAnalytics(models.Model):
@@ -234,6 +365,81 @@ class TaskAnalytics(models.Model):
     class Meta:
         unique_together = ['user', 'date']
         ordering = ['-date']
+        indexes = [
+            models.Index(fields=['date']),  # admin date hierarchy, roll-up of a day
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.date}"
+
+
+class ArchivedTask(models.Model):
+    """
+    Completed or cancelled task moved out of Task by tasks.archive, so the
+    live table and its per-user indexes only hold recent tasks.
+    """
+    
+    id = models.UUIDField(primary_key=True, editable=False)
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks')
+    
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    priority = models.CharField(max_length=20, choices=Task.PRIORITY_CHOICES)
+    status = models.CharField(max_length=20, choices=Task.STATUS_CHOICES)
+    
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    due_date = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    reminder_time = models.DateTimeField(null=True, blank=True)
+    
+    estimated_duration = models.PositiveIntegerField(null=True, blank=True)
+    actual_duration = models.PositiveIntegerField(null=True, blank=True)
+    
+    is_recurring = models.BooleanField(default=False)
+    recurrence_pattern = models.JSONField(default=dict, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    
+    notification_enabled = models.BooleanField(default=True)
+    notification_sent = models.BooleanField(default=False)
+    snooze_count = models.PositiveIntegerField(default=0)
+    last_snoozed = models.DateTimeField(null=True, blank=True)
+    
+    progress = models.PositiveIntegerField(default=0)
+    
+    # Not a foreign key: the parent may be live, archived or restored later
+    parent_task_id = models.UUIDField(null=True, blank=True, db_index=True)
+    
+    is_synced = models.BooleanField(default=False)
+    last_synced = models.DateTimeField(null=True, blank=True)
+    
+    archived_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-completed_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['user', 'completed_at']),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.date}" 
\ No newline at end of file
+        return f"{self.title} (archived)"
+
+
+class ArchivedNotification(models.Model):
+    """Notification of an archived task; keeps the original TaskNotification id."""
+    
+    id = models.BigIntegerField(primary_key=True)
+    task = models.ForeignKey(ArchivedTask, on_delete=models.CASCADE, related_name='notifications')
+    notification_type = models.CharField(max_length=20, choices=TaskNotification.NOTIFICATION_TYPES)
+    message = models.TextField()
+    sent_at = models.DateTimeField()
+    is_read = models.BooleanField(default=False)
+    action_taken = models.CharField(max_length=50, blank=True)
+    
+    class Meta:
+        ordering = ['-sent_at']
+    
+    def __str__(self):
+        return f"{self.task.title} - {self.notification_type}"
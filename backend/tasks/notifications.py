@@ -0,0 +1,87 @@
+"""
+Notification inbox: the per-user unread counter and bulk updates.
+
+TaskNotification stores its owner, so a user's inbox is a range scan of
+``(user, sent_at)`` and unread notifications have their own partial
+index. NotificationCounter keeps the unread count so the app badge is a
+primary key lookup: single saves and deletes adjust it through
+tasks.signals, bulk updates here adjust it by the number of rows they
+changed, and anything else recounts from the partial index.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+
+from .models import NotificationCounter, Task, TaskNotification
+
+# Actions a user can take from the inbox; complete and snooze also apply to the task
+ACTIONS = ['dismiss', 'snooze', 'complete', 'reschedule']
+
+
+def recount_unread(user_ids):
+    """Recompute the unread counters of ``user_ids`` from the notifications."""
+    user_ids = list(user_ids)
+    counts = dict(
+        TaskNotification.objects.filter(user_id__in=user_ids, is_read=False)
+        .order_by().values('user_id').annotate(unread=Count('id')).values_list('user_id', 'unread')
+    )
+    NotificationCounter.objects.bulk_create(
+        [NotificationCounter(user_id=user_id, unread=counts.get(user_id, 0)) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['unread'],
+    )
+    return counts
+
+
+def adjust_unread(user_id, delta):
+    """Add ``delta`` to the user's unread counter, creating it by counting if missing."""
+    updated = NotificationCounter.objects.filter(user_id=user_id).update(
+        unread=Greatest(F('unread') + delta, 0)
+    )
+    if not updated:
+        recount_unread([user_id])
+
+
+def unread_count(user_id):
+    counter = NotificationCounter.objects.filter(user_id=user_id).values_list('unread', flat=True).first()
+    if counter is None:
+        counter = recount_unread([user_id]).get(user_id, 0)
+    return counter
+
+
+def mark_read(user, ids=None):
+    """Mark the user's notifications ``ids`` (all if None) read. Returns how many changed."""
+    notifications = TaskNotification.objects.filter(user=user, is_read=False)
+    if ids is not None:
+        notifications = notifications.filter(id__in=ids)
+    with transaction.atomic():
+        updated = notifications.update(is_read=True)
+        if updated:
+            adjust_unread(user.pk, -updated)
+    return updated
+
+
+def take_action(user, ids, action, hours=1):
+    """
+    Record ``action`` on the user's notifications ``ids`` and mark them
+    read; ``complete`` completes their tasks and ``snooze`` snoozes them
+    for ``hours``. Returns the number of notifications updated.
+    """
+    notifications = TaskNotification.objects.filter(user=user, id__in=ids)
+    with transaction.atomic():
+        newly_read = notifications.filter(is_read=False).update(is_read=True)
+        updated = notifications.update(action_taken=action)
+        if newly_read:
+            adjust_unread(user.pk, -newly_read)
+
+        if action in ('complete', 'snooze'):
+            tasks = Task.objects.filter(user=user, id__in=notifications.values('task_id'))
+            if action == 'complete':
+                for task in tasks.exclude(status='completed'):
+                    task.mark_completed()
+            else:
+                for task in tasks:
+                    task.snooze_task(hours=hours)
+    return updated
@@ -0,0 +1,308 @@
+"""
+Batched push delivery of task notifications.
+
+Creating a notification queues a NotificationDelivery row for each of the
+owner's active devices (tasks.signals). ``python manage.py
+deliver_notifications`` runs the Dispatcher. Each round claims up to
+``CLAIM_SIZE`` due deliveries. It groups them per device into batches of
+``BATCH_SIZE`` messages and hands the batches to the transport on at most
+``CONCURRENCY`` threads. Claimed rows are leased for ``LEASE`` seconds,
+so several dispatchers can run side by side and a crashed one only delays
+its rows.
+
+A failed delivery is retried after an exponential backoff with jitter.
+After ``MAX_ATTEMPTS`` attempts it is dead-lettered (status ``dead``) and
+can be requeued from the admin or with ``deliver_notifications
+--requeue-dead``.
+
+Transports are pluggable through ``PUSH_DELIVERY['TRANSPORT']``. Any class
+that takes the settings dict and provides ``send(device, messages)`` works.
+``send`` returns a ``{delivery id: error}`` dict of the messages that
+failed (empty when all went through). It raises DeliveryError when the
+whole batch failed, and DeviceGone when the provider no longer knows the
+device.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from taskmaster.conf import settings_getter
+
+from .models import Device, NotificationDelivery
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'TRANSPORT': 'tasks.push.LogTransport',
+    'OPTIONS': {},  # Passed to the transport, e.g. {'URL': ...} for WebhookTransport
+    'CLAIM_SIZE': 1000,  # Deliveries claimed per round
+    'BATCH_SIZE': 100,  # Messages per transport call (one device)
+    'CONCURRENCY': 8,  # Transport calls in flight
+    'LEASE': 60,  # Seconds a claimed delivery is hidden from other dispatchers
+    'MAX_ATTEMPTS': 6,
+    'BACKOFF_BASE': 2,  # Seconds before the first retry, doubling per attempt
+    'BACKOFF_MAX': 3600,
+    'POLL_INTERVAL': 1,  # Seconds to wait when nothing is due
+}
+
+
+get_push_settings = settings_getter('PUSH_DELIVERY', DEFAULTS)
+
+
+class DeliveryError(Exception):
+    """A whole batch could not be delivered; its messages are retried."""
+
+
+class DeviceGone(DeliveryError):
+    """The provider rejected the device token; the device is deactivated."""
+
+
+def queue_deliveries(notifications):
+    """Queue a delivery of each unread notification to its owner's active devices."""
+    by_user = defaultdict(list)
+    for notification in notifications:
+        if not notification.is_read:
+            by_user[notification.user_id].append(notification.pk)
+    if not by_user:
+        return 0
+    
+    deliveries = [
+        NotificationDelivery(notification_id=notification_id, device_id=device_id)
+        for device_id, user_id in Device.objects.filter(user_id__in=list(by_user), is_active=True)
+        .values_list('id', 'user_id')
+        for notification_id in by_user[user_id]
+    ]
+    NotificationDelivery.objects.bulk_create(deliveries, ignore_conflicts=True, batch_size=1000)
+    return len(deliveries)
+
+
+def requeue_dead(ids=None):
+    """Make dead-lettered deliveries (``ids``, all if None) due again. Returns how many."""
+    deliveries = NotificationDelivery.objects.filter(status='dead', device__is_active=True)
+    if ids is not None:
+        deliveries = deliveries.filter(id__in=ids)
+    return deliveries.update(status='pending', attempts=0, next_attempt_at=timezone.now())
+
+
+def message(delivery):
+    """Compact push payload of a claimed delivery."""
+    notification = delivery.notification
+    return {
+        'id': delivery.pk,
+        'notification': notification.pk,
+        'type': notification.notification_type,
+        'task': str(notification.task_id),
+        'body': notification.message,
+    }
+
+
+class Dispatcher:
+    """Claims due deliveries and pushes them through the transport in batches."""
+    
+    def __init__(self, config=None, transport=None):
+        self.config = config or get_push_settings()
+        self.transport = transport or import_string(self.config['TRANSPORT'])(self.config)
+        self.executor = ThreadPoolExecutor(max_workers=self.config['CONCURRENCY'], thread_name_prefix='push')
+        self.rng = random.Random()
+    
+    def close(self):
+        self.executor.shutdown()
+    
+    def backoff(self, attempts):
+        """Seconds to wait before retrying after ``attempts`` tries, with jitter."""
+        delay = min(self.config['BACKOFF_MAX'], self.config['BACKOFF_BASE'] * 2 ** (attempts - 1))
+        # Equal jitter: keeps half the delay, spreads the other half so bursts don't retry in lockstep
+        return delay / 2 + self.rng.uniform(0, delay / 2)
+    
+    def claim(self, now):
+        """Lease up to CLAIM_SIZE due deliveries and return them with their device and notification."""
+        with transaction.atomic():
+            # Device order keeps each device's deliveries together, for fuller batches
+            due = NotificationDelivery.objects.filter(status='pending', next_attempt_at__lte=now).order_by(
+                'next_attempt_at', 'device_id'
+            )
+            # Elsewhere the write transaction serializes dispatchers (BEGIN IMMEDIATE on SQLite)
+            if connections[due.db].features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            ids = list(due.values_list('id', flat=True)[:self.config['CLAIM_SIZE']])
+            if not ids:
+                return []
+            NotificationDelivery.objects.filter(id__in=ids).update(
+                next_attempt_at=now + timedelta(seconds=self.config['LEASE']),
+                attempts=F('attempts') + 1,
+            )
+        return list(
+            NotificationDelivery.objects.filter(id__in=ids).select_related('device', 'notification').only(
+                'id', 'attempts', 'device__id', 'device__platform', 'device__token',
+                'notification__id', 'notification__task_id', 'notification__notification_type',
+                'notification__message',
+            )
+        )
+    
+    def batches(self, deliveries):
+        """Split deliveries into per-device batches of at most BATCH_SIZE."""
+        by_device = defaultdict(list)
+        for delivery in deliveries:
+            by_device[delivery.device_id].append(delivery)
+        size = self.config['BATCH_SIZE']
+        for device_deliveries in by_device.values():
+            for start in range(0, len(device_deliveries), size):
+                yield device_deliveries[start:start + size]
+    
+    def send(self, batch):
+        device = batch[0].device
+        return self.transport.send(device, [message(delivery) for delivery in batch]) or {}
+    
+    def run_once(self, now=None):
+        """Claim and deliver one round. Returns counts of sent, retried and dead deliveries."""
+        now = now or timezone.now()
+        deliveries = self.claim(now)
+        sent, retry, dead, gone = [], [], [], set()
+        futures = {self.executor.submit(self.send, batch): batch for batch in self.batches(deliveries)}
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                failed = future.result()
+            except DeviceGone as e:
+                gone.add(batch[0].device_id)
+                for delivery in batch:
+                    delivery.last_error = str(e) or 'Device unregistered'
+                    dead.append(delivery)
+                continue
+            except Exception as e:  # Network errors and transport bugs are retried like DeliveryError
+                logger.warning('Push batch to device %s failed: %r', batch[0].device_id, e)
+                failed = {delivery.pk: str(e) or type(e).__name__ for delivery in batch}
+            
+            for delivery in batch:
+                if delivery.pk not in failed:
+                    sent.append(delivery.pk)
+                    continue
+                delivery.last_error = failed[delivery.pk]
+                if delivery.attempts >= self.config['MAX_ATTEMPTS']:
+                    dead.append(delivery)
+                else:
+                    delivery.next_attempt_at = now + timedelta(seconds=self.backoff(delivery.attempts))
+                    retry.append(delivery)
+        
+        self.record(now, sent, retry, dead, gone)
+        return {'claimed': len(deliveries), 'sent': len(sent), 'retried': len(retry), 'dead': len(dead)}
+    
+    def record(self, now, sent, retry, dead, gone):
+        with transaction.atomic():
+            if sent:
+                NotificationDelivery.objects.filter(id__in=sent).update(status='sent', sent_at=now, last_error='')
+            if retry:
+                NotificationDelivery.objects.bulk_update(retry, ['next_attempt_at', 'last_error'], batch_size=500)
+            if dead:
+                for delivery in dead:
+                    delivery.status = 'dead'
+                NotificationDelivery.objects.bulk_update(dead, ['status', 'last_error'], batch_size=500)
+            if gone:
+                Device.objects.filter(id__in=gone).update(is_active=False)
+                NotificationDelivery.objects.filter(device_id__in=gone, status='pending').update(
+                    status='dead', last_error='Device unregistered'
+                )
+    
+    def run(self, until_idle=False, stop=None):
+        """
+        Deliver rounds until ``stop`` (a threading.Event) is set, or until
+        nothing is due when ``until_idle``. Returns the summed counts.
+        """
+        totals = defaultdict(int)
+        while stop is None or not stop.is_set():
+            counts = self.run_once()
+            for key, value in counts.items():
+                totals[key] += value
+            if counts['claimed'] < self.config['CLAIM_SIZE']:
+                if until_idle and not counts['claimed']:
+                    break
+                if not until_idle:
+                    time.sleep(self.config['POLL_INTERVAL'])
+        return dict(totals)
+
+
+class LogTransport:
+    """Development transport: logs each batch and reports it delivered."""
+    
+    def __init__(self, config):
+        pass
+    
+    def send(self, device, messages):
+        logger.info('Push %d message(s) to %s device %s', len(messages), device.platform, device.pk)
+        return {}
+
+
+class WebhookTransport:
+    """
+    POSTs each batch as JSON to ``OPTIONS['URL']`` (e.g. a push gateway),
+    ``{"device": {...}, "messages": [...]}``. 404/410 means the device is
+    gone, other errors retry the batch, and a ``{"failed": {id: error}}``
+    response body retries individual messages.
+    """
+    
+    def __init__(self, config):
+        options = config['OPTIONS']
+        self.url = options['URL']
+        self.timeout = options.get('TIMEOUT', 10)
+        self.headers = {'Content-Type': 'application/json', **options.get('HEADERS', {})}
+    
+    def send(self, device, messages):
+        body = json.dumps({
+            'device': {'platform': device.platform, 'token': device.token},
+            'messages': messages,
+        }).encode()
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                content = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code in (404, 410):
+                raise DeviceGone(f'HTTP {e.code}')
+            raise DeliveryError(f'HTTP {e.code}')
+        except (urllib.error.URLError, TimeoutError) as e:
+            raise DeliveryError(str(e))
+        failed = json.loads(content or b'{}').get('failed') or {}
+        return {int(delivery_id): error for delivery_id, error in failed.items()}
+
+
+class FakeTransport:
+    """
+    Offline transport for load tests (``bench_push``). Each batch takes
+    ``OPTIONS['LATENCY']`` seconds, each message fails with probability
+    ``FAILURE_RATE`` and each batch hits an unknown device with probability
+    ``GONE_RATE``. Delivered messages are counted in ``delivered``.
+    """
+    
+    def __init__(self, config):
+        options = config['OPTIONS']
+        self.latency = options.get('LATENCY', 0.0)
+        self.failure_rate = options.get('FAILURE_RATE', 0.0)
+        self.gone_rate = options.get('GONE_RATE', 0.0)
+        self.rng = random.Random(options.get('SEED'))
+        self.lock = threading.Lock()
+        self.batches = 0
+        self.delivered = 0
+    
+    def send(self, device, messages):
+        if self.latency:
+            time.sleep(self.latency)
+        with self.lock:
+            self.batches += 1
+            if self.rng.random() < self.gone_rate:
+                raise DeviceGone('Unregistered')
+            failed = {item['id']: 'Unavailable' for item in messages if self.rng.random() < self.failure_rate}
+            self.delivered += len(messages) - len(failed)
+        return failed
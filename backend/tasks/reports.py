@@ -0,0 +1,138 @@
+"""
+List querysets and report bodies shared by the sync views (tasks.views) and
+their async versions (tasks.async_views), so both serve the same data.
+"""
+
+from datetime import timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .archive import history_querysets, merge_counts
+from .categories import category_registry
+from .models import ArchivedTask, Task, TaskAnalytics
+from .serializers import TaskAnalyticsSerializer
+from .windows import in_range
+
+
+def urgent_tasks(tasks, now):
+    """``tasks`` that are high priority or due within a day, most urgent first."""
+    return tasks.filter(
+        Q(priority__in=['high', 'urgent']) |
+        Q(due_date__lte=now + timedelta(days=1))
+    ).with_urgency_score().order_by('-urgency')
+
+
+def overdue_tasks(tasks, now):
+    """Open ``tasks`` past their due date, oldest first."""
+    return tasks.filter(
+        status__in=['pending', 'in_progress'],
+        due_date__lt=now
+    ).order_by('due_date')
+
+
+def today_tasks(tasks, windows):
+    """``tasks`` due today in the user's timezone."""
+    return tasks.filter(
+        **in_range('due_date', windows.day())
+    ).order_by('priority', 'due_date')
+
+
+def week_tasks(tasks, windows):
+    """``tasks`` due in the next seven days in the user's timezone."""
+    return tasks.filter(
+        **in_range('due_date', windows.next_days(7))
+    ).order_by('due_date', 'priority')
+
+
+def task_analytics(user, windows, days):
+    """Analytics body for the last ``days`` days, over live and archived tasks."""
+    end_date = windows.today
+    start_date = end_date - timedelta(days=days)
+    period = windows.last_days(days)
+    
+    analytics = TaskAnalytics.objects.filter(
+        user=user,
+        date__range=[start_date, end_date]
+    ).order_by('date')
+    
+    # Calculate summary statistics over live and archived tasks
+    tiers = history_querysets(user)
+    created_in_range = [tier.filter(**in_range('created_at', period)) for tier in tiers]
+    total_tasks = sum(tier.count() for tier in created_in_range)
+    
+    completed_tasks = sum(
+        tier.filter(status='completed', **in_range('completed_at', period)).count()
+        for tier in tiers
+    )
+    
+    # Archived tasks are never overdue
+    overdue_count = Task.objects.filter(
+        user=user,
+        status__in=['pending', 'in_progress'],
+        due_date__lt=timezone.now()
+    ).count()
+    
+    priority_distribution = merge_counts('priority', *(
+        tier.values('priority').annotate(count=Count('priority')) for tier in created_in_range
+    ))
+    category_distribution = merge_counts('category__name', *(
+        tier.values('category__name').annotate(count=Count('category')) for tier in created_in_range
+    ))
+    
+    return {
+        'summary': {
+            'total_tasks': total_tasks,
+            'completed_tasks': completed_tasks,
+            'overdue_tasks': overdue_count,
+            'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
+        },
+        'priority_distribution': priority_distribution,
+        'category_distribution': category_distribution,
+        'daily_analytics': TaskAnalyticsSerializer(analytics, many=True).data
+    }
+
+
+def calendar(user, windows, month, year):
+    """Calendar body: the user's tasks due in the month, grouped by local date."""
+    tasks = Task.objects.filter(
+        user=user,
+        **in_range('due_date', windows.month(year, month))
+    ).values('id', 'title', 'priority', 'status', 'due_date', 'category_id')
+    
+    categories = category_registry.snapshot()
+    calendar_data = {}
+    for task in tasks:
+        category_id = task['category_id']
+        calendar_data.setdefault(windows.local_date(task['due_date']).isoformat(), []).append({
+            'id': str(task['id']),
+            'title': task['title'],
+            'priority': task['priority'],
+            'status': task['status'],
+            'category': category_registry.get(category_id, categories) if category_id else None
+        })
+    
+    return {
+        'month': month,
+        'year': year,
+        'calendar_data': calendar_data
+    }
+
+
+def user_stats(user):
+    """Task counts for the user statistics endpoint, one aggregate query per tier."""
+    stats = Task.objects.filter(user=user).aggregate(
+        total_tasks=Count('id'),
+        completed_tasks=Count('id', filter=Q(status='completed')),
+        pending_tasks=Count('id', filter=Q(status='pending')),
+        overdue_tasks=Count('id', filter=Q(status='pending', due_date__lt=timezone.now())),
+    )
+    archived = ArchivedTask.objects.filter(user=user).aggregate(
+        total_tasks=Count('id'),
+        completed_tasks=Count('id', filter=Q(status='completed')),
+    )
+    stats['total_tasks'] += archived['total_tasks']
+    stats['completed_tasks'] += archived['completed_tasks']
+    total_tasks = stats['total_tasks']
+    stats['completion_rate'] = (stats['completed_tasks'] / total_tasks * 100) if total_tasks > 0 else 0
+    return stats
@@ -0,0 +1,284 @@
+"""
+Versioned per-user cache for the task list and summary endpoints.
+
+Entries are keyed by ``(user, endpoint, normalized query params, data
+version, today's date)``. Any write to the user's tasks bumps their version
+(see tasks.signals), which makes every older entry unreachable without
+enumerating or deleting it; stale entries simply age out of the LRU.
+Category changes bump a global version that is part of every key.
+
+The data versions live in ``RESPONSE_CACHE['VERSION_CACHE']``, a CACHES
+alias every process sees, so a write handled by one worker invalidates the
+entries of all of them; with several workers the site refuses to start if
+that cache is process-local (tasks.apps). Response bodies are looked up in
+a process-local LRU first, then in the optional shared tier
+(``RESPONSE_CACHE['SHARED_CACHE']``, e.g. Redis). Cached values are the
+response data before rendering (the async views cache their rendered
+bodies).
+The date in the key and ``TTL`` bound how stale time-dependent fields
+(overdue, remaining time) can get.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.http import HttpResponse
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from taskmaster.conf import settings_getter
+from taskmaster.renderers import select_renderer
+
+from .windows import request_windows
+
+DEFAULTS = {
+    'ENABLED': True,
+    'MAX_ENTRIES': 5000,
+    'TTL': 60,  # seconds
+    'SHARED_CACHE': None,  # CACHES alias for the shared tier of response bodies
+    'VERSION_CACHE': 'default',  # CACHES alias for the data versions; must be seen by every process
+}
+
+
+get_response_cache_settings = settings_getter('RESPONSE_CACHE', DEFAULTS)
+
+
+class LRUCache:
+    """Thread-safe LRU of at most ``max_entries`` values with a per-entry TTL."""
+    
+    def __init__(self, max_entries=5000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Two-tier, version-keyed cache of per-user responses with hit/miss counters."""
+    
+    COUNTERS = ('local_hits', 'shared_hits', 'misses', 'stores')
+    
+    # Version of data shared by all users (categories); bumping it invalidates everyone
+    GLOBAL = 'all'
+    
+    def __init__(self, versions, max_entries=5000, ttl=60, shared=None, enabled=True):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.local = LRUCache(max_entries, ttl)
+        self.shared = shared
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._counters = {}
+    
+    def _count(self, endpoint, counter):
+        with self._lock:
+            counts = self._counters.setdefault(endpoint, dict.fromkeys(self.COUNTERS, 0))
+            counts[counter] += 1
+    
+    # Data versions. A missing version starts at the current time in
+    # nanoseconds, so losing one (eviction, restart) never revives old keys.
+    
+    @staticmethod
+    def version_key(owner):
+        return f'task-data-version:{owner}'
+    
+    def version(self, user_id):
+        """Return the data version ``'<global>.<user>'`` for ``user_id``."""
+        keys = [self.version_key(self.GLOBAL), self.version_key(user_id)]
+        versions = self.versions.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                self.versions.add(key, time.time_ns(), None)
+                versions[key] = self.versions.get(key)
+        return '.'.join(str(versions[key]) for key in keys)
+    
+    async def aversion(self, user_id):
+        keys = [self.version_key(self.GLOBAL), self.version_key(user_id)]
+        versions = await self.versions.aget_many(keys)
+        for key in keys:
+            if key not in versions:
+                await self.versions.aadd(key, time.time_ns(), None)
+                versions[key] = await self.versions.aget(key)
+        return '.'.join(str(versions[key]) for key in keys)
+    
+    def bump(self, user_id=None):
+        """Make the cached responses of ``user_id`` (of everyone if None) unreachable."""
+        key = self.version_key(self.GLOBAL if user_id is None else user_id)
+        try:
+            self.versions.incr(key)
+        except ValueError:
+            self.versions.add(key, time.time_ns(), None)
+    
+    def key(self, request, endpoint, version, kind='data'):
+        """
+        Cache key for ``request``. Query params are sorted so their order does
+        not matter; the host is included because paginated responses contain
+        absolute links.
+        """
+        params = request.GET
+        query = urlencode(sorted((name, value) for name in params for value in params.getlist(name)))
+        return (
+            f'response:{kind}:{request.user.pk}:{endpoint}:{request.get_host()}:{query}:'
+            f'{version}:{request_windows(request).today.isoformat()}'
+        )
+    
+    def get(self, key, endpoint):
+        value = self.local.get(key)
+        if value is not None:
+            self._count(endpoint, 'local_hits')
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)
+                self._count(endpoint, 'shared_hits')
+                return value
+        self._count(endpoint, 'misses')
+        return None
+    
+    async def aget(self, key, endpoint):
+        value = self.local.get(key)
+        if value is not None:
+            self._count(endpoint, 'local_hits')
+            return value
+        if self.shared is not None:
+            value = await self.shared.aget(key)
+            if value is not None:
+                self.local.set(key, value)
+                self._count(endpoint, 'shared_hits')
+                return value
+        self._count(endpoint, 'misses')
+        return None
+    
+    def set(self, key, endpoint, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, self.ttl)
+        self._count(endpoint, 'stores')
+    
+    async def aset(self, key, endpoint, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.aset(key, value, self.ttl)
+        self._count(endpoint, 'stores')
+    
+    def stats(self):
+        with self._lock:
+            endpoints = {endpoint: dict(counts) for endpoint, counts in self._counters.items()}
+        totals = {counter: sum(counts[counter] for counts in endpoints.values()) for counter in self.COUNTERS}
+        lookups = totals['local_hits'] + totals['shared_hits'] + totals['misses']
+        return {
+            'enabled': self.enabled,
+            'shared': self.shared is not None,
+            'entries': len(self.local),
+            'max_entries': self.local.max_entries,
+            'evictions': self.local.evictions,
+            'hit_rate': round((lookups - totals['misses']) / lookups, 4) if lookups else None,
+            'totals': totals,
+            'endpoints': endpoints,
+        }
+    
+    def reset(self):
+        """Drop local entries and counters; versions are kept."""
+        self.local.clear()
+        with self._lock:
+            self._counters.clear()
+            self.local.evictions = 0
+
+
+def cached_response(endpoint):
+    """
+    Cache the data of successful GET responses of a DRF view function or
+    viewset action per user. Apply it below @api_view/@action.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request = args[0] if isinstance(args[0], Request) else args[1]
+            if not response_cache.enabled or request.method != 'GET':
+                return view(*args, **kwargs)
+            
+            key = response_cache.key(request, endpoint, response_cache.version(request.user.pk))
+            data = response_cache.get(key, endpoint)
+            if data is not None:
+                return Response(data)
+            
+            response = view(*args, **kwargs)
+            if response.status_code == 200:
+                response_cache.set(key, endpoint, response.data)
+            return response
+        
+        return wrapper
+    
+    return decorator
+
+
+def acached_response(endpoint):
+    """
+    Async counterpart of cached_response for the views in tasks.async_views.
+    Those render their own JSON (or MessagePack), so the rendered body is
+    cached, per format. Apply it below @async_jwt_view.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if not response_cache.enabled or request.method != 'GET':
+                return await view(request, *args, **kwargs)
+            
+            renderer = select_renderer(request)
+            version = await response_cache.aversion(request.user.pk)
+            key = response_cache.key(request, endpoint, version, kind=renderer.format)
+            content = await response_cache.aget(key, endpoint)
+            if content is not None:
+                return HttpResponse(content, content_type=renderer.media_type)
+            
+            response = await view(request, *args, **kwargs)
+            if response.status_code == 200:
+                await response_cache.aset(key, endpoint, response.content)
+            return response
+        
+        return wrapper
+    
+    return decorator
+
+
+_config = get_response_cache_settings()
+response_cache = ResponseCache(
+    caches[_config['VERSION_CACHE']],
+    max_entries=_config['MAX_ENTRIES'],
+    ttl=_config['TTL'],
+    shared=caches[_config['SHARED_CACHE']] if _config['SHARED_CACHE'] else None,
+    enabled=_config['ENABLED'],
+)
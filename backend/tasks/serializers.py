@@ -1,9 +1,15 @@
 from rest_framework import serializers
+from django.db import models
 from django.utils import timezone
-from .models import Task, Category, TaskNotification, TaskAnalytics
+from monitoring.timing import TimedSerializerMixin
+from .categories import category_registry
+from .derived import derive_fields
+from .models import Task, Category, TaskNotification, TaskAnalytics, Device
+from .notifications import ACTIONS
+from .sparse import DERIVED_FIELDS, SparseFieldsMixin
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for Category model."""
     
     class Meta:
@@ -11,13 +17,49 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'color', 'icon', 'description']
 
 
-class TaskSerializer(serializers.ModelSerializer):
+class RegistryCategoryField(serializers.Field):
+    """
+    Read-only nested category looked up by ``category_id`` in the category
+    registry (tasks.categories), so task queries need no join.
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('source', 'category_id')
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+    
+    def to_representation(self, value):
+        return category_registry.get(value, getattr(self.parent, 'categories', None))
+
+
+class TaskListBatchSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    List serializer that computes the derived fields of the whole page in
+    one batch (tasks.derived) against a single ``now``, taken from
+    ``context['now']`` when given, and takes one category snapshot per page.
+    """
+    
+    def to_representation(self, data):
+        tasks = list(data.all() if isinstance(data, models.Manager) else data)
+        # Sparse fieldsets (tasks.sparse) may leave out the derived fields and the category
+        if DERIVED_FIELDS.intersection(self.child.fields):
+            self.child.derived = derive_fields(tasks, self.context.get('now') or timezone.now())
+        if 'category' in self.child.fields:
+            self.child.categories = category_registry.snapshot()
+        try:
+            return super().to_representation(tasks)
+        finally:
+            self.child.derived = None
+            self.child.categories = None
+
+
+class TaskSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Base serializer for Task model."""
     
-    category = CategorySerializer(read_only=True)
+    category = RegistryCategoryField()
     category_id = serializers.UUIDField(write_only=True, required=False, allow_null=True)
-    urgency_score = serializers.ReadOnlyField()
-    is_overdue = serializers.ReadOnlyField()
+    urgency_score = serializers.SerializerMethodField()
+    is_overdue = serializers.SerializerMethodField()
     remaining_time = serializers.SerializerMethodField()
     subtasks_count = serializers.SerializerMethodField()
     
@@ -32,28 +74,36 @@ class TaskSerializer(serializers.ModelSerializer):
             'urgency_score', 'is_overdue', 'remaining_time', 'subtasks_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'urgency_score', 'is_overdue']
+        list_serializer_class = TaskListBatchSerializer
+    
+    # Set by TaskListBatchSerializer while a page is serialized
+    derived = None
+    categories = None
+    
+    def get_derived(self, obj):
+        """Derived fields of ``obj``: from the page batch, else computed once per object."""
+        if self.derived is not None and obj.pk in self.derived:
+            return self.derived[obj.pk]
+        cached = getattr(self, '_single_derived', None)
+        if cached is None or cached[0] is not obj:
+            cached = (obj, derive_fields([obj], self.context.get('now') or timezone.now())[obj.pk])
+            self._single_derived = cached
+        return cached[1]
+    
+    def get_urgency_score(self, obj):
+        return self.get_derived(obj).urgency_score
+    
+    def get_is_overdue(self, obj):
+        return self.get_derived(obj).is_overdue
     
     def get_remaining_time(self, obj):
         """Get remaining time as human-readable string."""
-        remaining = obj.get_remaining_time()
-        if remaining:
-            total_seconds = int(remaining.total_seconds())
-            if total_seconds < 60:
-                return f"{total_seconds} seconds"
-            elif total_seconds < 3600:
-                minutes = total_seconds // 60
-                return f"{minutes} minutes"
-            elif total_seconds < 86400:
-                hours = total_seconds // 3600
-                return f"{hours} hours"
-            else:
-                days = total_seconds // 86400
-                return f"{days} days"
-        return None
+        return self.get_derived(obj).remaining_time
     
     def get_subtasks_count(self, obj):
-        """Get count of subtasks."""
-        return obj.subtasks.count()
+        """Get count of subtasks, annotated as ``subtask_total`` by list queries (tasks.sparse)."""
+        total = getattr(obj, 'subtask_total', None)
+        return obj.subtasks.count() if total is None else total
     
     def validate_due_date(self, value):
         """Validate due date is not in the past."""
@@ -96,15 +146,12 @@ class TaskUpdateSerializer(TaskSerializer):
         ]
 
 
-class TaskDetailSerializer(TaskSerializer):
-    """Detailed serializer for Task model."""
+class TaskRelationsMixin(serializers.Serializer):
+    """Nested subtasks and recent notifications of a task."""
     
     subtasks = serializers.SerializerMethodField()
     notifications = serializers.SerializerMethodField()
     
-    class Meta(TaskSerializer.Meta):
-        fields = TaskSerializer.Meta.fields + ['subtasks', 'notifications']
-    
     def get_subtasks(self, obj):
         """Get subtasks recursively."""
         subtasks = obj.subtasks.all()
@@ -116,18 +163,37 @@ class TaskDetailSerializer(TaskSerializer):
         return TaskNotificationSerializer(notifications, many=True).data
 
 
-class TaskListSerializer(TaskSerializer):
+class TaskDetailSerializer(SparseFieldsMixin, TaskRelationsMixin, TaskSerializer):
+    """Detailed serializer for Task model."""
+    
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ['subtasks', 'notifications']
+        # Returned only when named in ?fields= or ?expand=
+        expandable_fields = ['subtasks', 'notifications']
+
+
+class TaskListSerializer(SparseFieldsMixin, TaskRelationsMixin, TaskSerializer):
     """Serializer for task lists with filtering."""
     
     class Meta(TaskSerializer.Meta):
         fields = [
             'id', 'title', 'priority', 'status', 'due_date', 'category',
             'urgency_score', 'is_overdue', 'remaining_time', 'progress',
-            'created_at'
+            'created_at',
+            # Any other task field can be requested with ?fields=
+            'description', 'updated_at', 'completed_at', 'reminder_time', 'estimated_duration',
+            'actual_duration', 'is_recurring', 'recurrence_pattern', 'tags', 'notification_enabled',
+            'parent_task', 'subtasks_count', 'subtasks', 'notifications',
+        ]
+        # Returned only when named in ?fields= or ?expand=
+        expandable_fields = [
+            'description', 'updated_at', 'completed_at', 'reminder_time', 'estimated_duration',
+            'actual_duration', 'is_recurring', 'recurrence_pattern', 'tags', 'notification_enabled',
+            'parent_task', 'subtasks_count', 'subtasks', 'notifications',
         ]
 
 
-class TaskNotificationSerializer(serializers.ModelSerializer):
+class TaskNotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for TaskNotification model."""
     
     task_title = serializers.CharField(source='task.title', read_only=True)
@@ -140,7 +206,38 @@ class TaskNotificationSerializer(serializers.ModelSerializer):
         ]
 
 
-class TaskAnalyticsSerializer(serializers.ModelSerializer):
+class NotificationMarkReadSerializer(serializers.Serializer):
+    """Serializer for marking inbox notifications read."""
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=500, required=False)
+    all = serializers.BooleanField(default=False)
+    
+    def validate(self, attrs):
+        if not attrs.get('ids') and not attrs['all']:
+            raise serializers.ValidationError("Provide notification ids or set all to true.")
+        return attrs
+
+
+class NotificationActionSerializer(serializers.Serializer):
+    """Serializer for taking an action on inbox notifications."""
+    
+    ids = serializers.ListField(child=serializers.IntegerField(), min_length=1, max_length=500)
+    action = serializers.ChoiceField(choices=ACTIONS)
+    hours = serializers.IntegerField(min_value=1, max_value=72, default=1, help_text='Snooze length')
+
+
+class DeviceSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Serializer for registering push devices."""
+    
+    token = serializers.CharField(max_length=255)  # Re-registering a known token is not an error
+    
+    class Meta:
+        model = Device
+        fields = ['id', 'platform', 'token', 'created_at', 'last_seen_at']
+        read_only_fields = ['id', 'created_at', 'last_seen_at']
+
+
+class TaskAnalyticsSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for TaskAnalytics model."""
     
     class Meta:
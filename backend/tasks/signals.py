@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .categories import category_registry
+from .live import publish_task_change
+from .models import Task, Category, TaskAnalytics, TaskNotification
+from .notifications import adjust_unread, recount_unread
+from .push import queue_deliveries
+from .response_cache import response_cache
+from .suggestions import suggestion_engine
+
+_muted = ContextVar('task_signals_muted', default=False)
+
+
+@contextmanager
+def muted_task_signals():
+    """
+    Skip the per-row Task and TaskNotification receivers below, for bulk
+    moves such as archiving that make one counter and cache update per
+    batch themselves.
+    """
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+def invalidate_suggestions(sender, instance, **kwargs):
+    """Drop the owner's cached suggestions so the next request re-ranks."""
+    if _muted.get():
+        return
+    suggestion_engine.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(post_save, sender=TaskAnalytics)
+@receiver(post_delete, sender=TaskAnalytics)
+def invalidate_responses(sender, instance, **kwargs):
+    """
+    Bump the owner's data version once the write is committed, so their
+    cached responses become unreachable. Bumping earlier would let a request
+    that still reads the old rows cache them under the new version.
+    """
+    if _muted.get():
+        return
+    user_id = instance.user_id
+    transaction.on_commit(lambda: response_cache.bump(user_id))
+
+
+@receiver(post_save, sender=Task)
+def publish_saved_task(sender, instance, created, **kwargs):
+    """Push the change to the owner's live feed, unless nothing but updated_at changed."""
+    if _muted.get():
+        return
+    fields = None if created else getattr(instance, 'changed_fields', None)
+    if fields != []:
+        publish_task_change(instance.user_id, instance.pk, 'create' if created else 'update', instance.updated_at, fields)
+
+
+@receiver(post_delete, sender=Task)
+def publish_deleted_task(sender, instance, **kwargs):
+    if _muted.get():
+        return
+    publish_task_change(instance.user_id, instance.pk, 'delete', timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_all_responses(sender, instance, **kwargs):
+    """Categories are shared and embedded in task responses: invalidate everyone's once committed."""
+    transaction.on_commit(response_cache.bump)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_registry(sender, instance, **kwargs):
+    """Reload categories everywhere once the write is committed (and visible)."""
+    transaction.on_commit(category_registry.invalidate)
+
+
+@receiver(post_save, sender=TaskNotification)
+def count_saved_notification(sender, instance, created, **kwargs):
+    """New unread notifications add one; other saves may have changed is_read, so recount."""
+    if _muted.get():
+        return
+    if created:
+        if not instance.is_read:
+            adjust_unread(instance.user_id, 1)
+    else:
+        recount_unread([instance.user_id])
+
+
+@receiver(post_save, sender=TaskNotification)
+def queue_push(sender, instance, created, **kwargs):
+    """Queue push deliveries of a new notification once it is committed."""
+    if _muted.get():
+        return
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: queue_deliveries([instance]))
+
+
+@receiver(post_delete, sender=TaskNotification)
+def count_deleted_notification(sender, instance, **kwargs):
+    if _muted.get():
+        return
+    if not instance.is_read:
+        adjust_unread(instance.user_id, -1)
@@ -0,0 +1,138 @@
+"""
+Sparse fieldsets and expansions for task endpoints.
+
+``?fields=id,title,status`` returns only the named fields of each task;
+``?expand=subtasks,notifications`` adds fields a serializer leaves out by
+default (``Meta.expandable_fields``). Both take comma-separated names;
+unknown names are a 400. Without them responses are unchanged.
+
+The selection also shapes the query (sparse_queryset). Only the columns
+the returned fields read are selected. The subtask count annotation and
+the subtask and notification prefetches are added only when those fields
+are returned. Derived fields (urgency score, overdue flag, remaining time)
+and category lookups are only computed when requested.
+"""
+
+from collections import namedtuple
+from functools import lru_cache
+
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from .models import Task, TaskNotification
+
+Sparse = namedtuple('Sparse', ['fields', 'expand'])  # fields: frozenset or None (defaults)
+
+NO_SELECTION = Sparse(None, frozenset())
+
+# Columns read by serializer fields that are not plain model fields
+FIELD_COLUMNS = {
+    'category': ['category'],
+    'urgency_score': ['priority', 'status', 'due_date'],
+    'is_overdue': ['status', 'due_date'],
+    'remaining_time': ['due_date'],
+    'subtasks_count': [],
+    'subtasks': [],
+    'notifications': ['title'],  # task_title of each notification
+}
+
+DERIVED_FIELDS = frozenset(['urgency_score', 'is_overdue', 'remaining_time'])
+
+NOTIFICATION_COLUMNS = ['id', 'task', 'notification_type', 'message', 'sent_at', 'is_read', 'action_taken']
+
+
+def _names(value):
+    return frozenset(name.strip() for name in value.split(',') if name.strip()) if value else frozenset()
+
+
+def parse_sparse(params):
+    """Sparse selection from query params (a QueryDict); ``fields=`` with no names means defaults."""
+    return Sparse(_names(params.get('fields')) or None, _names(params.get('expand')))
+
+
+def request_sparse(request):
+    params = getattr(request, 'query_params', None)
+    return parse_sparse(request.GET if params is None else params)
+
+
+@lru_cache(maxsize=None)
+def serializer_fields(serializer_class):
+    """(readable field names, expandable field names) of a task serializer class."""
+    fields = serializer_class(context={'all_fields': True}).fields
+    readable = frozenset(name for name, field in fields.items() if not field.write_only)
+    return readable, frozenset(getattr(serializer_class.Meta, 'expandable_fields', ()))
+
+
+def selected_fields(serializer_class, sparse):
+    """
+    Names of the fields ``serializer_class`` returns for ``sparse``; raises
+    ValidationError for unknown names.
+    """
+    readable, expandable = serializer_fields(serializer_class)
+    for param, names in (('fields', sparse.fields or frozenset()), ('expand', sparse.expand)):
+        unknown = names - readable
+        if unknown:
+            raise serializers.ValidationError({param: [f"Unknown field(s): {', '.join(sorted(unknown))}"]})
+    selected = (readable - expandable) if sparse.fields is None else sparse.fields
+    return selected | sparse.expand
+
+
+def subtask_count():
+    """Number of subtasks, as an annotation (one subquery instead of a COUNT per task)."""
+    counts = Task.objects.filter(parent_task=OuterRef('pk')).order_by().values('parent_task').annotate(
+        count=Count('pk')
+    ).values('count')
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def full_task_queryset():
+    """Tasks as nested (full TaskSerializer) subtasks need them."""
+    return Task.objects.annotate(subtask_total=subtask_count())
+
+
+def sparse_queryset(queryset, serializer_class, sparse, project=True):
+    """
+    Limit ``queryset`` to what ``serializer_class`` needs for ``sparse`` (see
+    the module docstring). With ``project=False`` all columns are kept, for
+    callers that read more of the tasks than they serialize.
+    """
+    selected = selected_fields(serializer_class, sparse)
+    if project:
+        model_fields = {field.name for field in Task._meta.concrete_fields}
+        columns = {'id'}
+        for name in selected:
+            columns.update(FIELD_COLUMNS.get(name, [name] if name in model_fields else []))
+        queryset = queryset.only(*columns)
+    
+    if 'subtasks_count' in selected:
+        queryset = queryset.annotate(subtask_total=subtask_count())
+    if 'subtasks' in selected:
+        queryset = queryset.prefetch_related(Prefetch('subtasks', queryset=full_task_queryset()))
+    if 'notifications' in selected:
+        queryset = queryset.prefetch_related(Prefetch(
+            'notifications',
+            queryset=TaskNotification.objects.only(*NOTIFICATION_COLUMNS).order_by('-sent_at'),
+        ))
+    return queryset
+
+
+class SparseFieldsMixin:
+    """
+    Serializer mixin that drops the fields not selected by ``?fields=`` and
+    ``?expand=``, read from ``context['sparse']`` or the request in context.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.context.get('all_fields'):
+            return
+        sparse = self.context.get('sparse')
+        if sparse is None:
+            request = self.context.get('request')
+            sparse = request_sparse(request) if request is not None else NO_SELECTION
+        if sparse == NO_SELECTION and not getattr(self.Meta, 'expandable_fields', None):
+            return
+        selected = selected_fields(type(self), sparse)
+        for name in [name for name, field in self.fields.items() if not field.write_only and name not in selected]:
+            self.fields.pop(name)
@@ -0,0 +1,197 @@
+"""
+Top-k ranking engine behind smart suggestions.
+
+All of the user's open tasks are scored in one pass by a configurable
+scorer; each task gets at most one suggestion type (overdue, then due soon,
+then high priority) and the best ``TOP_K`` are picked with heaps, at most
+``TYPE_LIMITS[type]`` of each type so one kind cannot crowd out the rest. The
+rendered list, with every task serialized once, is cached per user until
+the user's next task write (see tasks.signals) or ``CACHE_TTL`` seconds,
+since due-soon and overdue drift with the clock. The cache is the
+``CACHE`` alias, which every process must see so that a write handled by
+one worker invalidates the list in all of them (tasks.apps).
+"""
+
+import heapq
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from taskmaster.conf import settings_getter
+
+from .models import Task
+from .serializers import TaskListSerializer
+
+DEFAULTS = {
+    'TOP_K': 13,
+    'TYPE_LIMITS': {'overdue': 5, 'due_soon': 5, 'high_priority': 3},
+    'DUE_SOON_HOURS': 24,
+    'CACHE': 'default',  # CACHES alias for the rendered lists; must be seen by every process
+    'CACHE_TTL': 60,  # seconds; writes invalidate sooner
+    'SCORER': 'tasks.suggestions.SuggestionScorer',
+    'TYPE_WEIGHTS': {'overdue': 100, 'due_soon': 60, 'high_priority': 30},
+    'PRIORITY_WEIGHTS': {'low': 10, 'medium': 20, 'high': 30, 'urgent': 40},
+}
+
+# type -> (suggestion priority, message template, action)
+SUGGESTION_TYPES = {
+    'overdue': ('high', 'Task "{title}" is overdue', 'complete_now'),
+    'due_soon': ('medium', 'Task "{title}" is due soon', 'start_working'),
+    'high_priority': ('medium', 'High priority task "{title}" needs attention', 'prioritize'),
+}
+
+PRODUCTIVITY_TIP = {
+    'type': 'productivity_tip',
+    'priority': 'low',
+    'message': 'Focus on completing overdue tasks first, then work on high-priority items',
+    'action': 'general_advice'
+}
+
+
+get_suggestion_settings = settings_getter('SMART_SUGGESTIONS', DEFAULTS)
+
+
+class SuggestionScorer:
+    """
+    Default scoring model: a weight for the suggestion type plus the task's
+    priority weight, plus a bonus that grows as the due date approaches
+    (or the longer it is overdue, capped at a week).
+    
+    Replace it through ``SMART_SUGGESTIONS['SCORER']`` with any class taking
+    the settings dict and providing ``classify(task, now)`` and
+    ``score(task, suggestion_type, now)``.
+    """
+    
+    def __init__(self, config):
+        self.type_weights = config['TYPE_WEIGHTS']
+        self.priority_weights = config['PRIORITY_WEIGHTS']
+        self.due_soon = timedelta(hours=config['DUE_SOON_HOURS'])
+    
+    def classify(self, task, now):
+        """Return the task's suggestion type, or None if it needs no suggestion."""
+        due = task.due_date
+        if due is not None and due < now:
+            return 'overdue'
+        if task.status != 'pending':
+            return None
+        if due is not None and due <= now + self.due_soon:
+            return 'due_soon'
+        if task.priority in ('high', 'urgent'):
+            return 'high_priority'
+        return None
+    
+    def score(self, task, suggestion_type, now):
+        score = self.type_weights.get(suggestion_type, 0) + self.priority_weights.get(task.priority, 0)
+        if task.due_date is not None:
+            hours = abs((task.due_date - now).total_seconds()) / 3600
+            if suggestion_type == 'overdue':
+                score += min(hours, 168) / 168 * 20
+            else:
+                score += 20 / (1 + hours)
+        if task.status == 'in_progress':
+            score += 5
+        return score
+
+
+def _score(candidate):
+    return candidate[0]
+
+
+class SuggestionEngine:
+    """Rank, render and cache per-user suggestions."""
+    
+    cache_prefix = 'smart-suggestions'
+    
+    def __init__(self, scorer, cache, top_k=13, type_limits=None, cache_ttl=60):
+        self.scorer = scorer
+        self.cache = cache
+        self.top_k = top_k
+        self.type_limits = type_limits or {}
+        self.cache_ttl = cache_ttl
+    
+    def rank(self, tasks, now):
+        """Return the top-k ``(score, type, task)`` for ``tasks``, best first."""
+        candidates = {}
+        for task in tasks:
+            suggestion_type = self.scorer.classify(task, now)
+            if suggestion_type is not None:
+                candidates.setdefault(suggestion_type, []).append(
+                    (self.scorer.score(task, suggestion_type, now), suggestion_type, task)
+                )
+        
+        best = []
+        for suggestion_type, typed in candidates.items():
+            limit = min(self.type_limits.get(suggestion_type, self.top_k), self.top_k)
+            best.extend(heapq.nlargest(limit, typed, key=_score))
+        return heapq.nlargest(self.top_k, best, key=_score)
+    
+    def render(self, ranked, now, task_data=None):
+        """
+        Build the suggestion dicts. ``task_data`` maps task id to the value
+        put under ``task``; by default each task is serialized once here.
+        """
+        if task_data is None:
+            serialized = TaskListSerializer(
+                [task for _, _, task in ranked], many=True, context={'now': now}
+            ).data
+            task_data = {task.id: data for (_, _, task), data in zip(ranked, serialized)}
+        suggestions = []
+        for score, suggestion_type, task in ranked:
+            priority, message, action = SUGGESTION_TYPES[suggestion_type]
+            suggestions.append({
+                'type': suggestion_type,
+                'priority': priority,
+                'message': message.format(title=task.title),
+                'task': task_data[task.id],
+                'action': action,
+                'score': round(score, 2),
+            })
+        if suggestions:
+            suggestions.append(dict(PRODUCTIVITY_TIP))
+        return suggestions
+    
+    def queryset(self, user):
+        return Task.objects.filter(user=user).open()
+    
+    def cache_key(self, user_id):
+        return f'{self.cache_prefix}:{user_id}'
+    
+    def for_user(self, user):
+        """Return the user's rendered suggestions, from cache when possible."""
+        key = self.cache_key(user.pk)
+        suggestions = self.cache.get(key)
+        if suggestions is None:
+            now = timezone.now()
+            suggestions = self.render(self.rank(self.queryset(user), now), now)
+            self.cache.set(key, suggestions, self.cache_ttl)
+        return suggestions
+    
+    async def afor_user(self, user):
+        key = self.cache_key(user.pk)
+        suggestions = await self.cache.aget(key)
+        if suggestions is None:
+            tasks = [task async for task in self.queryset(user)]
+            now = timezone.now()
+            # Serializing is sync and may query (categories), so it runs off the event loop
+            suggestions = await sync_to_async(self.render)(self.rank(tasks, now), now)
+            await self.cache.aset(key, suggestions, self.cache_ttl)
+        return suggestions
+    
+    def invalidate(self, user_id):
+        self.cache.delete(self.cache_key(user_id))
+    
+    def invalidate_many(self, user_ids):
+        self.cache.delete_many([self.cache_key(user_id) for user_id in user_ids])
+
+
+_config = get_suggestion_settings()
+suggestion_engine = SuggestionEngine(
+    import_string(_config['SCORER'])(_config),
+    caches[_config['CACHE']],
+    top_k=_config['TOP_K'],
+    type_limits=_config['TYPE_LIMITS'],
+    cache_ttl=_config['CACHE_TTL'],
+)
@@ -0,0 +1,599 @@
+import asyncio
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users import async_views as user_async_views
+from users.authentication import VersionedRefreshToken
+from users.models import User
+
+from . import async_views, reports
+from .archive import archive_tasks, restore_tasks
+from .live import DEFAULTS as LIVE_DEFAULTS, LiveHub, live_hub
+from .management.commands.generate_fixtures import RowWriter
+from .models import (
+    ArchivedNotification, ArchivedTask, Category, Device, NotificationCounter, NotificationDelivery, Task, TaskAnalytics,
+    TaskNotification,
+)
+from .notifications import unread_count
+from .push import DEFAULTS as PUSH_DEFAULTS, DeliveryError, DeviceGone, Dispatcher, requeue_dead
+from .response_cache import LRUCache, response_cache
+from .suggestions import suggestion_engine
+from .windows import DateWindows, get_zone, in_range
+
+
+class APITestCase(TestCase):
+    """Logged-in API client over a fresh user, with empty throttle buckets and caches."""
+    
+    def setUp(self):
+        caches['throttle'].clear()
+        caches['default'].clear()
+        response_cache.reset()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+    
+    def create_task(self, **fields):
+        return Task.objects.create(user=self.user, title=fields.pop('title', 'Task'), **fields)
+
+
+class SparseFieldsTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.task = self.create_task(title='Parent', status='in_progress', tags=['work'])
+        self.create_task(title='Child', parent_task=self.task)
+        TaskNotification.objects.create(task=self.task, user=self.user, notification_type='reminder', message='Soon')
+    
+    def detail(self, **params):
+        return self.client.get(reverse('tasks:task-detail', args=[self.task.pk]), params)
+    
+    def listed(self, **params):
+        response = self.client.get(reverse('tasks:task-list'), params)
+        return {task['title']: task for task in response.data['results']}
+    
+    def test_detail_leaves_relations_out_by_default(self):
+        data = self.detail().data
+        self.assertNotIn('subtasks', data)
+        self.assertNotIn('notifications', data)
+        self.assertEqual((data['title'], data['tags'], data['subtasks_count']), ('Parent', ['work'], 1))
+    
+    def test_detail_expands_relations_on_request(self):
+        data = self.detail(expand='subtasks,notifications').data
+        self.assertEqual([subtask['title'] for subtask in data['subtasks']], ['Child'])
+        self.assertEqual([notification['message'] for notification in data['notifications']], ['Soon'])
+        self.assertIn('description', data)
+    
+    def test_fields_limit_detail_and_list(self):
+        self.assertEqual(set(self.detail(fields='id,title,subtasks').data), {'id', 'title', 'subtasks'})
+        self.assertEqual(set(self.listed(fields='id,title')['Parent']), {'id', 'title'})
+    
+    def test_list_expands_fields_left_out_by_default(self):
+        self.assertNotIn('tags', self.listed()['Parent'])
+        parent = self.listed(expand='tags,subtasks_count')['Parent']
+        self.assertEqual((parent['tags'], parent['subtasks_count']), (['work'], 1))
+        self.assertIn('urgency_score', parent)
+    
+    def test_only_the_selected_columns_are_queried(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.listed(fields='id,title')
+        task_query = next(query['sql'] for query in queries if 'FROM "tasks_task"' in query['sql'])
+        self.assertNotIn('"description"', task_query)
+    
+    def test_unknown_names_are_a_bad_request(self):
+        self.assertEqual(self.detail(fields='id,nope').status_code, 400)
+        self.assertEqual(self.detail(expand='nope').status_code, 400)
+        self.assertEqual(self.client.get(reverse('tasks:task-list'), {'fields': 'nope'}).status_code, 400)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_least_recently_used_entry_is_evicted(self):
+        lru = LRUCache(max_entries=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+        self.assertEqual(lru.evictions, 1)
+    
+    def test_expired_entry_is_a_miss(self):
+        lru = LRUCache(ttl=-1)
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
+
+
+class ResponseCacheTests(APITestCase):
+    def overdue(self):
+        return self.client.get(reverse('tasks:task-overdue'))
+    
+    def test_repeated_request_is_served_from_cache(self):
+        self.create_task(status='in_progress', due_date=timezone.now() - timedelta(days=1))
+        first = self.overdue()
+        second = self.overdue()
+        self.assertEqual(first.data, second.data)
+        totals = response_cache.stats()['totals']
+        self.assertEqual((totals['misses'], totals['local_hits']), (1, 1))
+    
+    def test_task_write_invalidates_cached_responses(self):
+        self.create_task(status='in_progress', due_date=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.overdue().data['count'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_task(status='in_progress', due_date=timezone.now() - timedelta(days=2))
+        self.assertEqual(self.overdue().data['count'], 2)
+    
+    def test_category_write_invalidates_everyones_responses_on_commit(self):
+        self.create_task(status='in_progress', due_date=timezone.now() - timedelta(days=1))
+        self.overdue()
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Work')
+        self.overdue()
+        self.assertEqual(response_cache.stats()['totals']['misses'], 2)
+    
+    def test_other_users_writes_keep_entries(self):
+        other = User.objects.create_user('bob', 'bob@example.com', 'pass-1234')
+        self.overdue()
+        Task.objects.create(user=other, title='Other', status='in_progress', due_date=timezone.now() - timedelta(days=1))
+        self.overdue()
+        self.assertEqual(response_cache.stats()['totals']['local_hits'], 1)
+
+
+class ArchiveTests(APITestCase):
+    def create_finished_task(self, **fields):
+        task = self.create_task(status='completed', **fields)
+        Task.objects.filter(pk=task.pk).update(updated_at=timezone.now() - timedelta(days=60))
+        return task
+    
+    def test_archive_and_restore_round_trip(self):
+        task = self.create_finished_task(title='Done')
+        TaskNotification.objects.create(task=task, notification_type='completed', message='Done')
+        self.assertEqual(unread_count(self.user.pk), 1)
+        
+        self.assertEqual(sum(archive_tasks(age_days=30)), 1)
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertTrue(ArchivedTask.objects.filter(pk=task.pk, title='Done').exists())
+        self.assertEqual(ArchivedNotification.objects.filter(task_id=task.pk).count(), 1)
+        self.assertEqual(unread_count(self.user.pk), 0)
+        
+        self.assertEqual(restore_tasks(self.user, [task.pk]), [task.pk])
+        restored = Task.objects.get(pk=task.pk)
+        self.assertEqual(restored.created_at, task.created_at)
+        self.assertFalse(ArchivedTask.objects.filter(pk=task.pk).exists())
+        self.assertEqual(TaskNotification.objects.filter(task=restored).count(), 1)
+        self.assertEqual(unread_count(self.user.pk), 1)
+    
+    def test_recent_and_open_tasks_stay_live(self):
+        self.create_task(status='completed')
+        self.create_task(status='in_progress')
+        self.assertEqual(sum(archive_tasks(age_days=30)), 0)
+    
+    def test_parent_waits_for_its_live_subtasks(self):
+        parent = self.create_finished_task(title='Parent')
+        child = self.create_task(title='Child', status='in_progress', parent_task=parent)
+        self.assertEqual(sum(archive_tasks(age_days=30)), 0)
+        Task.objects.filter(pk=child.pk).update(status='completed', updated_at=timezone.now() - timedelta(days=60))
+        # The child goes in the first batch, the parent once no subtask is live
+        self.assertEqual(list(archive_tasks(age_days=30, batch_size=1)), [1, 1])
+    
+    def test_restoring_a_subtask_restores_its_archived_parent(self):
+        parent = self.create_finished_task(title='Parent')
+        child = self.create_finished_task(title='Child', parent_task=parent)
+        self.assertEqual(sum(archive_tasks(age_days=30)), 2)
+        self.assertEqual(set(restore_tasks(self.user, [child.pk])), {parent.pk, child.pk})
+        self.assertEqual(Task.objects.get(pk=child.pk).parent_task_id, parent.pk)
+    
+    def test_deleting_an_archived_task_does_not_restore_it(self):
+        parent = self.create_finished_task(title='Parent')
+        child = self.create_finished_task(title='Child', parent_task=parent)
+        TaskNotification.objects.create(task=child, notification_type='completed', message='Done')
+        other = self.create_finished_task(title='Other')
+        self.assertEqual(sum(archive_tasks(age_days=30)), 3)
+        
+        with mock.patch.object(live_hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.delete(reverse('tasks:task-detail', args=[parent.pk]))
+        self.assertEqual(response.status_code, 204)
+        publish.assert_not_called()
+        self.assertFalse(Task.objects.exists())
+        # Its archived subtask and notification go with it, as they would from the live table
+        self.assertEqual(list(ArchivedTask.objects.values_list('pk', flat=True)), [other.pk])
+        self.assertFalse(ArchivedNotification.objects.exists())
+        self.assertEqual(self.client.delete(reverse('tasks:task-detail', args=[parent.pk])).status_code, 404)
+    
+    def test_writing_to_an_archived_task_restores_it(self):
+        task = self.create_finished_task(title='Done')
+        list(archive_tasks(age_days=30))
+        response = self.client.patch(reverse('tasks:task-detail', args=[task.pk]), {'title': 'Again'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, 'Again')
+        self.assertFalse(ArchivedTask.objects.exists())
+    
+    def test_archiving_publishes_no_live_events(self):
+        self.create_finished_task()
+        with mock.patch.object(live_hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(sum(archive_tasks(age_days=30)), 1)
+        publish.assert_not_called()
+    
+    def test_user_stats_include_archived_tasks(self):
+        self.create_finished_task()
+        self.create_task()
+        before = reports.user_stats(self.user)
+        list(archive_tasks(age_days=30))
+        after = reports.user_stats(self.user)
+        self.assertEqual(after, before)
+        self.assertEqual((after['total_tasks'], after['completed_tasks']), (2, 1))
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class DateWindowsTests(SimpleTestCase):
+    def windows(self, zone, *now):
+        return DateWindows(get_zone(zone), utc(*now))
+    
+    def test_today_follows_the_users_timezone(self):
+        # 23:30 UTC on January 31st is already February 1st in Tokyo
+        tokyo = self.windows('Asia/Tokyo', 2026, 1, 31, 23, 30)
+        self.assertEqual(tokyo.today, date(2026, 2, 1))
+        self.assertEqual(tokyo.day(), (utc(2026, 1, 31, 15), utc(2026, 2, 1, 15)))
+        self.assertEqual(tokyo.day(-1), (utc(2026, 1, 30, 15), utc(2026, 1, 31, 15)))
+        
+        los_angeles = self.windows('America/Los_Angeles', 2026, 2, 1, 7, 59)
+        self.assertEqual(los_angeles.today, date(2026, 1, 31))
+        self.assertEqual(los_angeles.day(), (utc(2026, 1, 31, 8), utc(2026, 2, 1, 8)))
+    
+    def test_dst_days_are_23_and_25_hours_long(self):
+        spring = self.windows('Europe/Paris', 2026, 3, 29, 12)
+        self.assertEqual(spring.day(), (utc(2026, 3, 28, 23), utc(2026, 3, 29, 22)))
+        autumn = self.windows('Europe/Paris', 2026, 10, 25, 12)
+        self.assertEqual(autumn.day(), (utc(2026, 10, 24, 22), utc(2026, 10, 25, 23)))
+        start, end = autumn.next_days(1)
+        self.assertEqual(end - start, timedelta(hours=49))
+    
+    def test_day_without_a_midnight_starts_at_its_first_instant(self):
+        # Havana skips from 00:00 to 01:00 on 2026-03-08
+        havana = self.windows('America/Havana', 2026, 3, 8, 12)
+        self.assertEqual(havana.day(), (utc(2026, 3, 8, 5), utc(2026, 3, 9, 4)))
+        self.assertEqual(havana.day(-1)[1], havana.day()[0])
+        self.assertEqual(havana.local_date(utc(2026, 3, 8, 5)), date(2026, 3, 8))
+        self.assertEqual(havana.local_date(utc(2026, 3, 8, 4, 59)), date(2026, 3, 7))
+    
+    def test_month_and_year_rollover(self):
+        tokyo = self.windows('Asia/Tokyo', 2026, 12, 30, 12)
+        self.assertEqual(tokyo.month(2026, 12), (utc(2026, 11, 30, 15), utc(2026, 12, 31, 15)))
+        self.assertEqual(tokyo.month(2027, 1), (utc(2026, 12, 31, 15), utc(2027, 1, 31, 15)))
+        self.assertEqual(tokyo.month(2026, 2), (utc(2026, 1, 31, 15), utc(2026, 2, 28, 15)))
+        self.assertEqual(tokyo.next_days(3), (utc(2026, 12, 29, 15), utc(2027, 1, 2, 15)))
+        new_year = self.windows('Asia/Tokyo', 2027, 1, 1, 2)
+        self.assertEqual(new_year.last_days(2), (utc(2026, 12, 29, 15), utc(2027, 1, 1, 15)))
+    
+    def test_unknown_or_empty_zone_is_utc(self):
+        self.assertEqual(get_zone('Mars/Olympus_Mons'), dt_timezone.utc)
+        self.assertEqual(get_zone(''), dt_timezone.utc)
+        self.assertEqual(DateWindows.for_user(None, utc(2026, 5, 1, 23)).today, date(2026, 5, 1))
+    
+    def test_in_range_is_half_open(self):
+        self.assertEqual(in_range('due_date', (1, 2)), {'due_date__gte': 1, 'due_date__lt': 2})
+
+
+class TodayWindowTests(APITestCase):
+    def test_today_list_uses_the_users_local_day(self):
+        self.user.timezone = 'Asia/Tokyo'
+        self.user.save()
+        start, end = DateWindows.for_user(self.user).day()
+        for title, due in [('Yesterday', start - timedelta(minutes=1)), ('Early', start),
+                           ('Late', end - timedelta(minutes=1)), ('Tomorrow', end)]:
+            self.create_task(title=title, due_date=due, status='in_progress')
+        titles = {task['title'] for task in self.client.get(reverse('tasks:task-today')).data['results']}
+        self.assertEqual(titles, {'Early', 'Late'})
+
+
+class ScriptedTransport:
+    """Test transport that fails with the queued outcomes, then delivers."""
+    
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.batches = []
+    
+    def send(self, device, messages):
+        self.batches.append([item['id'] for item in messages])
+        if self.outcomes:
+            raise self.outcomes.pop(0)
+        return {}
+
+
+class PushDeliveryTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.device = Device.objects.create(user=self.user, platform='ios', token='device-1')
+        self.task = self.create_task()
+    
+    def notify(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(count):
+                TaskNotification.objects.create(task=self.task, notification_type='reminder', message='Soon')
+    
+    def dispatcher(self, transport, **config):
+        dispatcher = Dispatcher(dict(PUSH_DEFAULTS, CONCURRENCY=1, **config), transport)
+        self.addCleanup(dispatcher.close)
+        return dispatcher
+    
+    def test_new_notification_is_queued_per_active_device(self):
+        Device.objects.create(user=self.user, platform='web', token='device-2', is_active=False)
+        self.notify()
+        self.assertEqual(list(NotificationDelivery.objects.values_list('device_id', flat=True)), [self.device.pk])
+    
+    def test_deliveries_are_sent_in_device_batches(self):
+        self.notify(5)
+        transport = ScriptedTransport()
+        counts = self.dispatcher(transport, BATCH_SIZE=2).run_once()
+        self.assertEqual((counts['claimed'], counts['sent']), (5, 5))
+        self.assertEqual([len(batch) for batch in transport.batches], [2, 2, 1])
+        self.assertEqual(NotificationDelivery.objects.filter(status='sent').count(), 5)
+    
+    def test_failed_batch_is_retried_after_backoff(self):
+        self.notify()
+        dispatcher = self.dispatcher(ScriptedTransport(DeliveryError('Unavailable')), BACKOFF_BASE=10)
+        now = timezone.now()
+        with self.assertLogs('tasks.push', 'WARNING'):
+            self.assertEqual(dispatcher.run_once(now)['retried'], 1)
+        delivery = NotificationDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts, delivery.last_error), ('pending', 1, 'Unavailable'))
+        self.assertTrue(now + timedelta(seconds=5) <= delivery.next_attempt_at <= now + timedelta(seconds=10))
+        # Not due again before the backoff ran out
+        self.assertEqual(dispatcher.run_once(now + timedelta(seconds=4))['claimed'], 0)
+        self.assertEqual(dispatcher.run_once(now + timedelta(seconds=10))['sent'], 1)
+    
+    def test_backoff_doubles_up_to_the_maximum(self):
+        dispatcher = self.dispatcher(ScriptedTransport(), BACKOFF_BASE=2, BACKOFF_MAX=16)
+        for attempts, delay in [(1, 2), (2, 4), (4, 16), (10, 16)]:
+            self.assertTrue(delay / 2 <= dispatcher.backoff(attempts) <= delay)
+    
+    def test_delivery_is_dead_lettered_after_max_attempts_and_can_be_requeued(self):
+        self.notify()
+        dispatcher = self.dispatcher(ScriptedTransport(*[DeliveryError('Unavailable')] * 2), MAX_ATTEMPTS=2)
+        now = timezone.now()
+        with self.assertLogs('tasks.push', 'WARNING'):
+            self.assertEqual(dispatcher.run_once(now)['retried'], 1)
+            self.assertEqual(dispatcher.run_once(now + timedelta(hours=1))['dead'], 1)
+        self.assertEqual(NotificationDelivery.objects.get().status, 'dead')
+        
+        self.assertEqual(requeue_dead(), 1)
+        delivery = NotificationDelivery.objects.get()
+        self.assertEqual((delivery.status, delivery.attempts), ('pending', 0))
+        self.assertEqual(dispatcher.run_once(now + timedelta(hours=2))['sent'], 1)
+    
+    def test_unknown_device_is_deactivated(self):
+        self.notify(2)
+        # The unclaimed delivery to the device is dead-lettered too
+        counts = self.dispatcher(ScriptedTransport(DeviceGone('Unregistered')), CLAIM_SIZE=1).run_once()
+        self.assertEqual(counts['dead'], 1)
+        self.device.refresh_from_db()
+        self.assertFalse(self.device.is_active)
+        self.assertEqual(NotificationDelivery.objects.filter(status='dead').count(), 2)
+        self.assertEqual(requeue_dead(), 0)  # Inactive devices are not retried
+
+
+def event_data(text):
+    """Decoded ``data`` of one SSE frame."""
+    return json.loads(text.rsplit('data: ', 1)[1])
+
+
+class LiveHubTests(SimpleTestCase):
+    def setUp(self):
+        self.hub = LiveHub(dict(LIVE_DEFAULTS, HEARTBEAT=0.05, MAX_AGE=1))
+    
+    async def connect(self, last_id=None):
+        stream = self.hub.stream(1, last_id)
+        self.assertEqual(await anext(stream), 'retry: 3000\n\n')
+        return stream
+    
+    async def next_event(self, stream):
+        while (text := await anext(stream)) == ': ping\n\n':
+            pass
+        return text
+    
+    async def test_open_stream_receives_published_events(self):
+        stream = await self.connect()
+        self.hub.publish(1, {'n': 1})
+        self.hub.publish(2, {'n': 2})  # Another user's
+        self.hub.publish(1, {'n': 3})
+        self.assertEqual(event_data(await self.next_event(stream)), {'n': 1})
+        self.assertEqual(event_data(await self.next_event(stream)), {'n': 3})
+        await stream.aclose()
+    
+    async def test_reconnect_replays_missed_events_once(self):
+        stream = await self.connect()
+        self.hub.publish(1, {'n': 1})
+        first = await self.next_event(stream)
+        last_id = first.split('\n', 1)[0].removeprefix('id: ')
+        self.hub.publish(1, {'n': 2})
+        await stream.aclose()
+        self.hub.publish(1, {'n': 3})  # While disconnected
+        
+        stream = await self.connect(last_id)
+        self.assertEqual(event_data(await self.next_event(stream)), {'n': 2})
+        self.assertEqual(event_data(await self.next_event(stream)), {'n': 3})
+        self.hub.publish(1, {'n': 4})
+        self.assertEqual(event_data(await self.next_event(stream)), {'n': 4})
+        await stream.aclose()
+    
+    async def test_unknown_last_event_id_gets_a_reset(self):
+        stream = await self.connect('12345')
+        self.assertIn('event: reset', await self.next_event(stream))
+        await stream.aclose()
+    
+    def test_events_of_users_without_streams_are_not_buffered(self):
+        self.hub.publish(1, {'n': 1})
+        self.assertEqual(self.hub.buffers, {})
+
+
+class LiveChangeTests(APITestCase):
+    def published(self, action):
+        """Payloads published to the user's feed by ``action()`` once it commits."""
+        with mock.patch.object(live_hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                action()
+        return [payload for user_id, payload in (call.args for call in publish.call_args_list)]
+    
+    def test_save_publishes_changed_fields(self):
+        task = Task.objects.get(pk=self.create_task().pk)
+        task.status = 'in_progress'
+        task.progress = 50
+        [payload] = self.published(task.save)
+        self.assertEqual((payload['task'], payload['op']), (str(task.pk), 'update'))
+        self.assertEqual(set(payload['fields']), {'status', 'progress'})
+    
+    def test_create_publishes_without_fields(self):
+        [payload] = self.published(self.create_task)
+        self.assertEqual((payload['op'], payload['fields']), ('create', None))
+    
+    def test_delete_publishes_a_delete_event(self):
+        task = self.create_task()
+        task_id = str(task.pk)  # delete() clears the pk
+        [payload] = self.published(task.delete)
+        self.assertEqual((payload['task'], payload['op']), (task_id, 'delete'))
+
+
+class SuggestionTests(APITestCase):
+    def test_rendered_list_is_cached_until_a_task_write(self):
+        task = self.create_task(title='Late', due_date=timezone.now() - timedelta(days=1), status='in_progress')
+        suggestions = suggestion_engine.for_user(self.user)
+        self.assertEqual(suggestions[0]['task']['title'], 'Late')
+        self.assertEqual(caches['default'].get(suggestion_engine.cache_key(self.user.pk)), suggestions)
+        task.status = 'completed'
+        task.save()
+        self.assertEqual(suggestion_engine.for_user(self.user), [])
+    
+    def test_async_render_runs_off_the_event_loop(self):
+        self.create_task(title='Late', due_date=timezone.now() - timedelta(days=1), status='in_progress')
+        render = suggestion_engine.render
+        on_loop = []
+        
+        def checked_render(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return render(*args, **kwargs)
+        
+        with mock.patch.object(suggestion_engine, 'render', side_effect=checked_render):
+            suggestions = async_to_sync(suggestion_engine.afor_user)(self.user)
+        self.assertEqual(on_loop, [False])
+        self.assertEqual(suggestions[0]['task']['title'], 'Late')
+
+
+class GenerateFixturesTests(TestCase):
+    def generate(self, *flags):
+        call_command(
+            'generate_fixtures', '--users=3', '--tasks-per-user=40', '--history-days=10', '--seed=7',
+            '--batch-size=25', '--prefix=fixture', *flags, stdout=StringIO(),
+        )
+        return list(
+            Task.objects.order_by('id').values_list(
+                'id', 'user__username', 'title', 'priority', 'status', 'parent_task_id', 'tags',
+            )
+        )
+    
+    def test_seeds_the_requested_counts(self):
+        self.generate()
+        users = User.objects.filter(username__startswith='fixture')
+        self.assertEqual(users.count(), 3)
+        self.assertEqual(Task.objects.filter(user__in=users).count(), 120)
+        self.assertEqual(TaskAnalytics.objects.filter(user__in=users).count(), 30)
+        unread = TaskNotification.objects.filter(user__in=users, is_read=False).count()
+        self.assertEqual(sum(NotificationCounter.objects.filter(user__in=users).values_list('unread', flat=True)), unread)
+        # Every subtask's parent was generated too
+        parents = set(Task.objects.exclude(parent_task=None).values_list('parent_task_id', flat=True))
+        self.assertEqual(Task.objects.filter(pk__in=parents).count(), len(parents))
+    
+    def test_same_seed_gives_the_same_data(self):
+        first = self.generate()
+        self.assertEqual(self.generate('--flush'), first)
+        self.assertEqual(Task.objects.count(), 120)
+    
+    def test_existing_prefix_needs_flush(self):
+        self.generate()
+        with self.assertRaises(CommandError):
+            self.generate()
+    
+    def test_fields_left_out_of_the_rows_get_their_defaults(self):
+        user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        fields = ['id', 'title', 'description', 'user_id', 'updated_at']
+        RowWriter(Task, fields).write([('%032x' % 1, 'Partial', '', user.pk, '2026-01-01 00:00:00')])
+        task = Task.objects.get(title='Partial')
+        self.assertEqual((task.priority, task.status, task.tags, task.progress), ('medium', 'pending', [], 0))
+        self.assertEqual((task.recurrence_pattern, task.due_date), ({}, None))
+        self.assertIsNotNone(task.created_at)
+        with self.assertRaises(CommandError):
+            RowWriter(Task, ['id', 'title', 'user_id', 'updated_at'])  # description has no default
+
+
+class AsyncViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = VersionedRefreshToken.for_user(self.user).access_token
+        now = timezone.now()
+        self.create_task(title='Overdue', due_date=now - timedelta(days=2), status='in_progress', priority='high')
+        self.create_task(title='Today', due_date=now + timedelta(minutes=5), priority='urgent')
+        self.create_task(title='Later', due_date=now + timedelta(days=3))
+        self.create_task(title='Done', status='completed', completed_at=now)
+    
+    def call(self, view, data=None, method='get', authorization=None):
+        caches['default'].clear()
+        response_cache.reset()
+        headers = {'Authorization': f'Bearer {self.token}' if authorization is None else authorization}
+        request = getattr(AsyncRequestFactory(), method)('/api/', data, headers=headers)
+        return async_to_sync(view)(request)
+    
+    def sync_data(self, url_name, data=None):
+        caches['default'].clear()
+        response_cache.reset()
+        return json.loads(self.client.get(reverse(url_name), data, HTTP_ACCEPT='application/json').content)
+    
+    def test_responses_match_the_sync_views(self):
+        cases = [
+            (async_views.urgent_tasks, 'tasks:task-urgent', None),
+            (async_views.overdue_tasks, 'tasks:task-overdue', None),
+            (async_views.today_tasks, 'tasks:task-today', {'fields': 'id,title'}),
+            (async_views.week_tasks, 'tasks:task-week', None),
+            (async_views.task_analytics, 'tasks:task-analytics', {'days': 7}),
+            (async_views.smart_suggestions, 'tasks:smart-suggestions', None),
+            (async_views.calendar_view, 'tasks:calendar-view', None),
+            (user_async_views.user_stats_view, 'users:user-stats', None),
+        ]
+        for view, url_name, data in cases:
+            with self.subTest(url_name):
+                response = self.call(view, data)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(json.loads(response.content), self.sync_data(url_name, data))
+    
+    def test_dashboard_matches_the_sync_view(self):
+        data = json.loads(self.call(async_views.dashboard_view, {'limit': 2}).content)
+        expected = self.sync_data('tasks:dashboard', {'limit': 2})
+        data.pop('generated_at')
+        expected.pop('generated_at')
+        self.assertEqual(data, expected)
+    
+    def test_unknown_sparse_field_is_a_bad_request(self):
+        self.assertEqual(self.call(async_views.today_tasks, {'fields': 'nope'}).status_code, 400)
+    
+    def test_authentication_and_method_errors(self):
+        self.assertEqual(self.call(async_views.today_tasks, authorization='').status_code, 401)
+        self.assertEqual(self.call(async_views.today_tasks, authorization='Bearer nope').status_code, 401)
+        response = self.call(async_views.today_tasks, method='post')
+        self.assertEqual((response.status_code, response['Allow']), (405, 'GET'))
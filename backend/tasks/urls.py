@@ -1,6 +1,7 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, views
 
 app_name = 'tasks'
 
@@ -8,6 +9,8 @@ app_name = 'tasks'
 router = DefaultRouter()
 router.register(r'categories', views.CategoryViewSet)
 router.register(r'tasks', views.TaskViewSet, basename='task')
+router.register(r'notifications', views.NotificationViewSet, basename='notification')
+router.register(r'devices', views.DeviceViewSet, basename='device')
 
 urlpatterns = [
     # Include router URLs
@@ -17,4 +20,19 @@ urlpatterns = [
     path('analytics/', views.task_analytics, name='task-analytics'),
     path('suggestions/', views.smart_suggestions, name='smart-suggestions'),
     path('calendar/', views.calendar_view, name='calendar-view'),
-] 
\ No newline at end of file
+    path('dashboard/', views.dashboard_view, name='dashboard'),
+]
+
+if settings.ASYNC_READ_VIEWS:
+    # Async read endpoints take precedence over the router's sync actions
+    urlpatterns = [
+        path('tasks/urgent/', async_views.urgent_tasks, name='task-urgent'),
+        path('tasks/overdue/', async_views.overdue_tasks, name='task-overdue'),
+        path('tasks/today/', async_views.today_tasks, name='task-today'),
+        path('tasks/week/', async_views.week_tasks, name='task-week'),
+        path('analytics/', async_views.task_analytics, name='task-analytics'),
+        path('suggestions/', async_views.smart_suggestions, name='smart-suggestions'),
+        path('calendar/', async_views.calendar_view, name='calendar-view'),
+        path('dashboard/', async_views.dashboard_view, name='dashboard'),
+        path('live/', async_views.live_events, name='live-events'),
+    ] + urlpatterns
@@ -1,25 +1,42 @@
-from rest_framework import status, generics, permissions, filters
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework import status, generics, permissions, filters, mixins
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.decorators import permission_classes, action
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
+from rest_framework.pagination import CursorPagination
+from rest_framework.viewsets import GenericViewSet, ModelViewSet
 # from django_filters.rest_framework import DjangoFilterBackend  # Temporarily commented out
 from django.utils import timezone
-from django.db.models import Q, Count, Avg
+from django.db import transaction
+from django.db.models import Count, Avg
 from django.shortcuts import get_object_or_404
-from datetime import timedelta
+from django.http import Http404
 import json
+import uuid
 
-from .models import Task, Category, TaskNotification, TaskAnalytics
+from monitoring.timing import TimedViewMixin, timed_api_view
+
+from .archive import delete_archived_tasks, history_querysets, restore_tasks
+from .dashboard import build_dashboard, open_tasks, parse_limit
+from .live import publish_task_change
+from .models import Task, Category, TaskNotification, Device
+from . import notifications as inbox
+from . import reports
+from .response_cache import cached_response, response_cache
+from .sparse import request_sparse, sparse_queryset
+from .suggestions import suggestion_engine
+from .windows import request_windows
 from .serializers import (
     TaskSerializer, TaskCreateSerializer, TaskUpdateSerializer,
     TaskDetailSerializer, TaskListSerializer, CategorySerializer,
-    TaskNotificationSerializer, TaskAnalyticsSerializer,
+    TaskNotificationSerializer,
     TaskBulkUpdateSerializer, TaskSearchSerializer,
-    TaskSnoozeSerializer, TaskCompleteSerializer
+    TaskSnoozeSerializer, TaskCompleteSerializer,
+    NotificationMarkReadSerializer, NotificationActionSerializer,
+    DeviceSerializer
 )
 
 
-class CategoryViewSet(ModelViewSet):
+class CategoryViewSet(TimedViewMixin, ModelViewSet):
     """ViewSet for Category model."""
     
     queryset = Category.objects.all()
@@ -36,7 +53,7 @@ class CategoryViewSet(ModelViewSet):
         ).order_by('name')
 
 
-class TaskViewSet(ModelViewSet):
+class TaskViewSet(TimedViewMixin, ModelViewSet):
     """ViewSet for Task model with comprehensive functionality."""
     
     permission_classes = [permissions.IsAuthenticated]
@@ -47,9 +64,49 @@ class TaskViewSet(ModelViewSet):
     ordering_fields = ['due_date', 'priority', 'created_at', 'title', 'progress', 'status']
     ordering = ['-created_at']
     
+    # Read actions whose queries follow ?fields= and ?expand= (tasks.sparse)
+    SPARSE_ACTIONS = ['list', 'retrieve', 'urgent', 'overdue', 'today', 'week']
+    
+    EXPORT_FIELDS = [
+        'id', 'title', 'description', 'category_id', 'priority', 'status',
+        'created_at', 'updated_at', 'due_date', 'completed_at',
+        'estimated_duration', 'actual_duration', 'tags', 'progress', 'parent_task_id'
+    ]
+    
     def get_queryset(self):
-        """Return tasks for the current user."""
-        return Task.objects.filter(user=self.request.user).select_related('category')
+        """Return tasks for the current user, with only what the requested fields need for reads."""
+        tasks = Task.objects.filter(user=self.request.user)
+        if self.action in self.SPARSE_ACTIONS:
+            tasks = sparse_queryset(tasks, self.get_serializer_class(), request_sparse(self.request))
+        return tasks
+    
+    def archived_task_id(self):
+        """The looked-up task id, for the archive (tasks.archive); Http404 if it is not a UUID."""
+        try:
+            return uuid.UUID(str(self.kwargs[self.lookup_field]))
+        except ValueError:
+            raise Http404
+    
+    def get_object(self):
+        """Return the task; writes to an archived task restore it first (tasks.archive)."""
+        try:
+            return super().get_object()
+        except Http404:
+            # Deletes of archived tasks are handled by destroy()
+            if self.request.method in SAFE_METHODS or self.action == 'destroy':
+                raise
+            if not restore_tasks(self.request.user, [self.archived_task_id()]):
+                raise
+            return super().get_object()
+    
+    def destroy(self, request, *args, **kwargs):
+        """Delete the task; an archived task is deleted from the archive without being restored."""
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except Http404:
+            if not delete_archived_tasks(request.user, [self.archived_task_id()]):
+                raise
+            return Response(status=status.HTTP_204_NO_CONTENT)
     
     def get_serializer_class(self):
         """Return appropriate serializer based on action."""
@@ -89,7 +146,26 @@ class TaskViewSet(ModelViewSet):
         
         return Response({
             'message': 'Task completed successfully',
-            'task': TaskDetailSerializer(task).data
+            'task': TaskDetailSerializer(task, context=self.get_serializer_context()).data
+        })
+    
+    @action(detail=True, methods=['post'])
+    def reopen(self, request, pk=None):
+        """Reopen a completed or cancelled task, restoring it from the archive if needed."""
+        task = self.get_object()
+        if task.status not in ['completed', 'cancelled']:
+            return Response(
+                {'error': 'Only completed or cancelled tasks can be reopened'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        task.status = 'pending'
+        task.completed_at = None
+        task.save()
+        
+        return Response({
+            'message': 'Task reopened successfully',
+            'task': TaskDetailSerializer(task, context=self.get_serializer_context()).data
         })
     
     @action(detail=True, methods=['post'])
@@ -104,7 +180,7 @@ class TaskViewSet(ModelViewSet):
         
         return Response({
             'message': f'Task reminder snoozed for {hours} hours',
-            'task': TaskDetailSerializer(task).data
+            'task': TaskDetailSerializer(task, context=self.get_serializer_context()).data
         })
     
     @action(detail=True, methods=['post'])
@@ -116,7 +192,7 @@ class TaskViewSet(ModelViewSet):
         
         return Response({
             'message': 'Task marked as in progress',
-            'task': TaskDetailSerializer(task).data
+            'task': TaskDetailSerializer(task, context=self.get_serializer_context()).data
         })
     
     @action(detail=True, methods=['post'])
@@ -134,7 +210,7 @@ class TaskViewSet(ModelViewSet):
             
             return Response({
                 'message': 'Progress updated successfully',
-                'task': TaskDetailSerializer(task).data
+                'task': TaskDetailSerializer(task, context=self.get_serializer_context()).data
             })
         else:
             return Response(
@@ -149,7 +225,9 @@ class TaskViewSet(ModelViewSet):
         serializer.is_valid(raise_exception=True)
         
         task_ids = serializer.validated_data['task_ids']
-        tasks = Task.objects.filter(id__in=task_ids, user=request.user)
+        # Only the user's own tasks are updated, so only those get change events
+        task_ids = list(Task.objects.filter(id__in=task_ids, user=request.user).values_list('id', flat=True))
+        tasks = Task.objects.filter(id__in=task_ids)
         
         # Update fields
         update_fields = {}
@@ -161,252 +239,212 @@ class TaskViewSet(ModelViewSet):
             update_fields['category_id'] = serializer.validated_data['category_id']
         
         if update_fields:
-            tasks.update(**update_fields)
+            now = timezone.now()
+            tasks.update(updated_at=now, **update_fields)
+            suggestion_engine.invalidate(request.user.pk)
+            user_id = request.user.pk
+            transaction.on_commit(lambda: response_cache.bump(user_id))
+            fields = [name.removesuffix('_id') for name in update_fields]
+            for task_id in task_ids:
+                publish_task_change(request.user.pk, task_id, 'update', now, fields)
         
         return Response({
-            'message': f'{len(tasks)} tasks updated successfully'
+            'message': f'{len(task_ids)} tasks updated successfully'
+        })
+    
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Export all of the user's tasks, live and archived."""
+        live, archived = history_querysets(request.user)
+        tasks = [
+            {**task, 'archived': False} for task in live.order_by('created_at').values(*self.EXPORT_FIELDS)
+        ] + [
+            {**task, 'archived': True} for task in archived.order_by('created_at').values(*self.EXPORT_FIELDS)
+        ]
+        return Response({
+            'count': len(tasks),
+            'tasks': tasks
         })
     
     @action(detail=False, methods=['get'])
     def urgent(self, request):
         """Get urgent tasks (high priority or due soon)."""
-        urgent_tasks = self.get_queryset().filter(
-            Q(priority__in=['high', 'urgent']) |
-            Q(due_date__lte=timezone.now() + timedelta(days=1))
-        ).order_by('urgency_score')
+        urgent_tasks = reports.urgent_tasks(self.get_queryset(), timezone.now())
         
         page = self.paginate_queryset(urgent_tasks)
         if page is not None:
-            serializer = TaskListSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = TaskListSerializer(urgent_tasks, many=True)
+        serializer = self.get_serializer(urgent_tasks, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('overdue')
     def overdue(self, request):
         """Get overdue tasks."""
-        overdue_tasks = self.get_queryset().filter(
-            status__in=['pending', 'in_progress'],
-            due_date__lt=timezone.now()
-        ).order_by('due_date')
+        overdue_tasks = reports.overdue_tasks(self.get_queryset(), timezone.now())
         
         page = self.paginate_queryset(overdue_tasks)
         if page is not None:
-            serializer = TaskListSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = TaskListSerializer(overdue_tasks, many=True)
+        serializer = self.get_serializer(overdue_tasks, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('today')
     def today(self, request):
         """Get tasks due today."""
-        today = timezone.now().date()
-        today_tasks = self.get_queryset().filter(
-            due_date__date=today
-        ).order_by('priority', 'due_date')
+        today_tasks = reports.today_tasks(self.get_queryset(), request_windows(request))
         
         page = self.paginate_queryset(today_tasks)
         if page is not None:
-            serializer = TaskListSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = TaskListSerializer(today_tasks, many=True)
+        serializer = self.get_serializer(today_tasks, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @cached_response('week')
     def week(self, request):
         """Get tasks due this week."""
-        today = timezone.now().date()
-        week_end = today + timedelta(days=7)
-        week_tasks = self.get_queryset().filter(
-            due_date__date__range=[today, week_end]
-        ).order_by('due_date', 'priority')
+        week_tasks = reports.week_tasks(self.get_queryset(), request_windows(request))
         
         page = self.paginate_queryset(week_tasks)
         if page is not None:
-            serializer = TaskListSerializer(page, many=True)
+            serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
         
-        serializer = TaskListSerializer(week_tasks, many=True)
+        serializer = self.get_serializer(week_tasks, many=True)
         return Response(serializer.data)
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def task_analytics(request):
-    """Get task analytics for the current user."""
-    user = request.user
-    
-    # Get date range from query params
-    days = int(request.query_params.get('days', 30))
-    end_date = timezone.now().date()
-    start_date = end_date - timedelta(days=days)
-    
-    # Get analytics data
-    analytics = TaskAnalytics.objects.filter(
-        user=user,
-        date__range=[start_date, end_date]
-    ).order_by('date')
-    
-    # Calculate summary statistics
-    total_tasks = Task.objects.filter(
-        user=user,
-        created_at__date__range=[start_date, end_date]
-    ).count()
-    
-    completed_tasks = Task.objects.filter(
-        user=user,
-        status='completed',
-        completed_at__date__range=[start_date, end_date]
-    ).count()
-    
-    overdue_tasks = Task.objects.filter(
-        user=user,
-        status__in=['pending', 'in_progress'],
-        due_date__lt=timezone.now()
-    ).count()
-    
-    # Priority distribution
-    priority_distribution = Task.objects.filter(
-        user=user,
-        created_at__date__range=[start_date, end_date]
-    ).values('priority').annotate(count=Count('priority'))
-    
-    # Category distribution
-    category_distribution = Task.objects.filter(
-        user=user,
-        created_at__date__range=[start_date, end_date]
-    ).values('category__name').annotate(count=Count('category'))
+class NotificationCursorPagination(CursorPagination):
+    """Newest first; cursors stay stable while new notifications arrive."""
     
-    return Response({
-        'summary': {
-            'total_tasks': total_tasks,
-            'completed_tasks': completed_tasks,
-            'overdue_tasks': overdue_tasks,
-            'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-        },
-        'priority_distribution': priority_distribution,
-        'category_distribution': category_distribution,
-        'daily_analytics': TaskAnalyticsSerializer(analytics, many=True).data
-    })
+    ordering = ('-sent_at', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
 
 
-@api_view(['GET'])
-@permission_classes([permissions.IsAuthenticated])
-def smart_suggestions(request):
-    """Get smart task suggestions based on user behavior and deadlines."""
-    user = request.user
-    
-    # Get tasks that need attention
-    suggestions = []
-    
-    # Overdue tasks (highest priority)
-    overdue_tasks = Task.objects.filter(
-        user=user,
-        status__in=['pending', 'in_progress'],
-        due_date__lt=timezone.now()
-    ).order_by('priority', 'due_date')[:5]
-    
-    for task in overdue_tasks:
-        suggestions.append({
-            'type': 'overdue',
-            'priority': 'high',
-            'message': f'Task "{task.title}" is overdue',
-            'task': TaskListSerializer(task).data,
-            'action': 'complete_now'
-        })
+class NotificationViewSet(TimedViewMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, GenericViewSet):
+    """The user's notification inbox (see tasks.notifications)."""
     
-    # Tasks due soon (within 24 hours)
-    soon_tasks = Task.objects.filter(
-        user=user,
-        status='pending',
-        due_date__range=[
-            timezone.now(),
-            timezone.now() + timedelta(days=1)
-        ]
-    ).order_by('priority', 'due_date')[:5]
-    
-    for task in soon_tasks:
-        suggestions.append({
-            'type': 'due_soon',
-            'priority': 'medium',
-            'message': f'Task "{task.title}" is due soon',
-            'task': TaskListSerializer(task).data,
-            'action': 'start_working'
-        })
+    serializer_class = TaskNotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+    filter_backends = []  # Ordering is fixed by the cursor
     
-    # High priority pending tasks
-    high_priority_tasks = Task.objects.filter(
-        user=user,
-        status='pending',
-        priority__in=['high', 'urgent']
-    ).order_by('urgency_score')[:3]
-    
-    for task in high_priority_tasks:
-        suggestions.append({
-            'type': 'high_priority',
-            'priority': 'medium',
-            'message': f'High priority task "{task.title}" needs attention',
-            'task': TaskListSerializer(task).data,
-            'action': 'prioritize'
+    def get_queryset(self):
+        """Return the user's notifications; ``?unread=1`` and ``?type=`` filter them."""
+        notifications = TaskNotification.objects.filter(user=self.request.user).select_related('task').only(
+            'id', 'task__title', 'notification_type', 'message', 'sent_at', 'is_read', 'action_taken'
+        )
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(is_read=False)
+        notification_type = self.request.query_params.get('type')
+        if notification_type:
+            notifications = notifications.filter(notification_type=notification_type)
+        return notifications
+    
+    @action(detail=False, methods=['get'], url_path='unread-count')
+    def unread_count(self, request):
+        """Get the number of unread notifications."""
+        return Response({'unread': inbox.unread_count(request.user.pk)})
+    
+    @action(detail=False, methods=['post'], url_path='mark-read')
+    def mark_read(self, request):
+        """Mark the given notifications (or all of them) read."""
+        serializer = NotificationMarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        ids = None if serializer.validated_data['all'] else serializer.validated_data['ids']
+        updated = inbox.mark_read(request.user, ids)
+        return Response({
+            'updated': updated,
+            'unread': inbox.unread_count(request.user.pk)
         })
     
-    # Productivity suggestions
-    if suggestions:
-        suggestions.append({
-            'type': 'productivity_tip',
-            'priority': 'low',
-            'message': 'Focus on completing overdue tasks first, then work on high-priority items',
-            'action': 'general_advice'
+    @action(detail=False, methods=['post'], url_path='action')
+    def take_action(self, request):
+        """Record an action (dismiss, snooze, complete, reschedule) on notifications."""
+        serializer = NotificationActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        updated = inbox.take_action(request.user, **serializer.validated_data)
+        return Response({
+            'updated': updated,
+            'unread': inbox.unread_count(request.user.pk)
         })
+
+
+class DeviceViewSet(TimedViewMixin, mixins.ListModelMixin, mixins.CreateModelMixin, mixins.DestroyModelMixin, GenericViewSet):
+    """Push devices of the current user (see tasks.push)."""
+    
+    serializer_class = DeviceSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = None
+    filter_backends = []
+    
+    def get_queryset(self):
+        return Device.objects.filter(user=self.request.user, is_active=True).order_by('-created_at')
     
+    def perform_create(self, serializer):
+        """Register the token, moving it over if another account or an old install had it."""
+        data = serializer.validated_data
+        serializer.instance, _ = Device.objects.update_or_create(
+            token=data['token'],
+            defaults={
+                'user': self.request.user,
+                'platform': data['platform'],
+                'is_active': True,
+                'last_seen_at': timezone.now(),
+            }
+        )
+
+
+@timed_api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+@cached_response('analytics')
+def task_analytics(request):
+    """Get task analytics for the current user."""
+    # Date range from query params, in the user's timezone
+    days = int(request.query_params.get('days', 30))
+    return Response(reports.task_analytics(request.user, request_windows(request), days))
+
+
+@timed_api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def smart_suggestions(request):
+    """Get the user's top-ranked task suggestions (see tasks.suggestions)."""
+    suggestions = suggestion_engine.for_user(request.user)
     return Response({
         'suggestions': suggestions,
         'total_count': len(suggestions)
     })
 
 
-@api_view(['GET'])
+@timed_api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cached_response('calendar')
 def calendar_view(request):
     """Get calendar view data for tasks."""
-    user = request.user
-    
-    # Get month and year from query params
-    month = int(request.query_params.get('month', timezone.now().month))
-    year = int(request.query_params.get('year', timezone.now().year))
-    
-    # Get tasks for the specified month
-    start_date = timezone.datetime(year, month, 1, tzinfo=timezone.utc)
-    if month == 12:
-        end_date = timezone.datetime(year + 1, 1, 1, tzinfo=timezone.utc)
-    else:
-        end_date = timezone.datetime(year, month + 1, 1, tzinfo=timezone.utc)
-    
-    tasks = Task.objects.filter(
-        user=user,
-        due_date__range=[start_date, end_date]
-    ).select_related('category')
-    
-    # Group tasks by date
-    calendar_data = {}
-    for task in tasks:
-        date_key = task.due_date.date().isoformat()
-        if date_key not in calendar_data:
-            calendar_data[date_key] = []
-        
-        calendar_data[date_key].append({
-            'id': str(task.id),
-            'title': task.title,
-            'priority': task.priority,
-            'status': task.status,
-            'category': CategorySerializer(task.category).data if task.category else None
-        })
-    
-    return Response({
-        'month': month,
-        'year': year,
-        'calendar_data': calendar_data
-    }) 
\ No newline at end of file
+    # Month and year from query params; months are in the user's timezone
+    windows = request_windows(request)
+    month = int(request.query_params.get('month', windows.today.month))
+    year = int(request.query_params.get('year', windows.today.year))
+    return Response(reports.calendar(request.user, windows, month, year))
+
+
+@timed_api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def dashboard_view(request):
+    """Get the home screen sections, suggestions and counts in one response."""
+    windows = request_windows(request)
+    sparse = request_sparse(request)
+    tasks = list(sparse_queryset(open_tasks(request.user, windows.now), TaskListSerializer, sparse, project=False))
+    limit = parse_limit(request.query_params.get('limit'))
+    return Response(build_dashboard(tasks, windows, limit=limit, sparse=sparse))
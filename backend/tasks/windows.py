@@ -0,0 +1,84 @@
+"""
+Local calendar windows for a user, as half-open UTC datetime ranges.
+
+Filtering with ``due_date__date=...`` casts the column to a date in UTC,
+which defeats the ``(user, due_date)`` index and puts "today" at UTC
+midnight for everyone. DateWindows resolves the user's local dates to
+``[start, end)`` instants once per request, so queries can use
+``due_date__gte=start, due_date__lt=end`` instead.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.utils import timezone
+
+
+@lru_cache(maxsize=512)
+def get_zone(name):
+    """ZoneInfo for ``name``, falling back to UTC for unknown or empty names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return dt_timezone.utc
+
+
+class DateWindows:
+    """A user's local calendar at one instant ``now``."""
+    
+    def __init__(self, tz, now=None):
+        self.tz = tz
+        self.now = now or timezone.now()
+        self.today = self.now.astimezone(tz).date()
+    
+    @classmethod
+    def for_user(cls, user, now=None):
+        return cls(get_zone(getattr(user, 'timezone', None) or 'UTC'), now)
+    
+    def start_of(self, day):
+        """
+        UTC instant at which local ``day`` starts. When midnight does not
+        exist (a DST gap), that is the first instant of the day.
+        """
+        return datetime.combine(day, time.min, tzinfo=self.tz).astimezone(dt_timezone.utc)
+    
+    def local_date(self, value):
+        """Local date of an aware datetime."""
+        return value.astimezone(self.tz).date()
+    
+    def dates(self, first, last):
+        """``(start, end)`` covering local dates ``first`` to ``last`` inclusive."""
+        return self.start_of(first), self.start_of(last + timedelta(days=1))
+    
+    def day(self, offset=0):
+        """The local day ``offset`` days from today."""
+        day = self.today + timedelta(days=offset)
+        return self.dates(day, day)
+    
+    def next_days(self, days):
+        """Today and the following ``days`` days, like ``__date__range=[today, today + days]``."""
+        return self.dates(self.today, self.today + timedelta(days=days))
+    
+    def last_days(self, days):
+        """The ``days`` days before today and today, like ``__date__range=[today - days, today]``."""
+        return self.dates(self.today - timedelta(days=days), self.today)
+    
+    def month(self, year, month):
+        """The local calendar month ``month`` of ``year``."""
+        return self.start_of(date(year, month, 1)), self.start_of(date(year + month // 12, month % 12 + 1, 1))
+
+
+def in_range(field, window):
+    """Filter kwargs for ``start <= field < end``."""
+    start, end = window
+    return {f'{field}__gte': start, f'{field}__lt': end}
+
+
+def request_windows(request):
+    """DateWindows of the requesting user, computed once per request."""
+    windows = getattr(request, '_date_windows', None)
+    if windows is None:
+        windows = DateWindows.for_user(request.user)
+        request._date_windows = windows
+    return windows
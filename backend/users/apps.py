@@ -3,4 +3,12 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'users' 
\ No newline at end of file
+    name = 'users'
+    
+    def ready(self):
+        from taskmaster.conf import require_shared_cache
+        from . import signals  # noqa: F401
+        from .authentication import get_user_cache_settings
+        
+        # A user saved in one worker must be reloaded by all of them
+        require_shared_cache(get_user_cache_settings()['CACHE'], "AUTH_USER_CACHE['CACHE']")
@@ -0,0 +1,16 @@
+"""
+Async version of the user statistics endpoint, served when running under ASGI.
+"""
+
+from asgiref.sync import sync_to_async
+
+from .authentication import async_jwt_view
+
+
+@async_jwt_view('GET')
+async def user_stats_view(request):
+    """Get user statistics (tasks.reports.user_stats)."""
+    from tasks.async_views import json_response
+    from tasks.reports import user_stats
+    
+    return json_response(await sync_to_async(user_stats)(request.user), request=request)
@@ -0,0 +1,231 @@
+import time
+from functools import wraps
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+from django.http import JsonResponse
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import Throttled
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from monitoring.timing import get_current_metrics
+from taskmaster.conf import settings_getter
+from taskmaster.throttling import aconsume
+
+from .models import User
+from .revocation import revocation_filter
+
+# Token claim carrying User.auth_version at issue time
+AUTH_VERSION_CLAIM = 'ver'
+
+# Fields the API views read from request.user; everything else is deferred
+CACHED_USER_FIELDS = (
+    'id', 'username', 'email', 'first_name', 'last_name', 'is_active',
+    'is_staff', 'is_superuser', 'timezone', 'default_priority',
+    'default_category', 'auth_version',
+)
+
+DEFAULTS = {
+    'CACHE': 'default',  # CACHES alias holding the snapshots; must be seen by every process
+    'TTL': 60,  # seconds
+}
+
+
+get_user_cache_settings = settings_getter('AUTH_USER_CACHE', DEFAULTS)
+
+
+class UserSnapshotCache:
+    """
+    User field values kept in a cache every process sees.
+    
+    Saving or deleting a user drops its entry once the change commits (see
+    users.signals), so the next request in any process reloads it. Entries
+    also expire after ``ttl`` seconds, which bounds how stale a snapshot
+    gets after writes that bypass save() (queryset updates).
+    """
+    
+    def __init__(self, cache, ttl=60):
+        self.cache = cache
+        self.ttl = ttl
+    
+    @staticmethod
+    def key(user_id):
+        return f'auth-user:{user_id}'
+    
+    def get(self, user_id):
+        return self.cache.get(self.key(user_id))
+    
+    async def aget(self, user_id):
+        return await self.cache.aget(self.key(user_id))
+    
+    def set(self, user_id, values):
+        self.cache.set(self.key(user_id), values, self.ttl)
+    
+    async def aset(self, user_id, values):
+        await self.cache.aset(self.key(user_id), values, self.ttl)
+    
+    def invalidate(self, user_id):
+        self.cache.delete(self.key(user_id))
+
+
+_config = get_user_cache_settings()
+user_cache = UserSnapshotCache(caches[_config['CACHE']], ttl=_config['TTL'])
+
+# from_db() expects values in concrete field order
+_snapshot_fields = [f.attname for f in User._meta.concrete_fields if f.attname in CACHED_USER_FIELDS]
+
+
+def build_user(values):
+    """Build a User from a cached snapshot; fields outside the snapshot are deferred."""
+    return User.from_db(DEFAULT_DB_ALIAS, _snapshot_fields, [values[name] for name in _snapshot_fields])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves request.user from a cached snapshot
+    (UserSnapshotCache) instead of loading the full user row on every
+    request.
+    
+    request.user is a real User instance with only CACHED_USER_FIELDS
+    loaded, so it works as a foreign key value; any other field is loaded
+    on first access. A token issued after the cached snapshot (its ``ver``
+    claim is newer) forces a reload.
+    """
+    
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        values = self._current(validated_token, user_cache.get(user_id))
+        if values is None:
+            values = User.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*_snapshot_fields).first()
+            self._check_found(values)
+            user_cache.set(user_id, values)
+        return self._active_user(values)
+    
+    async def aget_user(self, validated_token):
+        """Async ``get_user`` for plain Django async views (see async_jwt_view)."""
+        user_id = self._user_id(validated_token)
+        values = self._current(validated_token, await user_cache.aget(user_id))
+        if values is None:
+            values = await User.objects.filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).values(*_snapshot_fields).afirst()
+            self._check_found(values)
+            await user_cache.aset(user_id, values)
+        return self._active_user(values)
+    
+    async def aauthenticate(self, request):
+        """Async ``authenticate``; token validation is CPU only, so just the user lookup awaits."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+    
+    @staticmethod
+    def _user_id(validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+    
+    @staticmethod
+    def _current(validated_token, values):
+        """Cached ``values``, or None when missing or older than the token."""
+        token_version = validated_token.get(AUTH_VERSION_CLAIM)
+        if values is not None and token_version is not None and token_version > values['auth_version']:
+            return None
+        return values
+    
+    @staticmethod
+    def _check_found(values):
+        if values is None:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+    
+    def _active_user(self, values):
+        if not values['is_active']:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return build_user(values)
+
+
+def async_jwt_view(*methods):
+    """
+    Decorator for plain Django async views that need the same JWT
+    authentication as the DRF API.
+    
+    DRF views are sync only, so async endpoints bypass APIView; this sets
+    request.user/request.auth via CachedJWTAuthentication, applies the
+    token-bucket throttle (taskmaster.throttling) and answers 401, 429 and
+    405 with DRF's error body shape, in APIView's order. Only ``methods``
+    (default GET) are allowed.
+    """
+    allowed = [method.upper() for method in methods] or ['GET']
+    authenticator = CachedJWTAuthentication()
+    
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            metrics = get_current_metrics()
+            start = time.perf_counter()
+            try:
+                result = await authenticator.aauthenticate(request)
+            except AuthenticationFailed as exc:
+                detail = exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}
+                return JsonResponse(
+                    detail, status=401, headers={'WWW-Authenticate': authenticator.authenticate_header(request)},
+                )
+            finally:
+                if metrics is not None:
+                    metrics.auth_time += time.perf_counter() - start
+            
+            if result is None:
+                return JsonResponse(
+                    {'detail': 'Authentication credentials were not provided.'},
+                    status=401, headers={'WWW-Authenticate': authenticator.authenticate_header(request)},
+                )
+            request.user, request.auth = result
+            
+            retry_after = await aconsume(request)
+            if retry_after:
+                exc = Throttled(retry_after)
+                return JsonResponse({'detail': exc.detail}, status=429, headers={'Retry-After': str(exc.wait)})
+            
+            if request.method not in allowed:
+                return JsonResponse(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status=405, headers={'Allow': ', '.join(allowed)},
+                )
+            return await view(request, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
+
+
+class VersionedRefreshToken(RefreshToken):
+    """
+    Refresh token that records the user's auth_version (copied to access
+    tokens) and checks the blacklist through the in-memory revocation filter.
+    """
+    
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[AUTH_VERSION_CLAIM] = user.auth_version
+        return token
+    
+    def check_blacklist(self):
+        if revocation_filter.is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
+    
+    def blacklist(self):
+        result = super().blacklist()
+        revocation_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
@@ -0,0 +1,15 @@
+"""Background jobs of the users app (see jobqueue.api)."""
+
+from io import StringIO
+
+from django.core.management import call_command
+
+from jobqueue.api import job
+
+
+@job
+def prune_tokens():
+    """Delete expired refresh tokens (the prune_tokens command)."""
+    output = StringIO()
+    call_command('prune_tokens', stdout=output)
+    return output.getvalue().strip()
@@ -0,0 +1,36 @@
+"""
+Delete expired outstanding and blacklisted refresh tokens in small batches.
+
+simplejwt's flushexpiredtokens deletes everything in one statement, which
+holds long locks once the tables are large. Run this periodically instead.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired refresh tokens from the outstanding/blacklist tables in batches.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction')
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        now = timezone.now()
+        deleted = 0
+        
+        while True:
+            ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+        
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} expired tokens'))
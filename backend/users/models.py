@@ -3,6 +3,10 @@ from django.db import models
 from django.utils import timezone
 
 
+# Changes to these fields bump auth_version
+AUTH_VERSION_FIELDS = ('username', 'email', 'password', 'is_active', 'is_staff', 'is_superuser')
+
+
 class User(AbstractUser):
     """Custom user model for TaskMaster."""
     
@@ -44,6 +48,9 @@ class User(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Bumped whenever credentials, active state or staff flags change (AUTH_VERSION_FIELDS)
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+    
     class Meta:
         verbose_name = 'User'
         verbose_name_plural = 'Users'
@@ -51,6 +58,39 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Remember the loaded auth field values so save() can tell what changed."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = instance._auth_values()
+        return instance
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        """Remember reloaded values too, including deferred fields loaded on first access."""
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None:
+            current = self._auth_values()
+            loaded.update((name, value) for name, value in current.items() if fields is None or name in fields)
+    
+    def _auth_values(self):
+        deferred = self.get_deferred_fields()
+        return {name: getattr(self, name) for name in AUTH_VERSION_FIELDS if name not in deferred}
+    
+    def save(self, *args, **kwargs):
+        """Bump auth_version when an auth field (AUTH_VERSION_FIELDS) changed."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is not None and not self._state.adding:
+            current = self._auth_values()
+            # A field deferred at load time and set without being read counts as changed
+            if current != loaded:
+                self.auth_version += 1
+                update_fields = kwargs.get('update_fields')
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'auth_version'}
+        super().save(*args, **kwargs)
+        self._loaded_values = self._auth_values()
+    
     def get_full_name_or_username(self):
         """Return full name if available, otherwise username."""
         if self.first_name and self.last_name:
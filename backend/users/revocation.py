@@ -0,0 +1,172 @@
+"""
+In-memory front for the refresh token blacklist.
+
+Every refresh and logout used to ask the database whether the token's jti
+is blacklisted. RevocationFilter keeps a Bloom filter of blacklisted jtis so
+the common case, a token that was never revoked, is answered from memory;
+only possible matches are confirmed against the BlacklistedToken table.
+"""
+
+import hashlib
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from taskmaster.conf import settings_getter
+
+DEFAULTS = {
+    'CAPACITY': 100000,
+    'ERROR_RATE': 0.001,
+    'SYNC_INTERVAL': 5,  # seconds between incremental loads of new blacklist rows
+    'REBUILD_INTERVAL': 3600,  # seconds between full rebuilds (drops pruned tokens)
+    'SYNC_OVERLAP': 60,  # seconds each incremental load reaches back before the previous one
+}
+
+
+get_revocation_settings = settings_getter('TOKEN_REVOCATION', DEFAULTS)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing of one blake2b digest."""
+    
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+    
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key):
+        bits = self.bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class RevocationFilter:
+    """
+    Bloom filter of blacklisted refresh token jtis, kept in sync with the
+    BlacklistedToken table.
+    
+    At most every SYNC_INTERVAL seconds, rows blacklisted since the previous
+    load started, minus SYNC_OVERLAP seconds, are loaded again. The overlap
+    covers rows whose transaction committed after that load ran, and clock
+    differences between servers; rows already seen in it are not counted
+    twice. Tokens blacklisted by this process are added immediately. A token
+    blacklisted by another process can therefore pass the filter for up to
+    SYNC_INTERVAL seconds. The filter is rebuilt from unexpired rows every
+    REBUILD_INTERVAL seconds or when it fills up, which also forgets tokens
+    removed by ``prune_tokens``.
+    
+    Loads run without the lock: other threads keep using the current filter
+    meanwhile, and confirm every jti against the database while the first
+    load is running.
+    """
+    
+    def __init__(self, capacity=100000, error_rate=0.001, sync_interval=5, rebuild_interval=3600, sync_overlap=60):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.sync_overlap = timedelta(seconds=sync_overlap)
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._recent = {}  # id -> blacklisted_at of the loaded rows the next sync reads again
+        self._loaded_since = None  # When the last load started
+        self._added = []  # jtis added while a load runs, for the filter it rebuilds
+        self._loading = False
+        self._built_at = 0.0
+        self._synced_at = 0.0
+    
+    def _load(self, rebuild):
+        """Rows (id, jti, blacklisted_at) of a rebuild, or of a sync; runs without the lock."""
+        rows = BlacklistedToken.objects.all()
+        if rebuild:
+            rows = rows.filter(token__expires_at__gt=timezone.now())
+        else:
+            rows = rows.filter(blacklisted_at__gte=self._loaded_since - self.sync_overlap)
+        return list(rows.values_list('id', 'token__jti', 'blacklisted_at'))
+    
+    def _refresh_if_due(self):
+        with self._lock:
+            now = time.monotonic()
+            rebuild = self._bloom is None or now - self._built_at >= self.rebuild_interval
+            if self._loading or not (rebuild or now - self._synced_at >= self.sync_interval):
+                return
+            self._loading = True
+        try:
+            started = timezone.now()
+            rows = self._load(rebuild)
+            with self._lock:
+                self._apply(rows, rebuild, started)
+        finally:
+            with self._lock:
+                self._loading = False
+                self._added = []
+    
+    def _apply(self, rows, rebuild, started):
+        """Add loaded ``rows`` to the filter, or build a new one from them (caller holds the lock)."""
+        if rebuild:
+            bloom = BloomFilter(max(self.capacity, len(rows) * 2), self.error_rate)
+            for jti in self._added:
+                bloom.add(jti)
+            self._recent = {}
+            self._bloom = bloom
+            self._built_at = time.monotonic()
+        bloom = self._bloom
+        for pk, jti, blacklisted_at in rows:
+            if pk not in self._recent:
+                bloom.add(jti)
+                self._recent[pk] = blacklisted_at
+        cutoff = started - self.sync_overlap
+        self._recent = {pk: at for pk, at in self._recent.items() if at >= cutoff}
+        self._loaded_since = started
+        self._synced_at = time.monotonic()
+        if bloom.count > bloom.capacity:
+            self._built_at = float('-inf')  # Rebuild on next use
+    
+    def is_revoked(self, jti):
+        """Return True if ``jti`` is blacklisted; only filter hits reach the database."""
+        self._refresh_if_due()
+        with self._lock:
+            # No filter yet while another thread builds the first one
+            maybe_revoked = self._bloom is None or jti in self._bloom
+        if not maybe_revoked:
+            return False
+        return BlacklistedToken.objects.filter(token__jti=jti).exists()
+    
+    def add(self, jti):
+        """Record a token this process just blacklisted."""
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+            if self._loading:
+                self._added.append(jti)
+    
+    def reset(self):
+        """Force a full rebuild on next use."""
+        with self._lock:
+            self._bloom = None
+
+
+_config = get_revocation_settings()
+revocation_filter = RevocationFilter(
+    capacity=_config['CAPACITY'],
+    error_rate=_config['ERROR_RATE'],
+    sync_interval=_config['SYNC_INTERVAL'],
+    rebuild_interval=_config['REBUILD_INTERVAL'],
+    sync_overlap=_config['SYNC_OVERLAP'],
+)
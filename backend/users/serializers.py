@@ -1,9 +1,12 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
 from django.contrib.auth import authenticate
+from monitoring.timing import TimedSerializerMixin
+from .authentication import VersionedRefreshToken
 from .models import User
 
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+class UserRegistrationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for user registration."""
     
     password = serializers.CharField(write_only=True, min_length=8)
@@ -54,7 +57,7 @@ class UserLoginSerializer(serializers.Serializer):
         return attrs
 
 
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for user profile."""
     
     class Meta:
@@ -68,7 +71,7 @@ class UserProfileSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'username', 'date_joined', 'created_at', 'updated_at']
 
 
-class UserUpdateSerializer(serializers.ModelSerializer):
+class UserUpdateSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     """Serializer for updating user profile."""
     
     class Meta:
@@ -105,4 +108,10 @@ class ChangePasswordSerializer(serializers.Serializer):
         user = self.context['request'].user
         if not user.check_password(value):
             raise serializers.ValidationError('Old password is incorrect.')
-        return value 
\ No newline at end of file
+        return value 
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """Refresh serializer whose blacklist checks go through the revocation filter."""
+    
+    token_class = VersionedRefreshToken
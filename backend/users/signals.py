@@ -0,0 +1,18 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    """
+    Drop the cached auth snapshot once the change commits, so the next
+    request, in any process, reloads the user. Dropping it earlier would let
+    a concurrent request cache the old row again.
+    """
+    user_id = instance.pk
+    transaction.on_commit(lambda: user_cache.invalidate(user_id))
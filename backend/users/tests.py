@@ -0,0 +1,174 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .authentication import CachedJWTAuthentication, VersionedRefreshToken, user_cache
+from .models import User
+from .revocation import BloomFilter, RevocationFilter, revocation_filter
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_added_keys_are_always_found(self):
+        bloom = BloomFilter(1000)
+        keys = [f'jti-{n}' for n in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertEqual(bloom.count, 1000)
+    
+    def test_false_positive_rate_stays_near_target(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for n in range(1000):
+            bloom.add(f'jti-{n}')
+        false_positives = sum(f'other-{n}' in bloom for n in range(10000))
+        self.assertLess(false_positives, 300)  # 1% target, generous margin
+
+
+class AuthVersionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+    
+    def saved_version(self, user):
+        user.save()
+        return User.objects.get(pk=user.pk).auth_version
+    
+    def test_profile_changes_keep_the_version(self):
+        self.user.first_name = 'Alice'
+        self.user.timezone = 'Europe/Paris'
+        self.assertEqual(self.saved_version(self.user), 0)
+    
+    def test_deferred_fields_loaded_on_access_are_not_changes(self):
+        user = User.objects.only('id', 'username').get(pk=self.user.pk)
+        self.assertTrue(user.check_password('pass-1234'))  # Loads the deferred password
+        self.assertEqual(user.email, 'alice@example.com')
+        self.assertEqual(self.saved_version(user), 0)
+    
+    def test_auth_field_changes_bump_the_version(self):
+        self.user.is_active = False
+        self.assertEqual(self.saved_version(self.user), 1)
+        user = User.objects.only('id', 'username').get(pk=self.user.pk)
+        user.set_password('new-pass-1234')  # Set while deferred, never read
+        self.assertEqual(self.saved_version(user), 2)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        self.token = VersionedRefreshToken.for_user(self.user).access_token
+        self.authentication = CachedJWTAuthentication()
+    
+    def test_snapshot_is_shared_and_only_defers_other_fields(self):
+        user = self.authentication.get_user(self.token)
+        self.assertEqual((user.pk, user.username), (self.user.pk, 'alice'))
+        self.assertIn('bio', user.get_deferred_fields())
+        self.assertEqual(caches['default'].get(user_cache.key(self.user.pk))['username'], 'alice')
+        with self.assertNumQueries(0):
+            self.authentication.get_user(self.token)
+    
+    def test_saving_the_user_drops_the_snapshot_on_commit(self):
+        self.authentication.get_user(self.token)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(first_name='Alice')  # Bypasses save()
+            self.assertEqual(self.authentication.get_user(self.token).first_name, '')
+            self.user.is_active = False
+            self.user.save()
+            # Not before the save commits
+            self.assertIsNotNone(user_cache.get(self.user.pk))
+        self.assertIsNone(user_cache.get(self.user.pk))
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.get_user(self.token)
+    
+    def test_newer_token_forces_a_reload(self):
+        self.authentication.get_user(self.token)
+        User.objects.filter(pk=self.user.pk).update(first_name='Alice', auth_version=1)
+        self.user.refresh_from_db()
+        newer = VersionedRefreshToken.for_user(self.user).access_token
+        self.assertEqual(self.authentication.get_user(newer).first_name, 'Alice')
+
+
+class RevocationFilterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+    
+    def test_blacklisted_token_is_revoked(self):
+        revocation = RevocationFilter(sync_interval=0)
+        token = VersionedRefreshToken.for_user(self.user)
+        self.assertFalse(revocation.is_revoked(token['jti']))
+        token.blacklist()
+        self.assertTrue(revocation.is_revoked(token['jti']))
+    
+    def test_blacklist_rows_from_other_processes_are_synced(self):
+        revocation = RevocationFilter(sync_interval=0)
+        token = VersionedRefreshToken.for_user(self.user)
+        revocation.is_revoked(token['jti'])  # Builds the filter
+        # Written directly, as another process would, without revocation.add()
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=token['jti']))
+        self.assertTrue(revocation.is_revoked(token['jti']))
+    
+    def test_rows_committed_late_with_lower_ids_are_synced(self):
+        revocation = RevocationFilter(sync_interval=0)
+        early, late = (VersionedRefreshToken.for_user(self.user) for _ in range(2))
+        BlacklistedToken.objects.create(id=10, token=OutstandingToken.objects.get(jti=late['jti']))
+        revocation.is_revoked('unused')  # Builds the filter past id 10
+        # A transaction that took id 5 earlier and committed only now
+        BlacklistedToken.objects.create(id=5, token=OutstandingToken.objects.get(jti=early['jti']))
+        self.assertTrue(revocation.is_revoked(early['jti']))
+    
+    def test_rows_read_again_in_the_overlap_are_counted_once(self):
+        revocation = RevocationFilter(sync_interval=0)
+        for _ in range(3):
+            VersionedRefreshToken.for_user(self.user).blacklist()
+        for _ in range(3):
+            revocation.is_revoked('unused')
+        self.assertEqual(revocation._bloom.count, 3)
+    
+    def test_database_is_queried_without_the_lock(self):
+        revocation = RevocationFilter(sync_interval=0)
+        load = revocation._load
+        
+        def unlocked_load(rebuild):
+            self.assertFalse(revocation._lock.locked())
+            return load(rebuild)
+        
+        with mock.patch.object(revocation, '_load', side_effect=unlocked_load) as patched:
+            revocation.is_revoked('unused')
+            revocation.is_revoked('unused')
+        self.assertEqual([call.args for call in patched.call_args_list], [(True,), (False,)])
+    
+    def test_filter_hit_is_confirmed_against_the_database(self):
+        revocation = RevocationFilter()
+        revocation.is_revoked('unused')  # Builds the filter
+        revocation.add('never-blacklisted')
+        self.assertFalse(revocation.is_revoked('never-blacklisted'))
+
+
+class TokenRefreshTests(TestCase):
+    def setUp(self):
+        caches['throttle'].clear()
+        revocation_filter.reset()
+        self.user = User.objects.create_user('alice', 'alice@example.com', 'pass-1234')
+        self.client = APIClient()
+    
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        refresh = str(VersionedRefreshToken.for_user(self.user))
+        url = reverse('users:token-refresh')
+        response = self.client.post(url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.data)
+        response = self.client.post(url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+    
+    def test_logged_out_refresh_token_is_rejected(self):
+        refresh = VersionedRefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        response = self.client.post(reverse('users:logout'), {'refresh_token': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials()
+        response = self.client.post(reverse('users:token-refresh'), {'refresh': str(refresh)}, format='json')
+        self.assertEqual(response.status_code, 401)
@@ -1,5 +1,6 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'users'
 
@@ -8,6 +9,7 @@ urlpatterns = [
     path('auth/register/', views.UserRegistrationView.as_view(), name='register'),
     path('auth/login/', views.UserLoginView.as_view(), name='login'),
     path('auth/logout/', views.logout_view, name='logout'),
+    path('auth/refresh/', views.TokenRefreshView.as_view(), name='token-refresh'),
     
     # Profile management
     path('profile/', views.UserProfileView.as_view(), name='profile'),
@@ -15,5 +17,9 @@ urlpatterns = [
     path('profile/change-password/', views.ChangePasswordView.as_view(), name='change-password'),
     
     # User statistics
-    path('stats/', views.user_stats_view, name='user-stats'),
+    path(
+        'stats/',
+        async_views.user_stats_view if settings.ASYNC_READ_VIEWS else views.user_stats_view,
+        name='user-stats',
+    ),
 ] 
\ No newline at end of file
@@ -1,17 +1,19 @@
 from rest_framework import status, generics, permissions
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import permission_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt import views as jwt_views
 from django.contrib.auth import update_session_auth_hash
+from .authentication import VersionedRefreshToken
 from .models import User
 from .serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserProfileSerializer,
     UserUpdateSerializer, ChangePasswordSerializer
 )
-from django.utils import timezone
 
+from monitoring.timing import TimedViewMixin, timed_api_view
 
-class UserRegistrationView(generics.CreateAPIView):
+
+class UserRegistrationView(TimedViewMixin, generics.CreateAPIView):
     """User registration view."""
     
     queryset = User.objects.all()
@@ -25,7 +27,7 @@ class UserRegistrationView(generics.CreateAPIView):
         user = serializer.save()
         
         # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         
         return Response({
             'message': 'User registered successfully',
@@ -37,7 +39,11 @@ class UserRegistrationView(generics.CreateAPIView):
         }, status=status.HTTP_201_CREATED)
 
 
-class UserLoginView(generics.GenericAPIView):
+class TokenRefreshView(TimedViewMixin, jwt_views.TokenRefreshView):
+    """simplejwt's token refresh view, timed like the other API views."""
+
+
+class UserLoginView(TimedViewMixin, generics.GenericAPIView):
     """User login view."""
     
     serializer_class = UserLoginSerializer
@@ -49,7 +55,7 @@ class UserLoginView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         
         user = serializer.validated_data['user']
-        refresh = RefreshToken.for_user(user)
+        refresh = VersionedRefreshToken.for_user(user)
         
         return Response({
             'message': 'Login successful',
@@ -61,37 +67,37 @@ class UserLoginView(generics.GenericAPIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserProfileView(generics.RetrieveUpdateAPIView):
+class UserProfileView(TimedViewMixin, generics.RetrieveUpdateAPIView):
     """User profile view."""
     
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        """Return the current user."""
-        return self.request.user
+        """Return the current user with all profile fields loaded."""
+        return User.objects.get(pk=self.request.user.pk)
 
 
-class UserUpdateView(generics.UpdateAPIView):
+class UserUpdateView(TimedViewMixin, generics.UpdateAPIView):
     """User update view."""
     
     serializer_class = UserUpdateSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        """Return the current user."""
-        return self.request.user
+        """Return the current user with all profile fields loaded."""
+        return User.objects.get(pk=self.request.user.pk)
 
 
-class ChangePasswordView(generics.UpdateAPIView):
+class ChangePasswordView(TimedViewMixin, generics.UpdateAPIView):
     """Change password view."""
     
     serializer_class = ChangePasswordSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     def get_object(self):
-        """Return the current user."""
-        return self.request.user
+        """Return the current user with all profile fields loaded."""
+        return User.objects.get(pk=self.request.user.pk)
     
     def update(self, request, *args, **kwargs):
         """Update user password."""
@@ -111,14 +117,14 @@ class ChangePasswordView(generics.UpdateAPIView):
         }, status=status.HTTP_200_OK)
 
 
-@api_view(['POST'])
+@timed_api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def logout_view(request):
     """Logout view - blacklist refresh token."""
     try:
         refresh_token = request.data.get('refresh_token')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = VersionedRefreshToken(refresh_token)
             token.blacklist()
             return Response({'message': 'Logout successful'}, status=status.HTTP_200_OK)
         else:
@@ -127,27 +133,9 @@ def logout_view(request):
         return Response({'error': 'Invalid token'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['GET'])
+@timed_api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def user_stats_view(request):
     """Get user statistics."""
-    user = request.user
-    
-    # Get task statistics
-    from tasks.models import Task
-    total_tasks = Task.objects.filter(user=user).count()
-    completed_tasks = Task.objects.filter(user=user, status='completed').count()
-    pending_tasks = Task.objects.filter(user=user, status='pending').count()
-    overdue_tasks = Task.objects.filter(
-        user=user, 
-        status='pending', 
-        due_date__lt=timezone.now()
-    ).count()
-    
-    return Response({
-        'total_tasks': total_tasks,
-        'completed_tasks': completed_tasks,
-        'pending_tasks': pending_tasks,
-        'overdue_tasks': overdue_tasks,
-        'completion_rate': (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-    }, status=status.HTTP_200_OK) 
\ No newline at end of file
+    from tasks.reports import user_stats
+    return Response(user_stats(request.user), status=status.HTTP_200_OK)